@@ -4,4 +4,5 @@ set -o errexit
 pip install -r requirements.txt
 python manage.py collectstatic --noinput
 python manage.py makemigrations
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+python manage.py rebuild_user_stats --missing-only
\ No newline at end of file
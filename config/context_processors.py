@@ -1,18 +1,13 @@
-from .models import Notification
+from pallattepartner.pallate.notifications import request_notification_summary
 
 def notifications_context(request):
     if not request.user.is_authenticated:
         return {}
 
-    notifications = (
-        Notification.objects
-        .filter(user=request.user)
-        .order_by('-created_at')[:15]
-    )
-
-    unread_count = notifications.filter(is_read=False).count()
+    # Cached per user and memoized on the request (see pallate/notifications.py)
+    summary = request_notification_summary(request)
 
     return {
-        "notifications": notifications,
-        "unread_notifications_count": unread_count,
-    }
\ No newline at end of file
+        "notifications": summary['notifications'],
+        "unread_notifications_count": summary['unread_count'],
+    }
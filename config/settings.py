@@ -76,6 +76,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'config.context_processors.notifications_context',
             ],
         },
     },
@@ -137,6 +138,87 @@ STATICFILES_DIRS = [
 CRISPY_ALLOWED_TEMPLATE_PACKS = "tailwind"
 CRISPY_TEMPLATE_PACK = "tailwind"
 
+# Uploaded images (pallattepartner/pallate/uploads.py). Images over the size or
+# pixel limit are rejected while the request is still being read; accepted
+# ones are re-encoded without EXIF and scaled down to the maximum dimension.
+IMAGE_UPLOAD_MAX_SIZE = int(os.getenv('IMAGE_UPLOAD_MAX_SIZE', str(10 * 1024 * 1024)))
+IMAGE_UPLOAD_MAX_PIXELS = int(os.getenv('IMAGE_UPLOAD_MAX_PIXELS', '40000000'))
+IMAGE_UPLOAD_MAX_DIMENSION = int(os.getenv('IMAGE_UPLOAD_MAX_DIMENSION', '2560'))
+FILE_UPLOAD_HANDLERS = [
+    'pallattepartner.pallate.uploads.ImageUploadLimitHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# With Supabase Storage, browsers upload straight to the bucket through
+# short-lived signed URLs (pallattepartner/pallate/direct_uploads.py) instead
+# of streaming files through a web worker. The bucket needs a CORS rule that
+# allows PUT from the site's origin.
+DIRECT_UPLOADS = os.getenv('DIRECT_UPLOADS', 'True').lower() == 'true'
+DIRECT_UPLOAD_EXPIRY = int(os.getenv('DIRECT_UPLOAD_EXPIRY', '300'))
+COLLABORATION_FILE_MAX_SIZE = int(os.getenv('COLLABORATION_FILE_MAX_SIZE', str(50 * 1024 * 1024)))
+
+# Media URLs are memoized per stored name (pallattepartner/pallate/media.py).
+# Changing MEDIA_URL_VERSION adds ?v=<version> to every media URL, which makes
+# browsers and the CDN fetch them again, e.g. after moving the bucket.
+MEDIA_URL_VERSION = os.getenv('MEDIA_URL_VERSION', '')
+
+# In-process background jobs (pallattepartner/pallate/jobs.py)
+# Set BACKGROUND_JOBS_EAGER=true to run jobs inline, e.g. when debugging
+BACKGROUND_JOBS_WORKERS = int(os.getenv('BACKGROUND_JOBS_WORKERS', '2'))
+BACKGROUND_JOBS_EAGER = os.getenv('BACKGROUND_JOBS_EAGER', 'False').lower() == 'true'
+
+# Real-time push (pallattepartner/pallate/realtime.py), served by config/asgi.py.
+# The in-memory broker only reaches streams of the same process; with several
+# workers set REALTIME_REDIS_URL.
+if os.getenv('REALTIME_REDIS_URL'):
+    REALTIME_BROKER = {
+        'BACKEND': 'pallattepartner.pallate.realtime.RedisBroker',
+        'OPTIONS': {'url': os.getenv('REALTIME_REDIS_URL')},
+    }
+else:
+    REALTIME_BROKER = {'BACKEND': 'pallattepartner.pallate.realtime.InMemoryBroker'}
+
+# ASGI-native read-heavy views (pallattepartner/pallate/async_views.py).
+# Only useful when served through config/asgi.py; reads run on a pool of
+# ASYNC_VIEW_READ_WORKERS threads per worker process.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False').lower() == 'true'
+ASYNC_VIEW_READ_WORKERS = int(os.getenv('ASYNC_VIEW_READ_WORKERS', '4'))
+
+# Cache for fragments, JSON feeds, counters and summaries
+# (pallattepartner/pallate/caching.py). CACHE_BACKEND is one of:
+#   locmem - per process; fine for development and single-process servers
+#   file   - directory at CACHE_LOCATION, shared by the processes of one machine
+#   redis  - CACHE_LOCATION (or REALTIME_REDIS_URL) URL, needs the redis package
+# Hit/miss rates per fragment are at /admin/cache-stats/.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem').lower()
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_LOCATION') or os.getenv('REALTIME_REDIS_URL'),
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+# Cached fragments and views, and the ETags of conditional.py, depend on
+# versions kept in the cache, so by default they are only used when it is
+# shared by all workers
+FRAGMENT_CACHE = os.getenv('FRAGMENT_CACHE', str(CACHE_BACKEND in ('redis', 'file'))).lower() == 'true'
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', '300'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -200,6 +282,8 @@ if USE_SUPABASE_STORAGE:
     AWS_S3_OBJECT_PARAMETERS = {
         'CacheControl': 'max-age=86400',  # Cache for 1 day
     }
+    # Connections kept open by the process-wide boto3 client (pallate/storage.py)
+    AWS_S3_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_S3_MAX_POOL_CONNECTIONS', '50'))
     
     # Use custom storage backends (Django 4.2+ STORAGES setting)
     STORAGES = {
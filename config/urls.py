@@ -4,7 +4,10 @@ from django.conf import settings
 from django.urls import path, include
 from django.conf.urls.static import static
 
+from pallattepartner.pallate.admin import cache_stats_view
+
 urlpatterns = [
+    path('admin/cache-stats/', admin.site.admin_view(cache_stats_view), name='cache_stats'),
     path('admin/', admin.site.urls),
     path('', include(('pallattepartner.pallate.urls', 'pallate'), namespace='pallate')),
 
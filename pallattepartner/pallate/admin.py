@@ -1,4 +1,7 @@
 from django.contrib import admin
+from django.shortcuts import redirect, render
+
+from .caching import NAMESPACES, cache_stats, get_versions, reset_cache_stats
 from .models import (
     Palette, 
     Profile, 
@@ -6,9 +9,11 @@ from .models import (
     Message, 
     Notification, 
     Artwork, 
+    Category,
     Favorite, 
     CollaborationFeedback,
-    CollaborationMatch
+    CollaborationMatch,
+    UserStats,
 )
 
 # Register your models here.
@@ -18,6 +23,22 @@ admin.site.register(Collaboration)
 admin.site.register(Message)
 admin.site.register(Notification)
 admin.site.register(Artwork)
+admin.site.register(Category)
 admin.site.register(Favorite)
 admin.site.register(CollaborationFeedback)
 admin.site.register(CollaborationMatch)
+admin.site.register(UserStats)
+
+
+def cache_stats_view(request):
+    """Hit/miss counters of the fragment and view caches (caching.py)"""
+    if request.method == 'POST':
+        reset_cache_stats()
+        return redirect('cache_stats')
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Cache statistics',
+        'stats': cache_stats(),
+        'versions': get_versions(NAMESPACES),
+    }
+    return render(request, 'admin/pallate/cache_stats.html', context)
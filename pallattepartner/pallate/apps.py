@@ -5,4 +5,12 @@ class PallateConfig(AppConfig):
     name = 'pallattepartner.pallate'
 
     def ready(self):
-        import pallattepartner.pallate.signals
\ No newline at end of file
+        from django.db.models.signals import post_migrate
+        import pallattepartner.pallate.signals
+        post_migrate.connect(pallattepartner.pallate.signals.create_search_index, sender=self)
+
+        # Build the shared boto3 client at startup, not on the first upload
+        from django.conf import settings
+        if getattr(settings, 'USE_SUPABASE_STORAGE', False):
+            from django.core.files.storage import default_storage
+            default_storage.warm_up()
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Queries behind the Discover Artists page.
+
+The page used to load every active user in one go, prefetch a sliced
+``Artwork`` queryset and annotate ``Count('artworks')`` and
+``Count('owned_collaborations')`` together. Counting two reverse relations
+in the same query joins them against each other, so an artist with 4
+artworks and 3 collaborations showed 12 of each.
+
+Here the artists are paginated by keyset on ``(date_joined, id)`` like the
+dashboard feeds (feeds.py) and the counts are read from the ``UserStats``
+row joined to each artist (stats.py). The three latest artworks of each
+artist on the page come from a single
+``ROW_NUMBER() OVER (PARTITION BY user_id ...)`` query.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .feeds import keyset_page, parse_page_size
+from .models import Artwork
+from .stats import stats_for
+
+DISCOVER_PAGE_SIZE = 24
+RECENT_ARTWORKS = 3
+
+
+def discover_queryset():
+    """Active artists, with their profiles and stats"""
+    return User.objects.filter(is_active=True).select_related('profile', 'stats')
+
+
+def recent_artworks(user_ids, limit=RECENT_ARTWORKS):
+    """{user_id: [newest artworks]} with at most ``limit`` per user, in one query"""
+    ranked = (
+        Artwork.objects
+        .filter(user_id__in=user_ids)
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F('user_id')],
+            order_by=[F('created_at').desc(), F('id').desc()],
+        ))
+        .filter(rank__lte=limit)
+        .order_by('user_id', 'rank')
+    )
+    by_user = {}
+    for artwork in ranked:
+        by_user.setdefault(artwork.user_id, []).append(artwork)
+    return by_user
+
+
+def discover_page(cursor=None, page_size=None):
+    """
+    Returns (artists, next_cursor) for one page of Discover Artists, newest
+    members first, each with ``artwork_count``, ``collab_count`` and
+    ``recent_artworks`` set.
+
+    Raises ``feeds.InvalidCursor`` for a malformed cursor.
+    """
+    page_size = parse_page_size(page_size, default=DISCOVER_PAGE_SIZE)
+    artists, next_cursor = keyset_page(discover_queryset(), cursor=cursor, page_size=page_size, field='date_joined')
+    recent = recent_artworks([artist.pk for artist in artists])
+    for artist in artists:
+        stats = stats_for(artist)
+        artist.artwork_count, artist.collab_count = stats.artwork_count, stats.collab_count
+        artist.recent_artworks = recent.get(artist.pk, [])
+    return artists, next_cursor
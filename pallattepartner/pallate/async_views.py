@@ -0,0 +1,198 @@
+"""
+ASGI-native versions of the read-heavy pages.
+
+``dashboard``, ``search``, ``artist_profile`` and
+``fetch_artworks_by_category`` are mostly independent reads: feed pages,
+favorites, the notification summary, category counts... The sync views run
+them one after the other. These coroutines start them together with
+``asyncio.gather`` and only render once they are all in.
+
+The ORM calls go through ``read()`` rather than the ``a``-prefixed async
+ORM methods: Django's async ORM still hands every query to the single
+thread-sensitive executor, so gathered queries would queue up behind each
+other. ``read()`` runs them on a small pool of its own
+(``ASYNC_VIEW_READ_WORKERS`` threads, each keeping its database connection
+between requests thanks to ``CONN_MAX_AGE``). With 0 workers reads fall back
+to ``sync_to_async``, which is what the tests use so that queries see the
+test transaction.
+
+The querysets and context are shared with views.py, so both versions render
+the same pages. They are only routed when ``ASYNC_VIEWS`` is on and the app
+is served through config/asgi.py (see DEPLOYMENT.md).
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.db import close_old_connections
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import render
+
+from . import views
+from .artists import discover_page
+from .caching import cache_view
+from .categories import get_category_counts
+from .conditional import conditional
+from .feeds import InvalidCursor, artwork_feed_queryset, feed_page, serialize_artwork
+from .forms import CollaborationForm
+from .models import Artwork, Collaboration
+from .notifications import request_notification_summary
+from .search import parse_page_number
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_VIEW_READ_WORKERS,
+                thread_name_prefix='pallate-read',
+            )
+        return _executor
+
+
+def _run(func, args, kwargs):
+    # Pool threads live outside the request cycle, so drop broken or expired connections here
+    close_old_connections()
+    return func(*args, **kwargs)
+
+
+async def read(func, *args, **kwargs):
+    """Run the blocking ``func(*args, **kwargs)`` and await its result"""
+    if getattr(settings, 'ASYNC_VIEW_READ_WORKERS', 0) <= 0:
+        return await sync_to_async(func)(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), _run, func, args, kwargs)
+
+
+async def _render(request, template_name, context):
+    # Lazy template lookups (request.user, related objects...) must stay off the event loop
+    return await sync_to_async(render)(request, template_name, context)
+
+
+@login_required(login_url='pallate:login')
+async def dashboard(request):
+    if request.method == 'POST':
+        # Creating a post is a write followed by a redirect, nothing to overlap
+        return await sync_to_async(views.dashboard)(request)
+
+    user = await request.auser()
+    selected_categories = request.GET.getlist('categories')
+
+    (
+        (posts, next_posts_cursor, _),
+        (artworks, next_artworks_cursor, _),
+        user_favorites,
+        notification_summary,
+        all_categories,
+    ) = await asyncio.gather(
+        read(feed_page, 'posts'),
+        read(feed_page, 'artworks', categories=selected_categories),
+        read(lambda: list(views.favorite_artwork_ids(user))),
+        # Memoized on the request, so the context processor reuses it
+        read(request_notification_summary, request),
+        read(get_category_counts),
+    )
+
+    return await _render(request, 'pallate/dashboard.html', {
+        'form': CollaborationForm(),
+        'posts': posts,
+        'next_posts_cursor': next_posts_cursor,
+        'artworks': artworks,
+        'next_artworks_cursor': next_artworks_cursor,
+        'user_favorites': user_favorites,
+        'notifications': notification_summary['notifications'],
+        'unread_count': notification_summary['unread_count'],
+        'all_categories': all_categories,
+        'selected_categories': selected_categories,
+    })
+
+
+@login_required
+async def search(request):
+    user = await request.auser()
+    query = request.GET.get('q', '').strip()
+    page = parse_page_number(request.GET.get('page'))
+
+    reads = [read(lambda: list(views.favorite_artwork_ids(user)))]
+    if query:
+        reads += [
+            read(views.search_artworks, query, page),
+            read(views.search_artists, query, page),
+        ]
+    user_favorites, *results = await asyncio.gather(*reads)
+    (artworks, more_artworks), (artists, more_artists) = results or (([], False), ([], False))
+
+    return await _render(request, 'pallate/search_results.html', {
+        'query': query,
+        'artworks': artworks,
+        'artists': artists,
+        'user_favorites': user_favorites,
+        'page': page,
+        'has_next': more_artworks or more_artists,
+    })
+
+
+def _artist(user_id):
+    try:
+        return User.objects.select_related('profile').get(pk=user_id)
+    except User.DoesNotExist:
+        raise Http404('No User matches the given query.')
+
+
+@login_required(login_url='pallate:login')
+@conditional('artworks', 'profiles', 'collaborations')
+async def artist_profile(request, user_id=None):
+    """Discover Artists page - shows all artists with their recent work"""
+    user = await request.auser()
+
+    if user_id:
+        target_user, artworks, user_collaborations, user_favorites = await asyncio.gather(
+            read(_artist, user_id),
+            read(lambda: list(Artwork.objects.filter(user_id=user_id).order_by('-created_at'))),
+            read(lambda: list(Collaboration.objects.filter(owner_id=user_id).order_by('-created_at'))),
+            read(lambda: list(views.favorite_artwork_ids(user))),
+        )
+        return await _render(request, 'pallate/artist_profile.html', {
+            'artist_user': target_user,
+            'artist_profile': getattr(target_user, 'profile', None),
+            'artworks': artworks,
+            'user_collaborations': user_collaborations,
+            'user_favorites': user_favorites,
+            'show_single': True,
+        })
+
+    try:
+        artists, next_cursor = await read(discover_page, request.GET.get('cursor') or None)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return await _render(request, 'pallate/artist_profile.html', {
+        'artists': artists,
+        'next_cursor': next_cursor,
+        'show_single': False,
+    })
+
+
+@login_required(login_url='pallate:login')
+@conditional('artworks', 'profiles', per_user=False)
+@cache_view('artworks_by_category', 'artworks', 'profiles')
+async def fetch_artworks_by_category(request):
+    if request.method == 'GET' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        categories = request.GET.get('categories', '')
+        category_list = [cat.strip() for cat in categories.split(',') if cat.strip()]
+
+        def load():
+            artworks = artwork_feed_queryset(category_list).order_by('-created_at')[:20]
+            return [serialize_artwork(artwork) for artwork in artworks]
+
+        return JsonResponse({'artworks': await read(load)})
+
+    return JsonResponse({'error': 'Invalid request'}, status=400)
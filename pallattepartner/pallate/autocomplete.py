@@ -0,0 +1,247 @@
+"""
+Typeahead suggestions for artists, artworks and categories.
+
+Each worker process keeps a sorted prefix index in memory: one
+``(key, kind, id)`` tuple per word of every username, artwork title and
+category name, where ``key`` is the lowercased label from that word on. A
+prefix lookup is a ``bisect`` into the list followed by a short scan, and
+answers are kept in a small LRU cache, so the hot path of the
+``autocomplete`` endpoint never queries the database.
+
+The index is loaded on first use and then kept current by signals
+(signals.py). Changes made by other processes are noticed through a version
+number in the cache when it is shared by all workers (``CACHE_BACKEND=redis``
+or ``file``, see caching.py); otherwise the index is simply reloaded every
+``RELOAD_INTERVAL`` seconds. Either way the reload runs in the background
+(jobs.py) and the current index keeps serving until then.
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+from .caching import fragment_cache_enabled
+from .categories import get_category_counts, normalize_category
+from .jobs import run_in_background
+from .models import Artwork
+
+KINDS = ('artist', 'artwork', 'category')
+
+MIN_QUERY_LENGTH = 2
+RESULTS_PER_KIND = 5
+
+# Words of a label that can start a match ("harb" finds "Blue Harbour")
+MAX_WORDS = 4
+
+# Index entries looked at per lookup, keeps very short prefixes cheap
+MAX_SCAN = 1000
+
+LRU_SIZE = 1024
+
+VERSION_CACHE_KEY = 'pallate:autocomplete:version'
+
+# Seconds between reloads when the version can't be seen across processes
+RELOAD_INTERVAL = 60
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+def _keys(label):
+    """Index keys of ``label``: the normalized label from each of its first words on"""
+    words = normalize(label).split(' ')
+    return {' '.join(words[i:]) for i in range(min(len(words), MAX_WORDS)) if words[i]}
+
+
+class PrefixIndex:
+    """Sorted ``(key, kind, id)`` entries with an LRU cache of answers"""
+
+    def __init__(self, lru_size=LRU_SIZE):
+        self.lru_size = lru_size
+        self._entries = []
+        self._labels = {}  # (kind, id) -> label
+        self._lengths = {}  # (kind, id) -> length of the normalized label
+        self._lru = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._labels)
+
+    def load(self, items):
+        """Replace the contents with ``(kind, id, label)`` items"""
+        labels = {(kind, object_id): label for kind, object_id, label in items if label}
+        entries = sorted(
+            (key, kind, object_id)
+            for (kind, object_id), label in labels.items()
+            for key in _keys(label)
+        )
+        lengths = {item: len(normalize(label)) for item, label in labels.items()}
+        with self._lock:
+            self._labels = labels
+            self._lengths = lengths
+            self._entries = entries
+            self._lru.clear()
+
+    def add(self, kind, object_id, label):
+        """Index ``label`` for (kind, id). Returns False when nothing changed."""
+        with self._lock:
+            if self._labels.get((kind, object_id)) == label:
+                return False
+            self._discard(kind, object_id)
+            if label:
+                self._labels[(kind, object_id)] = label
+                self._lengths[(kind, object_id)] = len(normalize(label))
+                for key in _keys(label):
+                    insort(self._entries, (key, kind, object_id))
+            self._lru.clear()
+            return True
+
+    def remove(self, kind, object_id):
+        with self._lock:
+            if (kind, object_id) not in self._labels:
+                return False
+            self._discard(kind, object_id)
+            self._lru.clear()
+            return True
+
+    def _discard(self, kind, object_id):
+        label = self._labels.pop((kind, object_id), None)
+        if label is None:
+            return
+        del self._lengths[(kind, object_id)]
+        for key in _keys(label):
+            entry = (key, kind, object_id)
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def suggest(self, prefix, limit=RESULTS_PER_KIND):
+        """{kind: [(id, label), ...]} for labels with a word starting with ``prefix``"""
+        prefix = normalize(prefix)
+        with self._lock:
+            cached = self._lru.get(prefix)
+            if cached is not None:
+                self._lru.move_to_end(prefix)
+                return cached
+
+            # Whole-label matches first, then shorter labels
+            entries, labels = self._entries, self._labels
+            best = {}
+            position = bisect_left(entries, (prefix,))
+            for i in range(position, min(position + MAX_SCAN, len(entries))):
+                key, kind, object_id = entries[i]
+                if not key.startswith(prefix):
+                    break
+                label = labels[(kind, object_id)]
+                # Keys are suffixes of the normalized label, so equal length means the whole label
+                rank = (len(key) != self._lengths[(kind, object_id)], len(label), label)
+                current = best.get((kind, object_id))
+                if current is None or rank < current:
+                    best[(kind, object_id)] = rank
+
+            ranked = sorted(best.items(), key=lambda item: item[1])
+            result = {kind: [] for kind in KINDS}
+            for (kind, object_id), rank in ranked:
+                if len(result[kind]) < limit:
+                    result[kind].append((object_id, rank[2]))
+
+            self._lru[prefix] = result
+            if len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+            return result
+
+
+def load_items():
+    """Everything to index, read from the database"""
+    items = [('artist', pk, username) for pk, username in User.objects.filter(is_active=True).values_list('id', 'username')]
+    items += [('artwork', pk, title) for pk, title in Artwork.objects.order_by().values_list('id', 'title')]
+    items += [('category', normalize_category(c['name']), c['name']) for c in get_category_counts()]
+    return items
+
+
+class Autocomplete:
+    """The process-wide index plus its loading and cross-process freshness"""
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        self.version = None
+        self.loaded = False
+        self.loaded_at = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+
+    def reload(self):
+        version = cache.get(VERSION_CACHE_KEY, 0)
+        try:
+            self.index.load(load_items())
+            self.version = version
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+        finally:
+            self._reloading = False
+
+    def _ensure_fresh(self):
+        if not self.loaded:
+            # Cold start: nothing to serve yet, load inline
+            with self._lock:
+                if not self.loaded:
+                    self.reload()
+            return
+        if fragment_cache_enabled():
+            stale = cache.get(VERSION_CACHE_KEY, 0) != self.version
+        else:
+            # A per-process cache only holds our own version
+            stale = time.monotonic() - self.loaded_at > RELOAD_INTERVAL
+        if stale:
+            with self._lock:
+                if self._reloading:
+                    return
+                self._reloading = True
+            run_in_background(self.reload)
+
+    def suggest(self, prefix, limit=RESULTS_PER_KIND):
+        if len(normalize(prefix)) < MIN_QUERY_LENGTH:
+            return {kind: [] for kind in KINDS}
+        self._ensure_fresh()
+        return self.index.suggest(prefix, limit)
+
+    def _changed(self):
+        # Tell the other processes; our own copy is already current
+        try:
+            version = cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            cache.add(VERSION_CACHE_KEY, 1, None)
+            version = cache.get(VERSION_CACHE_KEY)
+        if self.version is not None and version == self.version + 1:
+            self.version = version
+
+    def add(self, kind, object_id, label):
+        # Without a local copy we can't tell whether anything changed
+        if not self.loaded or self.index.add(kind, object_id, label):
+            self._changed()
+
+    def remove(self, kind, object_id):
+        if not self.loaded or self.index.remove(kind, object_id):
+            self._changed()
+
+
+autocomplete = Autocomplete()
+
+
+def suggest(prefix, limit=RESULTS_PER_KIND):
+    return autocomplete.suggest(prefix, limit)
+
+
+def index_label(kind, object_id, label):
+    """Add or update a suggestion once the current transaction commits"""
+    transaction.on_commit(lambda: autocomplete.add(kind, object_id, label))
+
+
+def unindex_label(kind, object_id):
+    transaction.on_commit(lambda: autocomplete.remove(kind, object_id))
@@ -0,0 +1,59 @@
+"""
+Helpers shared by the benchmark_* management commands.
+
+Benchmarks run inside a transaction that is rolled back at the end, so they
+can be pointed at a development database without leaving synthetic rows
+behind. Timings are wall-clock milliseconds.
+"""
+
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction and always roll it back"""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def measure(func, repeat=20, warmup=2):
+    """Call ``func`` repeatedly and return timing stats in milliseconds"""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'median': statistics.median(timings),
+        'p95': timings[int(0.95 * (len(timings) - 1))],
+        'min': timings[0],
+    }
+
+
+def format_stats(label, stats):
+    return (
+        f"{label:<44} median {stats['median']:9.3f} ms   "
+        f"p95 {stats['p95']:9.3f} ms   min {stats['min']:9.3f} ms"
+    )
+
+
+def bench_users(count, prefix='bench_user'):
+    """Create ``count`` throwaway users in bulk (no signals, no profiles)"""
+    users = [User(username=f'{prefix}_{i}') for i in range(count)]
+    return User.objects.bulk_create(users, batch_size=1000)
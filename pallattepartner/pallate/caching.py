@@ -0,0 +1,246 @@
+"""
+Cached template fragments and views, invalidated by model changes.
+
+Heavy, user-independent parts of pages (the category filter, the featured
+artists and Discover Artists grids, the collaboration cards) are cached with
+the ``{% cachedfragment %}`` tag (templatetags/fragments.py), and JSON views
+with ``cache_view``. Neither is ever deleted explicitly: each entry's key
+contains the current version of the namespaces it depends on
+(``artworks``, ``profiles``, ``collaborations``), and the signals in
+signals.py bump a namespace's version when one of its models is saved or
+deleted. Old entries are then simply never read again and expire.
+
+Views pass the data for a cached fragment through ``deferred`` so that its
+queries only run when the fragment has to be rendered.
+
+Hits and misses are counted per fragment in the cache as well, and shown in
+the admin (``/admin/cache-stats/``) to help tune timeouts and placement.
+Versions and counters are only shared between processes with a shared
+cache backend (``CACHE_BACKEND=redis`` or ``file``, see settings.py). With a
+per-process cache, a change would only bump the version in the process that
+saved it and the others would keep serving stale entries, so fragments and
+views are then rendered every time unless ``FRAGMENT_CACHE`` is turned on
+(single-process servers).
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.functional import SimpleLazyObject
+
+NAMESPACES = ('artworks', 'profiles', 'collaborations')
+
+STATS_NAMES_KEY = 'pallate:cache-stats:names'
+
+
+def fragment_cache_enabled():
+    return getattr(settings, 'FRAGMENT_CACHE', True)
+
+
+def fragment_timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 300)
+
+
+def _version_key(namespace):
+    return f'pallate:cache-version:{namespace}'
+
+
+def _initial_version():
+    # Not 1: a version evicted from the cache must not restart at a number
+    # that older, still cached entries were keyed with
+    return int(time.time() * 1000)
+
+
+def get_versions(namespaces):
+    """{namespace: version}, normally in one cache round trip"""
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, namespace in keys.items():
+        if key not in found:
+            version = _initial_version()
+            cache.add(key, version, None)
+            found[key] = cache.get(key, version)
+        versions[namespace] = found[key]
+    return versions
+
+
+def _changed_key(namespace):
+    return f'pallate:cache-changed:{namespace}'
+
+
+def _bump(namespace):
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), None)
+    cache.set(_changed_key(namespace), time.time(), None)
+
+
+def last_changed(namespaces):
+    """
+    When one of ``namespaces`` last changed (a UTC datetime), or ``None`` if
+    that isn't known for all of them (not changed since the cache started).
+    """
+    keys = [_changed_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+    if len(found) < len(keys):
+        return None
+    return datetime.fromtimestamp(max(found.values()), tz=timezone.utc)
+
+
+def bump_versions(*namespaces):
+    """Invalidate everything cached under ``namespaces``"""
+    for namespace in namespaces:
+        if namespace not in NAMESPACES:
+            raise ValueError(f"Unknown cache namespace: {namespace}")
+        _bump(namespace)
+        if transaction.get_connection().in_atomic_block:
+            # Again after commit: another request may have cached the
+            # pre-commit data under the first new version meanwhile
+            transaction.on_commit(lambda namespace=namespace: _bump(namespace))
+
+
+def fragment_key(name, namespaces, vary_on=()):
+    versions = get_versions(namespaces)
+    version = '.'.join(f'{namespace}{versions[namespace]}' for namespace in sorted(namespaces))
+    # Cached HTML embeds media URLs (media.py)
+    vary_on = [getattr(settings, 'MEDIA_URL_VERSION', ''), *vary_on]
+    vary = hashlib.md5(':'.join(str(value) for value in vary_on).encode()).hexdigest()
+    return f'pallate:fragment:{name}:{version}:{vary}'
+
+
+def _stats_key(name, outcome):
+    return f'pallate:cache-stats:{name}:{outcome}'
+
+
+def _record(name, hit):
+    key = _stats_key(name, 'hits' if hit else 'misses')
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+        # First miss for this name: make it show up in the admin
+        names = cache.get(STATS_NAMES_KEY, [])
+        if name not in names:
+            cache.set(STATS_NAMES_KEY, sorted(names + [name]), None)
+
+
+def cached(name, namespaces, render, vary_on=(), timeout=None):
+    """
+    ``render()``'s result, cached until one of ``namespaces`` changes.
+
+    A ``None`` result is returned without being cached.
+    """
+    if not fragment_cache_enabled():
+        return render()
+    key, value = _lookup(name, namespaces, vary_on)
+    if value is None:
+        value = render()
+        if value is not None:
+            _store(key, value, timeout)
+    return value
+
+
+def _lookup(name, namespaces, vary_on):
+    """(key, cached value or None) for a fragment, counting the hit or miss"""
+    key = fragment_key(name, namespaces, vary_on)
+    value = cache.get(key)
+    _record(name, hit=value is not None)
+    return key, value
+
+
+def _store(key, value, timeout):
+    cache.set(key, value, fragment_timeout() if timeout is None else timeout)
+
+
+def deferred(func):
+    """``func()``, evaluated the first time a template (or anyone) uses it"""
+    return SimpleLazyObject(func)
+
+
+def _response_value(response):
+    """What ``cache_view`` stores for a response, or None if it can't be cached"""
+    if response.status_code != 200 or response.streaming:
+        return None
+    return response.content, response['Content-Type']
+
+
+def cache_view(name, *namespaces, timeout=None):
+    """
+    Cache successful GET responses of a view whose output only depends on
+    the URL (not on the user), until one of ``namespaces`` changes.
+
+    Works for sync and async views.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method != 'GET' or not fragment_cache_enabled():
+                    return await view(request, *args, **kwargs)
+                vary_on = (request.get_full_path(), request.headers.get('X-Requested-With', ''))
+                key, value = await sync_to_async(_lookup)(name, namespaces, vary_on)
+                if value is None:
+                    response = await view(request, *args, **kwargs)
+                    value = _response_value(response)
+                    if value is not None:
+                        await sync_to_async(_store)(key, value, timeout)
+                    return response
+                content, content_type = value
+                return HttpResponse(content, content_type=content_type)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or not fragment_cache_enabled():
+                return view(request, *args, **kwargs)
+            uncacheable = []
+
+            def render():
+                response = view(request, *args, **kwargs)
+                value = _response_value(response)
+                if value is None:
+                    uncacheable.append(response)
+                return value
+
+            vary_on = (request.get_full_path(), request.headers.get('X-Requested-With', ''))
+            value = cached(name, namespaces, render, vary_on, timeout)
+            if value is None:
+                return uncacheable[0]
+            content, content_type = value
+            return HttpResponse(content, content_type=content_type)
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """[{'name', 'hits', 'misses', 'requests', 'hit_rate'}, ...] for the admin page"""
+    names = cache.get(STATS_NAMES_KEY, [])
+    counters = cache.get_many([_stats_key(name, outcome) for name in names for outcome in ('hits', 'misses')])
+    stats = []
+    for name in names:
+        hits = counters.get(_stats_key(name, 'hits'), 0)
+        misses = counters.get(_stats_key(name, 'misses'), 0)
+        requests = hits + misses
+        stats.append({
+            'name': name,
+            'hits': hits,
+            'misses': misses,
+            'requests': requests,
+            'hit_rate': round(100 * hits / requests, 1) if requests else None,
+        })
+    return stats
+
+
+def reset_cache_stats():
+    names = cache.get(STATS_NAMES_KEY, [])
+    cache.delete_many([_stats_key(name, outcome) for name in names for outcome in ('hits', 'misses')])
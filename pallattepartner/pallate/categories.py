@@ -0,0 +1,195 @@
+"""
+Category index for artworks.
+
+``Artwork.categories`` is a comma-separated string, so listing or filtering
+by category used to mean scanning every artwork. Instead, the ``Category``
+table keeps one row per category with its artwork count and
+``ArtworkCategory`` holds the (indexed) membership rows. Both are updated by
+the Artwork signals (see signals.py), and the sorted list is cached when
+the cache is shared by all workers (``FRAGMENT_CACHE``, see caching.py).
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef
+
+from .caching import fragment_cache_enabled
+from .models import ArtworkCategory, Category
+
+
+CATEGORY_CACHE_KEY = 'pallate:category_counts'
+CATEGORY_CACHE_TIMEOUT = 60 * 60
+
+# Below this many matching artworks, filters start from the membership index
+SELECTIVE_FILTER_ROWS = 2000
+
+# Always offered in the category filter, even before any artwork uses them
+DEFAULT_CATEGORIES = [
+    'Digital Art', 'Traditional Art', 'Photography',
+    'Illustration', 'Graphic Design', '3D Art',
+    'Animation', 'Concept Art',
+]
+
+
+def normalize_category(name):
+    """Lookup key for a category name (case-insensitive)"""
+    return name.strip().lower()
+
+
+def split_categories(value):
+    """Unique category names from a comma-separated string, first spelling wins"""
+    names = {}
+    for name in (value or '').split(','):
+        name = name.strip()
+        if name:
+            names.setdefault(normalize_category(name), name)
+    return names
+
+
+def _load_category_counts():
+    in_use = (
+        Category.objects
+        .filter(artwork_count__gt=0)
+        .order_by()
+        .values_list('key', 'name', 'artwork_count')
+    )
+    counts = {key: {'name': name, 'count': count} for key, name, count in in_use}
+    for name in DEFAULT_CATEGORIES:
+        counts.setdefault(normalize_category(name), {'name': name, 'count': 0})
+    return sorted(counts.values(), key=lambda c: c['name'].lower())
+
+
+def get_category_counts():
+    """
+    Returns [{'name': ..., 'count': ...}, ...] sorted by name.
+
+    Reads the cache, or the Category table on a miss or without a shared
+    cache - never the artworks.
+    """
+    if not fragment_cache_enabled():
+        return _load_category_counts()
+    categories = cache.get(CATEGORY_CACHE_KEY)
+    if categories is None:
+        categories = _load_category_counts()
+        cache.set(CATEGORY_CACHE_KEY, categories, CATEGORY_CACHE_TIMEOUT)
+    return categories
+
+
+def invalidate_category_cache():
+    cache.delete(CATEGORY_CACHE_KEY)
+
+
+def filter_by_categories(queryset, names):
+    """
+    Artworks in any of the given categories (exact, case-insensitive match).
+
+    Goes through the indexed ArtworkCategory join table instead of scanning
+    the comma-separated ``Artwork.categories`` column.
+    """
+    keys = {normalize_category(name) for name in names if name.strip()}
+    if not keys:
+        return queryset
+    matched = list(Category.objects.filter(key__in=keys).values_list('id', 'artwork_count'))
+    category_ids = [pk for pk, _ in matched]
+
+    if sum(count for _, count in matched) <= SELECTIVE_FILTER_ROWS:
+        # Few matches: drive the query from the (category, artwork) index
+        return queryset.filter(
+            pk__in=ArtworkCategory.objects.filter(category_id__in=category_ids).values('artwork_id')
+        )
+    # Popular categories: walk the feed index newest-first and probe the
+    # (artwork, category) unique index, stopping once the page is full
+    return queryset.filter(Exists(
+        ArtworkCategory.objects.filter(artwork=OuterRef('pk'), category_id__in=category_ids)
+    ))
+
+
+def _get_or_create_categories(names):
+    """Returns {key: category_id} for the given {key: name} mapping"""
+    ids = dict(Category.objects.filter(key__in=names).values_list('key', 'id'))
+    for key, name in names.items():
+        if key not in ids:
+            ids[key] = Category.objects.get_or_create(key=key, defaults={'name': name})[0].id
+    return ids
+
+
+def apply_category_changes(artwork, added=None, removed=None):
+    """
+    Apply an artwork's category changes to the index.
+
+    ``added`` / ``removed`` map normalized keys to display names, as returned
+    by split_categories(). Membership rows are inserted/deleted and counts
+    are updated with F() so concurrent uploads don't lose increments.
+    """
+    added = added or {}
+    removed = removed or {}
+    if not added and not removed:
+        return
+
+    with transaction.atomic():
+        if added:
+            category_ids = _get_or_create_categories(added)
+            # Rows can already exist (a repeated save, backfill_categories):
+            # only newly inserted memberships are counted
+            existing = set(
+                ArtworkCategory.objects
+                .filter(artwork_id=artwork.pk, category_id__in=category_ids.values())
+                .values_list('category_id', flat=True)
+            )
+            new_ids = [pk for pk in category_ids.values() if pk not in existing]
+            ArtworkCategory.objects.bulk_create(
+                [ArtworkCategory(artwork_id=artwork.pk, category_id=pk) for pk in new_ids],
+                ignore_conflicts=True,
+            )
+            Category.objects.filter(id__in=new_ids).update(
+                artwork_count=F('artwork_count') + 1
+            )
+        if removed:
+            # Membership rows are already gone when the artwork was deleted (CASCADE)
+            ArtworkCategory.objects.filter(artwork_id=artwork.pk, category__key__in=removed).delete()
+            Category.objects.filter(
+                key__in=removed, artwork_count__gt=0
+            ).update(artwork_count=F('artwork_count') - 1)
+
+    transaction.on_commit(invalidate_category_cache)
+
+
+def rebuild_category_index(artworks, batch_size=1000):
+    """
+    Recompute membership rows and counts from an iterable of
+    ``(artwork_id, categories)`` pairs.
+
+    Returns the number of categories in use.
+    """
+    with transaction.atomic():
+        ArtworkCategory.objects.all().delete()
+        category_ids = dict(Category.objects.values_list('key', 'id'))
+        batch = []
+        for artwork_id, value in artworks:
+            names = split_categories(value)
+            new_names = {key: name for key, name in names.items() if key not in category_ids}
+            if new_names:
+                category_ids.update(_get_or_create_categories(new_names))
+            batch.extend(
+                ArtworkCategory(artwork_id=artwork_id, category_id=category_ids[key])
+                for key in names
+            )
+            if len(batch) >= batch_size:
+                ArtworkCategory.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        ArtworkCategory.objects.bulk_create(batch, ignore_conflicts=True)
+
+        # Counts come straight from the membership table
+        counts = dict(
+            ArtworkCategory.objects
+            .order_by()
+            .values_list('category')
+            .annotate(total=Count('artwork'))
+        )
+        categories = list(Category.objects.all())
+        for category in categories:
+            category.artwork_count = counts.get(category.id, 0)
+        Category.objects.bulk_update(categories, ['artwork_count'], batch_size=batch_size)
+
+    transaction.on_commit(invalidate_category_cache)
+    return sum(1 for total in counts.values() if total)
@@ -0,0 +1,60 @@
+"""
+Incremental loading of collaboration chat messages.
+
+The chat page only renders the latest ``CHAT_PAGE_SIZE`` messages. Older
+ones are fetched a page at a time with a keyset cursor on
+``(timestamp, id)`` (see feeds.py), and new ones are polled by id: the
+client sends the id of the last message it has and gets anything newer.
+Both walk the ``message_timeline_idx`` index on
+``(collaboration, timestamp, id)``.
+
+Polls return right away; pushing new messages as they arrive is done by
+the Server-Sent Events stream (realtime.py).
+"""
+
+from .feeds import keyset_page, parse_page_size
+from .media import media_url
+from .models import Message
+
+
+CHAT_PAGE_SIZE = 30
+
+
+def message_queryset(collaboration):
+    return Message.objects.filter(collaboration=collaboration).select_related('sender')
+
+
+def message_page(collaboration, cursor=None, page_size=CHAT_PAGE_SIZE):
+    """
+    One page of messages older than ``cursor`` (latest page without one).
+
+    Returns (messages oldest-first, cursor of the page before or None).
+    """
+    messages, older_cursor = keyset_page(
+        message_queryset(collaboration),
+        cursor,
+        parse_page_size(page_size, default=CHAT_PAGE_SIZE),
+        field='timestamp',
+    )
+    messages.reverse()
+    return messages, older_cursor
+
+
+def messages_after(collaboration, after_id, limit=CHAT_PAGE_SIZE):
+    """Messages with an id greater than ``after_id``, oldest-first"""
+    return list(
+        message_queryset(collaboration)
+        .filter(pk__gt=after_id)
+        .order_by('timestamp', 'pk')[:limit]
+    )
+
+
+def serialize_message(message):
+    return {
+        'id': message.id,
+        'sender': message.sender.username,
+        'sender_id': message.sender_id,
+        'text': message.text,
+        'image_url': media_url(message.image) or None,
+        'timestamp': message.timestamp.isoformat(),
+    }
@@ -0,0 +1,107 @@
+"""
+Conditional GET (``ETag`` / ``Last-Modified``) for listings built from
+cached data.
+
+The artworks JSON, Discover Artists / artist profiles and featured artists
+only change when a model in one of their cache namespaces changes
+(caching.py). Their validator is therefore derived from those namespace
+versions, read from the cache in one round trip: computing it costs no
+query at all, not even an index scan. A client that sends back the ETag it
+got (``If-None-Match``) receives a 304 without the view running.
+
+Pages also show per-user bits (the sidebar, the CSRF token of the logout
+form), so their ETag includes the user and the CSRF cookie as well. It is a
+weak ETag: ``{% csrf_token %}`` is masked differently on every render, so
+two responses with the same ETag are equivalent rather than byte-identical.
+``Last-Modified`` is only sent for user-independent responses, when the
+time of the last change is known (see ``caching.last_changed``).
+
+Responses are marked ``Cache-Control: private, no-cache``: browsers keep
+them but revalidate on every use. As with the caches themselves, ETags are
+only consistent across processes with a shared ``CACHE_BACKEND``: a worker
+that never saw a change would otherwise keep answering 304. Without
+``FRAGMENT_CACHE`` the views are left as they are.
+"""
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.middleware.csrf import CSRF_SESSION_KEY
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .caching import NAMESPACES, fragment_cache_enabled, get_versions, last_changed
+
+
+def resource_etag(request, namespaces, per_user=False):
+    """Weak ETag for the response to ``request``, given what it depends on"""
+    versions = get_versions(namespaces)
+    parts = [f'{namespace}{versions[namespace]}' for namespace in sorted(namespaces)]
+    parts += [
+        getattr(settings, 'MEDIA_URL_VERSION', ''),
+        request.get_full_path(),
+        request.headers.get('X-Requested-With', ''),
+    ]
+    if per_user:
+        csrf_secret = (
+            request.session.get(CSRF_SESSION_KEY, '') if settings.CSRF_USE_SESSIONS
+            else request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+        )
+        parts += [request.user.pk, csrf_secret]
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def conditional(*namespaces, per_user=True):
+    """
+    Answer GET and HEAD requests with a 304 when the client already has the
+    current version of a view's response, which only depends on the URL,
+    ``namespaces`` and (``per_user``) the logged in user.
+
+    Works for sync and async views; goes below ``login_required``.
+    """
+    for namespace in namespaces:
+        if namespace not in NAMESPACES:
+            raise ValueError(f"Unknown cache namespace: {namespace}")
+
+    def validators(request):
+        etag = resource_etag(request, namespaces, per_user)
+        modified = None if per_user else last_changed(namespaces)
+        return etag, modified and int(modified.timestamp())
+
+    def finish(request, response, etag, modified):
+        # Errors and redirects aren't worth revalidating
+        if response.status_code in (200, 304):
+            response.headers.setdefault('ETag', etag)
+            if modified:
+                response.headers.setdefault('Last-Modified', http_date(modified))
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD') or not fragment_cache_enabled():
+                    return await view(request, *args, **kwargs)
+                # request.user and the cache may touch the database
+                etag, modified = await sync_to_async(validators)(request)
+                response = get_conditional_response(request, etag=etag, last_modified=modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return finish(request, response, etag, modified)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not fragment_cache_enabled():
+                return view(request, *args, **kwargs)
+            etag, modified = validators(request)
+            response = get_conditional_response(request, etag=etag, last_modified=modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return finish(request, response, etag, modified)
+        return wrapper
+    return decorator
@@ -0,0 +1,329 @@
+"""
+Direct-to-storage uploads for the S3-compatible Supabase bucket.
+
+Instead of streaming a file through a web worker, the browser asks
+``presign_upload`` (views.presign_upload) for a short-lived signed PUT URL,
+sends the file straight to the bucket and then submits the usual form with a
+signed token in place of the file (``<field>_upload``). The form's widget
+turns that token into a ``DirectUpload`` and the field checks the object in
+the bucket (``resolve_upload``) before the model row is saved with its name.
+
+Images are first written under ``<upload_to>/incoming/``; once the row exists
+a background job re-encodes them like a regular upload (uploads.py), moves
+them next to the other files and builds their variants (images.py).
+
+Tokens are bound to the user who asked for them and can only be confirmed
+while no row uses the name yet. Uploads that are never confirmed are removed
+by ``manage.py clean_direct_uploads``.
+
+Only active when the default storage is S3-based; with the local file
+system the forms keep receiving the file itself.
+"""
+
+import os
+import posixpath
+import uuid
+from datetime import timedelta
+from io import BytesIO
+
+from botocore.exceptions import ClientError
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from PIL import Image
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+from .images import generate_variants, schedule_variants
+from .jobs import run_in_background
+from .uploads import (
+    HEADER_LIMIT, UploadedImageField, declared_size, max_pixels, max_upload_size, normalize_image,
+    pixels_error, size_error,
+)
+
+# kind -> (upload_to of the model field, is an image)
+UPLOAD_KINDS = {
+    'artwork': ('artworks/', True),
+    'avatar': ('avatars/', True),
+    'message': ('chat_images/', True),
+    'collaboration_file': ('collaboration_files/', False),
+}
+
+# kind -> (model, field) that stores the name once the upload is confirmed
+UPLOAD_FIELDS = {
+    'artwork': ('pallate.Artwork', 'image'),
+    'avatar': ('pallate.Profile', 'avatar'),
+    'message': ('pallate.Message', 'image'),
+    'collaboration_file': ('pallate.CollaborationFile', 'file'),
+}
+
+INCOMING_DIR = 'incoming'
+
+# FileField/ImageField max_length
+MAX_NAME_LENGTH = 100
+
+TOKEN_SALT = 'pallate.direct-upload'
+
+# Extra time to submit the form after the signed URL expired
+CONFIRM_GRACE_SECONDS = 30 * 60
+
+
+def upload_expiry():
+    return getattr(settings, 'DIRECT_UPLOAD_EXPIRY', 300)
+
+
+def max_file_size(kind):
+    if UPLOAD_KINDS[kind][1]:
+        return max_upload_size()
+    return getattr(settings, 'COLLABORATION_FILE_MAX_SIZE', 50 * 1024 * 1024)
+
+
+def direct_uploads_enabled(storage=None):
+    storage = storage or default_storage
+    return getattr(settings, 'DIRECT_UPLOADS', True) and isinstance(storage, S3Boto3Storage)
+
+
+def is_incoming(name):
+    return posixpath.basename(posixpath.dirname(name or '')) == INCOMING_DIR
+
+
+def upload_name(kind, filename):
+    """A fresh storage name for ``filename`` under the kind's upload directory"""
+    prefix = f'{upload_directory(kind)}{uuid.uuid4().hex}_'
+    stem, extension = os.path.splitext(get_valid_filename(os.path.basename(filename)) or 'upload')
+    stem = stem[:max(1, MAX_NAME_LENGTH - len(prefix) - len(extension))]
+    return f'{prefix}{stem}{extension}'
+
+
+def _object_key(storage, name):
+    return storage._normalize_name(clean_name(name))
+
+
+def upload_directory(kind):
+    """Where direct uploads of ``kind`` are written before they are confirmed"""
+    upload_to, is_image = UPLOAD_KINDS[kind]
+    return upload_to + (INCOMING_DIR + '/' if is_image else '')
+
+
+def is_referenced(kind, name):
+    """Whether a row already stores ``name`` for this kind of upload"""
+    model_label, field_name = UPLOAD_FIELDS[kind]
+    return apps.get_model(model_label).objects.filter(**{field_name: name}).exists()
+
+
+def presign_upload(kind, filename, content_type, size, user_id, storage=None):
+    """Signed PUT URL for a new object plus the token ``user_id`` sends back afterwards"""
+    storage = storage or default_storage
+    if kind not in UPLOAD_KINDS:
+        raise forms.ValidationError('Unknown upload type.')
+    if UPLOAD_KINDS[kind][1] and not content_type.startswith('image/'):
+        raise forms.ValidationError('Only images can be uploaded here.')
+    if size <= 0:
+        raise forms.ValidationError('The submitted file is empty.')
+    if size > max_file_size(kind):
+        raise forms.ValidationError(size_error())
+
+    name = upload_name(kind, filename)
+    url = storage.connection.meta.client.generate_presigned_url(
+        'put_object',
+        Params={'Bucket': storage.bucket_name, 'Key': _object_key(storage, name), 'ContentType': content_type},
+        ExpiresIn=upload_expiry(),
+        HttpMethod='PUT',
+    )
+    return {
+        'method': 'PUT',
+        'url': url,
+        'headers': {'Content-Type': content_type},
+        'token': signing.dumps({'name': name, 'user': user_id}, salt=f'{TOKEN_SALT}:{kind}'),
+        'expires_in': upload_expiry(),
+    }
+
+
+def _reject(storage, name, message):
+    storage.delete(name)
+    raise forms.ValidationError(message)
+
+
+def resolve_upload(token, kind, user_id, storage=None):
+    """Storage name of a finished direct upload by ``user_id``, checked against the upload limits"""
+    storage = storage or default_storage
+    try:
+        payload = signing.loads(
+            token, salt=f'{TOKEN_SALT}:{kind}', max_age=upload_expiry() + CONFIRM_GRACE_SECONDS
+        )
+        name = payload['name']
+    except (signing.BadSignature, KeyError, TypeError):
+        raise forms.ValidationError('This upload has expired, please choose the file again.')
+    # Someone else's token, or one that was already used: the object belongs to another row
+    if user_id is None or payload.get('user') != user_id or is_referenced(kind, name):
+        raise forms.ValidationError('This upload is no longer valid, please choose the file again.')
+
+    client, key = storage.connection.meta.client, _object_key(storage, name)
+    try:
+        head = client.head_object(Bucket=storage.bucket_name, Key=key)
+    except ClientError:
+        raise forms.ValidationError('The upload did not finish, please try again.')
+    if head['ContentLength'] > max_file_size(kind):
+        _reject(storage, name, size_error())
+
+    if UPLOAD_KINDS[kind][1]:
+        header = client.get_object(
+            Bucket=storage.bucket_name, Key=key, Range=f'bytes=0-{HEADER_LIMIT - 1}'
+        )['Body'].read()
+        try:
+            size = declared_size(BytesIO(header))
+        except Image.DecompressionBombError:
+            _reject(storage, name, pixels_error())
+        if size is None:
+            _reject(storage, name, forms.ImageField.default_error_messages['invalid_image'])
+        if size[0] * size[1] > max_pixels():
+            _reject(storage, name, pixels_error(*size))
+    return name
+
+
+def stale_uploads(kind, before=None, storage=None):
+    """
+    Names of direct uploads of ``kind`` that were never confirmed: written
+    before ``before`` (by default, since their tokens expired) and not used
+    by any row.
+    """
+    storage = storage or default_storage
+    if before is None:
+        before = timezone.now() - timedelta(seconds=upload_expiry() + CONFIRM_GRACE_SECONDS)
+    directory = upload_directory(kind)
+    prefix = _object_key(storage, directory).rstrip('/') + '/'
+    model_label, field_name = UPLOAD_FIELDS[kind]
+    model = apps.get_model(model_label)
+
+    paginator = storage.connection.meta.client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=storage.bucket_name, Prefix=prefix, Delimiter='/'):
+        names = {
+            directory + item['Key'][len(prefix):]
+            for item in page.get('Contents', [])
+            if item['LastModified'] < before
+        }
+        if names:
+            used = model.objects.filter(**{f'{field_name}__in': names}).values_list(field_name, flat=True)
+            yield from sorted(names - set(used))
+
+
+class DirectUpload:
+    """A file already sent to the bucket, identified by its signed token"""
+
+    def __init__(self, token, kind):
+        self.token = token
+        self.kind = kind
+
+    def __bool__(self):
+        return bool(self.token)
+
+
+class DirectUploadWidgetMixin:
+    """File input that also accepts ``<name>_upload`` tokens (static/js/direct_upload.js)"""
+
+    def __init__(self, kind, attrs=None):
+        self.kind = kind
+        super().__init__(attrs)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        if direct_uploads_enabled():
+            context['widget']['attrs'].update({
+                'data-direct-upload': self.kind,
+                'data-presign-url': reverse('pallate:presign_upload'),
+            })
+        return context
+
+    def value_from_datadict(self, data, files, name):
+        token = data.get(f'{name}_upload')
+        if token and not files.get(name) and direct_uploads_enabled():
+            return DirectUpload(token, self.kind)
+        return super().value_from_datadict(data, files, name)
+
+    def value_omitted_from_data(self, data, files, name):
+        return not (f'{name}_upload' in data and direct_uploads_enabled()) and super().value_omitted_from_data(data, files, name)
+
+
+class DirectUploadFileInput(DirectUploadWidgetMixin, forms.FileInput):
+    pass
+
+
+class DirectUploadClearableFileInput(DirectUploadWidgetMixin, forms.ClearableFileInput):
+    pass
+
+
+class DirectUploadFieldMixin:
+    """
+    Form field that takes a ``DirectUpload`` in place of an uploaded file.
+    Only tokens issued to ``uploader_id`` (see ``DirectUploadFormMixin``) are accepted.
+    """
+    uploader_id = None
+
+    def to_python(self, data):
+        if isinstance(data, DirectUpload):
+            # The model field is set to the stored name, nothing is uploaded again
+            return resolve_upload(data.token, data.kind, self.uploader_id)
+        return super().to_python(data)
+
+    def run_validators(self, value):
+        if not isinstance(value, str):
+            super().run_validators(value)
+
+
+class DirectUploadImageField(DirectUploadFieldMixin, UploadedImageField):
+    pass
+
+
+class DirectUploadFileField(DirectUploadFieldMixin, forms.FileField):
+    pass
+
+
+class DirectUploadFormMixin:
+    """Form taking the user who submits it (``uploader``), for its direct upload fields"""
+
+    def __init__(self, *args, uploader=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields.values():
+            if isinstance(field, DirectUploadFieldMixin):
+                field.uploader_id = uploader.pk if uploader is not None else None
+
+
+def normalize_stored_image(model, pk, field_name, variants_field, kind):
+    """Background job: re-encode a direct image upload, move it out of incoming/, build variants"""
+    obj = model.objects.filter(pk=pk).first()
+    if obj is None:
+        return None
+    fieldfile = getattr(obj, field_name)
+    if not fieldfile or not is_incoming(fieldfile.name):
+        return None
+
+    storage = fieldfile.storage
+    with storage.open(fieldfile.name, 'rb') as source:
+        normalized = normalize_image(source)
+    directory = posixpath.dirname(posixpath.dirname(fieldfile.name))
+    name = storage.save(posixpath.join(directory, normalized.name), normalized)
+
+    # Filtered update: leave it alone if the file was replaced meanwhile
+    if model.objects.filter(pk=pk, **{field_name: fieldfile.name}).update(**{field_name: name}):
+        storage.delete(fieldfile.name)
+        return generate_variants(model, pk, field_name, variants_field, kind)
+    storage.delete(name)
+    return None
+
+
+def schedule_image_processing(instance, field_name, variants_field, kind, skip=()):
+    """Normalize a direct upload once the transaction commits, otherwise just build the variants"""
+    fieldfile = getattr(instance, field_name)
+    if fieldfile and is_incoming(fieldfile.name):
+        model, pk = type(instance), instance.pk
+        transaction.on_commit(
+            lambda: run_in_background(normalize_stored_image, model, pk, field_name, variants_field, kind)
+        )
+        return
+    schedule_variants(instance, field_name, variants_field, kind, skip=skip)
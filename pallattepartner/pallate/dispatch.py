@@ -0,0 +1,262 @@
+"""
+Notification dispatch.
+
+Views call ``notify()`` / ``notify_collaboration()`` instead of creating
+Notification rows inline. Events are queued once the surrounding transaction
+commits, and a single worker thread drains the queue in batches:
+
+* events for the same user and ``group_key`` are coalesced. If the user
+  still has an unread notification with that key it is updated
+  ("5 new messages in ...") rather than a new row being added;
+* identical events for the same user within a batch are written once;
+* new rows go out in one ``bulk_create`` per batch, and the unread counters
+  and cached summaries (notifications.py) are updated per batch too;
+* recipients get a push event (realtime.py) once the batch commits.
+
+Fan-out to collaboration members is resolved by the worker, so a request
+only pays for putting one event on the queue. The queue lives in memory:
+events still queued when the process is killed are lost. With
+``BACKGROUND_JOBS_EAGER = True`` events are written inline on commit.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import Collaboration, CollaborationRole, Notification
+from .notifications import increment_unread_counts, invalidate_notification_summary
+from .realtime import publish, user_channel
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# How long the worker keeps collecting events before writing a batch
+FLUSH_INTERVAL = 0.5
+
+TEXT_MAX_LENGTH = Notification._meta.get_field('text').max_length
+
+
+@dataclass(frozen=True)
+class NotificationEvent:
+    text: str
+    notification_type: str = 'system'
+    actor_id: int | None = None
+    target_url: str = ''
+    # Events sharing a group key coalesce into one unread notification
+    group_key: str = ''
+    # Used instead of ``text`` once events are coalesced, e.g. '{count} new messages'.
+    # A str.format template: escape user text in it with group_text_escape()
+    group_text: str = ''
+    user_ids: tuple = ()
+    # Also deliver to every member of this collaboration (resolved by the worker)
+    collaboration_id: int | None = None
+    exclude_user_id: int | None = None
+
+    def render(self, count):
+        if count > 1 and self.group_text:
+            try:
+                return self.group_text.format(count=count)[:TEXT_MAX_LENGTH]
+            except (KeyError, IndexError, ValueError):
+                # A bad template must not sink the whole batch
+                logger.warning("Invalid group_text %r", self.group_text)
+        return self.text[:TEXT_MAX_LENGTH]
+
+
+def group_text_escape(value):
+    """``value`` with its braces doubled, for use inside a ``group_text``"""
+    return str(value).replace('{', '{{').replace('}', '}}')
+
+
+def _collaboration_members(collaboration_ids):
+    """{collaboration_id: {user_id, ...}} - owners plus filled roles, two queries"""
+    members = {}
+    if not collaboration_ids:
+        return members
+    owners = Collaboration.objects.filter(pk__in=collaboration_ids).values_list('pk', 'owner_id')
+    for collaboration_id, owner_id in owners:
+        members.setdefault(collaboration_id, set()).add(owner_id)
+    roles = (
+        CollaborationRole.objects
+        .filter(collaboration_id__in=collaboration_ids, filled_by__isnull=False)
+        .values_list('collaboration_id', 'filled_by_id')
+    )
+    for collaboration_id, user_id in roles:
+        members.setdefault(collaboration_id, set()).add(user_id)
+    return members
+
+
+def write_events(events):
+    """
+    Coalesce ``events`` and write them in bulk.
+
+    Returns (created, updated) notification counts.
+    """
+    members = _collaboration_members({e.collaboration_id for e in events if e.collaboration_id})
+
+    grouped = {}  # (user_id, group_key) -> [latest event, count]
+    single = {}   # (user_id, event) -> event, drops exact duplicates
+    for event in events:
+        recipients = set(event.user_ids) | members.get(event.collaboration_id, set())
+        recipients.discard(event.exclude_user_id)
+        for user_id in recipients:
+            if not event.group_key:
+                single.setdefault((user_id, event), event)
+                continue
+            entry = grouped.get((user_id, event.group_key))
+            if entry is None:
+                grouped[(user_id, event.group_key)] = [event, 1]
+            else:
+                entry[0] = event
+                entry[1] += 1
+
+    existing = {}
+    if grouped:
+        unread = Notification.objects.filter(
+            user_id__in={user_id for user_id, _ in grouped},
+            group_key__in={key for _, key in grouped},
+            is_read=False,
+        )
+        existing = {(n.user_id, n.group_key): n for n in unread}
+
+    now = timezone.now()
+    to_create, to_update = [], []
+    for (user_id, group_key), (event, count) in grouped.items():
+        notification = existing.get((user_id, group_key))
+        if notification is None:
+            to_create.append(_build(user_id, event, count))
+        else:
+            notification.event_count += count
+            notification.actor_id = event.actor_id
+            notification.text = event.render(notification.event_count)
+            notification.created_at = now
+            to_update.append(notification)
+    to_create.extend(_build(user_id, event, 1) for user_id, event in single)
+
+    with transaction.atomic():
+        Notification.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        Notification.objects.bulk_update(
+            to_update, ['event_count', 'actor', 'text', 'created_at'], batch_size=BATCH_SIZE
+        )
+        # bulk_create skips the post_save signal that keeps the counters
+        increment_unread_counts(Counter(n.user_id for n in to_create))
+        for user_id in {n.user_id for n in to_create + to_update}:
+            invalidate_notification_summary(user_id)
+        for notification in to_create + to_update:
+            publish(user_channel(notification.user_id), 'notification', {
+                'id': notification.pk, 'notification_type': notification.notification_type,
+            })
+
+    return len(to_create), len(to_update)
+
+
+def _build(user_id, event, count):
+    return Notification(
+        user_id=user_id,
+        actor_id=event.actor_id,
+        notification_type=event.notification_type,
+        text=event.render(count),
+        target_url=event.target_url,
+        group_key=event.group_key,
+        event_count=count,
+    )
+
+
+class NotificationDispatcher:
+    """In-memory queue drained in batches by one daemon worker thread"""
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, event):
+        self._ensure_worker()
+        self.queue.put(event)
+
+    def flush(self, timeout=None):
+        """Wait until every queued event has been written (or ``timeout`` seconds)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._work, name='pallate-notifications', daemon=True
+                )
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            close_old_connections()
+            try:
+                write_events(batch)
+            except Exception:
+                logger.exception("Writing %d notification events failed", len(batch))
+            finally:
+                connection.close()
+                for _ in batch:
+                    self.queue.task_done()
+
+
+dispatcher = NotificationDispatcher()
+
+# Give queued events a chance to be written on a normal shutdown
+atexit.register(dispatcher.flush, 5)
+
+
+def dispatch(event):
+    """Hand ``event`` to the worker once the current transaction commits"""
+    if getattr(settings, 'BACKGROUND_JOBS_EAGER', False):
+        transaction.on_commit(lambda: write_events([event]))
+    else:
+        transaction.on_commit(lambda: dispatcher.enqueue(event))
+
+
+def notify(users, text, actor=None, **fields):
+    """Queue a notification for each of ``users`` (users or user ids)"""
+    user_ids = tuple(sorted({getattr(user, 'pk', user) for user in users}))
+    dispatch(NotificationEvent(
+        text=text, user_ids=user_ids, actor_id=getattr(actor, 'pk', None), **fields
+    ))
+
+
+def notify_collaboration(collaboration, text, actor=None, **fields):
+    """Queue a notification for every member of ``collaboration`` except ``actor``"""
+    actor_id = getattr(actor, 'pk', None)
+    dispatch(NotificationEvent(
+        text=text,
+        collaboration_id=collaboration.pk,
+        actor_id=actor_id,
+        exclude_user_id=actor_id,
+        **fields
+    ))
@@ -0,0 +1,150 @@
+"""
+Cursor-based (keyset) feeds for the dashboard.
+
+Instead of OFFSET pagination, each page is fetched with a
+``WHERE (created_at, id) < (last_created_at, last_id)`` condition, so the
+cost of a page does not grow with how far the user has scrolled.
+The cursor handed to the client is an opaque url-safe token.
+"""
+
+import base64
+import json
+
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_datetime
+
+from .categories import filter_by_categories
+from .images import image_metadata
+from .media import media_url
+from .models import Artwork, Collaboration
+
+
+DEFAULT_PAGE_SIZE = 12
+MAX_PAGE_SIZE = 50
+POSTS_PAGE_SIZE = 5
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token can't be decoded."""
+
+
+def encode_cursor(obj, field='created_at'):
+    """Build an opaque cursor pointing just after ``obj``"""
+    payload = json.dumps([getattr(obj, field).isoformat(), obj.pk])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Returns (datetime, pk) from a cursor made by encode_cursor()"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        timestamp = parse_datetime(value)
+        pk = int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if timestamp is None:
+        raise InvalidCursor(cursor)
+    return timestamp, pk
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a ?limit= query value to a sane page size"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, field='created_at'):
+    """
+    Return one page of ``queryset`` newest-first plus the cursor of the next page.
+
+    ``next_cursor`` is None when there are no more rows.
+    """
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': timestamp}) |
+            Q(**{field: timestamp, 'pk__lt': pk})
+        )
+
+    # Fetch one extra row to know whether another page exists
+    items = list(queryset[:page_size + 1])
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    next_cursor = encode_cursor(items[-1], field) if has_more else None
+    return items, next_cursor
+
+
+def artwork_feed_queryset(categories=None):
+    """Artworks shown on the dashboard, optionally filtered by categories"""
+    queryset = (
+        Artwork.objects
+        .select_related('user')
+        .annotate(comment_count=Count('comments'))
+    )
+    if categories:
+        queryset = filter_by_categories(queryset, categories)
+    return queryset
+
+
+def collaboration_feed_queryset():
+    """Collaboration posts shown in the dashboard side panel"""
+    return Collaboration.objects.select_related('owner')
+
+
+def serialize_artwork(artwork):
+    return {
+        'id': artwork.id,
+        'title': artwork.title,
+        'description': artwork.description,
+        'image_url': media_url(artwork.image),
+        'user_username': artwork.user.username,
+        'user_first_name': artwork.user.first_name,
+        'user_id': artwork.user.id,
+        'created_at': artwork.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'comment_count': artwork.comment_count,
+        'favorite_count': artwork.favorite_count,
+        'categories': artwork.get_categories_list(),
+        **image_metadata(artwork.image, artwork.image_variants),
+    }
+
+
+def serialize_collaboration(post):
+    return {
+        'id': post.id,
+        'title': post.title,
+        'status': post.status,
+        'owner_id': post.owner.id,
+        'owner_username': post.owner.username,
+        'owner_first_name': post.owner.first_name,
+        'created_at': post.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+FEED_KINDS = ('artworks', 'posts')
+
+
+def feed_page(kind, cursor=None, page_size=None, categories=None):
+    """
+    Returns (items, next_cursor, serializer) for one page of a dashboard feed.
+
+    ``categories`` only applies to the artworks feed.
+    """
+    if kind == 'artworks':
+        queryset = artwork_feed_queryset(categories)
+        serializer = serialize_artwork
+        default_size = DEFAULT_PAGE_SIZE
+    elif kind == 'posts':
+        queryset = collaboration_feed_queryset()
+        serializer = serialize_collaboration
+        default_size = POSTS_PAGE_SIZE
+    else:
+        raise ValueError(f"Unknown feed kind: {kind}")
+
+    page_size = parse_page_size(page_size, default=default_size)
+    items, next_cursor = keyset_page(queryset, cursor=cursor, page_size=page_size)
+    return items, next_cursor, serializer
@@ -7,6 +7,10 @@ from .models import (
     CollaborationFeedback, CollaborationRole, CollaborationApplication,
     CollaborationFile, CollaborationTask
 )
+from .direct_uploads import (
+    DirectUploadClearableFileInput, DirectUploadFileField, DirectUploadFileInput, DirectUploadFormMixin,
+    DirectUploadImageField,
+)
 
 class RegisterForm(UserCreationForm):
     first_name = forms.CharField(max_length=30, required=True, label="First Name")
@@ -78,7 +82,7 @@ class CollaborationForm(forms.ModelForm):
         }
 
 
-class ProfileForm(forms.ModelForm):
+class ProfileForm(DirectUploadFormMixin, forms.ModelForm):
     # Add User model fields
     username = forms.CharField(
         max_length=150,
@@ -154,12 +158,13 @@ class ProfileForm(forms.ModelForm):
     class Meta:
         model = Profile
         fields = ['avatar', 'art_type', 'portfolio', 'bio', 'interests', 'location', 'hourly_rate', 'years_active', 'availability_status', 'security_question', 'security_answer']
+        field_classes = {'avatar': DirectUploadImageField}
         
         # Reusable CSS class for input fields
         input_class = 'w-full px-4 py-2 rounded-lg bg-gray-800 text-gray-200 border border-gray-700 focus:outline-none focus:ring-2 focus:ring-accent-purple'
         
         widgets = {
-            'avatar': forms.FileInput(attrs={
+            'avatar': DirectUploadFileInput('avatar', attrs={
                 'class': 'block w-full text-sm text-gray-200 file:mr-4 file:py-2 file:px-4 file:rounded-md file:border-0 file:text-sm file:font-semibold file:bg-accent-purple file:text-white hover:file:bg-purple-600',
                 'accept': 'image/*'
             }),
@@ -263,10 +268,11 @@ class ProfileForm(forms.ModelForm):
         return profile
 
 
-class ArtworkForm(forms.ModelForm):
+class ArtworkForm(DirectUploadFormMixin, forms.ModelForm):
     class Meta:
         model = Artwork
         fields = ['title', 'description', 'image']
+        field_classes = {'image': DirectUploadImageField}
         widgets = {
             'title': forms.TextInput(attrs={
                 'placeholder': 'Artwork Title',
@@ -277,8 +283,8 @@ class ArtworkForm(forms.ModelForm):
                 'class': 'w-full px-4 py-2 rounded-lg bg-gray-800 text-gray-200 border border-gray-700 focus:outline-none focus:ring-2 focus:ring-accent-purple',
                 'rows': 4
             }),
-            'image': forms.FileInput(attrs={
-                'class': 'block w-full text-sm text-gray-200 file:mr-4 file:py-2 file:px-4 file:rounded-md file:border-0 file:text-sm file:font-semibold file:bg-accent-purple file:text-white hover:file:bg-purple-600',
+            'image': DirectUploadFileInput('artwork', attrs={
+                'class': 'block w-full text-sm text-gray-200 file:mr-4 file:py-2 file:px-4 file:rounded-md file:border-0 file:text-sm file:font-semibold file:bg-gradient-to-r file:from-[#8B5CF6] file:to-[#6366F1] file:text-white hover:file:from-[#7C3AED] hover:file:to-[#4F46E5] file:transition file:duration-300',
                 'accept': 'image/*'
             })
         }
@@ -307,10 +313,11 @@ class ArtworkCommentForm(forms.ModelForm):
             })
         }
 
-class MessageForm(forms.ModelForm):
+class MessageForm(DirectUploadFormMixin, forms.ModelForm):
     class Meta:
         model = Message
         fields = ["text", "image"] 
+        field_classes = {"image": DirectUploadImageField}
 
         widgets = {
             "text": forms.Textarea(attrs={
@@ -318,7 +325,7 @@ class MessageForm(forms.ModelForm):
                 "placeholder": "Type your message...",
                 "class": "w-full bg-[#111827] text-[#E5E7EB] text-sm rounded-2xl px-4 py-3 border border-[#1F2937] focus:outline-none focus:border-[#8B5CF6]",
             }),
-            "image": forms.ClearableFileInput(attrs={
+            "image": DirectUploadClearableFileInput("message", attrs={
                 "class": "hidden",          
                 "accept": "image/*",        
                 "id": "id_image",           
@@ -451,10 +458,11 @@ class CollaborationApplicationForm(forms.ModelForm):
         }
 
 
-class CollaborationFileForm(forms.ModelForm):
+class CollaborationFileForm(DirectUploadFormMixin, forms.ModelForm):
     class Meta:
         model = CollaborationFile
         fields = ['title', 'description', 'file', 'file_type']
+        field_classes = {'file': DirectUploadFileField}
         widgets = {
             'title': forms.TextInput(attrs={
                 'placeholder': 'File title',
@@ -465,7 +473,7 @@ class CollaborationFileForm(forms.ModelForm):
                 'class': 'w-full px-4 py-2 rounded-lg bg-gray-800 text-gray-200 border border-gray-700 focus:outline-none focus:ring-2 focus:ring-accent-purple',
                 'rows': 2
             }),
-            'file': forms.FileInput(attrs={
+            'file': DirectUploadFileInput('collaboration_file', attrs={
                 'class': 'w-full px-4 py-2 rounded-lg bg-gray-800 text-gray-200 border border-gray-700 focus:outline-none focus:ring-2 focus:ring-accent-purple'
             }),
             'file_type': forms.Select(attrs={
@@ -0,0 +1,163 @@
+"""
+Resized, re-encoded copies ("variants") of uploaded images.
+
+When an artwork, avatar or chat image is saved with a new file, a
+background job (jobs.py) opens it once with Pillow and writes WebP (and
+AVIF, when the installed Pillow can encode it) copies at a few widths
+through the field's own storage, so they end up next to the original
+locally or in the Supabase bucket. The result is recorded in the model's
+``*_variants`` JSON field:
+
+    {'source': 'artworks/cat.png', 'width': 3000, 'height': 2000, 'version': 1718000000,
+     'formats': {'webp': [[320, 213, 'artworks/variants/cat_320w.webp'], ...]}}
+
+``source`` ties the variants to the file they were made from; variants of a
+replaced file are ignored until the new ones are ready. ``version`` (when
+they were built) goes into their URLs, since a rebuild reuses the names. The
+``responsive_image`` template tag (templatetags/images.py) turns this into
+``srcset`` attributes with the intrinsic width/height.
+"""
+
+import os
+import time
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .caching import bump_versions
+from .jobs import run_in_background
+from .media import media_url
+
+
+# Widths generated per kind of image, smallest first
+VARIANT_WIDTHS = {
+    'artwork': (320, 640, 1280),
+    'avatar': (64, 128, 256),
+    'message': (320, 640),
+}
+
+# kind -> namespaces of cached fragments (caching.py) showing those images
+CACHE_NAMESPACES = {
+    'artwork': ('artworks',),
+    'avatar': ('profiles',),
+    'message': (),
+}
+
+# format -> (Pillow format, save options, MIME type)
+FORMATS = {
+    'avif': ('AVIF', {'quality': 60}, 'image/avif'),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}, 'image/webp'),
+}
+
+
+def available_formats():
+    """Formats the installed Pillow can write, best first"""
+    Image.init()
+    return [name for name, (pil_format, _, _) in FORMATS.items() if pil_format in Image.SAVE]
+
+
+def current_variants(fieldfile, variants):
+    """``variants`` if they were made from the file currently in ``fieldfile``, else None"""
+    if fieldfile and variants and variants.get('source') == fieldfile.name:
+        return variants
+    return None
+
+
+def variant_srcset(fieldfile, entries, version=None):
+    """``srcset`` value for ``[[width, height, name], ...]`` variant entries"""
+    storage = fieldfile.storage
+    return ', '.join(f'{media_url(name, storage, version)} {width}w' for width, _, name in entries)
+
+
+def image_metadata(fieldfile, variants):
+    """Intrinsic size and WebP srcset of an image for JSON responses"""
+    variants = current_variants(fieldfile, variants)
+    if not variants:
+        return {'image_srcset': '', 'image_width': None, 'image_height': None}
+    return {
+        'image_srcset': variant_srcset(fieldfile, variants['formats'].get('webp', []), variants.get('version')),
+        'image_width': variants['width'],
+        'image_height': variants['height'],
+    }
+
+
+def variant_name(source, width, extension):
+    directory, filename = os.path.split(source)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'variants', f'{stem}_{width}w.{extension}')
+
+
+def build_variants(fieldfile, widths):
+    """Write the variants of ``fieldfile`` to its storage and return their description"""
+    storage = fieldfile.storage
+    with storage.open(fieldfile.name, 'rb') as source:
+        image = Image.open(source)
+        # JPEG can decode straight to a smaller scale
+        image.draft('RGB', (widths[-1], widths[-1]))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    original_width, original_height = image.size
+
+    # Never upscale; an image narrower than every width gets one copy at its own size
+    targets = [width for width in widths if width < original_width] or [original_width]
+
+    formats = {name: [] for name in available_formats()}
+    # Largest first, each resize starting from the previous (smaller) copy
+    resized = image
+    for width in sorted(targets, reverse=True):
+        height = max(1, round(original_height * width / original_width))
+        resized = resized.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+        for name in formats:
+            pil_format, options, _ = FORMATS[name]
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            target = variant_name(fieldfile.name, width, name)
+            if storage.exists(target):
+                storage.delete(target)
+            saved = storage.save(target, ContentFile(buffer.getvalue()))
+            formats[name].append([width, height, saved])
+
+    for entries in formats.values():
+        entries.sort()
+    return {
+        'source': fieldfile.name,
+        'width': original_width,
+        'height': original_height,
+        'version': int(time.time()),
+        'formats': formats,
+    }
+
+
+def generate_variants(model, pk, field_name, variants_field, kind):
+    """Background job: build and record the variants of one object's image"""
+    obj = model.objects.filter(pk=pk).first()
+    if obj is None:
+        return None
+    fieldfile = getattr(obj, field_name)
+    if not fieldfile or not fieldfile.storage.exists(fieldfile.name):
+        return None
+    variants = build_variants(fieldfile, VARIANT_WIDTHS[kind])
+    # Only record them if the file wasn't replaced in the meantime;
+    # update() also keeps this from firing the post_save signals again
+    if model.objects.filter(pk=pk, **{field_name: fieldfile.name}).update(**{variants_field: variants}):
+        # Cached fragments (caching.py) still have the plain <img>
+        bump_versions(*CACHE_NAMESPACES[kind])
+    return variants
+
+
+def schedule_variants(instance, field_name, variants_field, kind, skip=()):
+    """Queue variant generation once the transaction commits, if the file changed"""
+    fieldfile = getattr(instance, field_name)
+    if not fieldfile or fieldfile.name in skip:
+        return
+    if current_variants(fieldfile, getattr(instance, variants_field)):
+        return
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(
+        lambda: run_in_background(generate_variants, model, pk, field_name, variants_field, kind)
+    )
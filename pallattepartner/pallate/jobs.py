@@ -0,0 +1,56 @@
+"""
+Minimal in-process background jobs.
+
+Work that doesn't need to finish before the response is sent (match
+regeneration, image processing, ...) is handed to a small thread pool.
+Each job gets its own database connection, which is closed when the job
+ends. With ``BACKGROUND_JOBS_EAGER = True`` (handy in tests and management
+commands) jobs run inline instead.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_JOBS_WORKERS', 2),
+                thread_name_prefix='pallate-job',
+            )
+        return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background job %s failed", getattr(func, '__name__', func))
+        raise
+    finally:
+        connection.close()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Schedule ``func(*args, **kwargs)`` off the request path. Returns a Future."""
+    if getattr(settings, 'BACKGROUND_JOBS_EAGER', False):
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as exc:
+            logger.exception("Background job %s failed", getattr(func, '__name__', func))
+            future.set_exception(exc)
+        return future
+    return _get_executor().submit(_run, func, args, kwargs)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from pallattepartner.pallate.categories import rebuild_category_index
+from pallattepartner.pallate.models import Artwork
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the category index (memberships and artwork counts) from existing Artwork.categories strings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of artworks read from the database per round trip',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Rebuilding category index from artworks...'))
+
+        artworks = (
+            Artwork.objects
+            .order_by()
+            .values_list('id', 'categories')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        total = rebuild_category_index(artworks, batch_size=options['chunk_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Category index rebuilt: {total} categories in use')
+        )
@@ -0,0 +1,168 @@
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+
+BENCH_USERNAME = 'bench_async_views'
+
+SERVERS = {
+    'wsgi': {
+        'args': ['config.wsgi:application', '--worker-class', 'gthread'],
+        'env': {'ASYNC_VIEWS': 'false'},
+    },
+    'asgi': {
+        'args': ['config.asgi:application', '--worker-class', 'uvicorn.workers.UvicornWorker'],
+        'env': {'ASYNC_VIEWS': 'true'},
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Load the read-heavy pages (dashboard, search, artist profiles, category '
+        'API) concurrently, once under gunicorn with the sync WSGI views and '
+        'once under gunicorn + uvicorn with the async ASGI views, and report '
+        'throughput and latency. Needs httpx, and uvicorn for the ASGI run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 100])
+        parser.add_argument('--requests', type=int, default=500, help='Requests per run')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per WSGI worker')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['wsgi', 'asgi'])
+        parser.add_argument(
+            '--url',
+            action='append',
+            default=[],
+            metavar='LABEL=URL',
+            help='Benchmark an already running server instead of starting gunicorn, e.g. asgi=http://localhost:8000',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import httpx  # noqa: F401
+        except ImportError:
+            raise CommandError("benchmark_async_views needs the 'httpx' package (pip install httpx)")
+
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        client = Client()
+        client.force_login(user)
+        cookies = {settings.SESSION_COOKIE_NAME: client.cookies[settings.SESSION_COOKIE_NAME].value}
+        paths = self._paths(user)
+
+        try:
+            if options['url']:
+                for target in options['url']:
+                    label, _, url = target.partition('=')
+                    self._run_all(label, url.rstrip('/'), paths, cookies, options)
+            else:
+                for name in options['servers']:
+                    with self._server(name, options) as url:
+                        self._run_all(name, url, paths, cookies, options)
+        finally:
+            # The session row goes with the user
+            client.logout()
+            user.delete()
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark finished'))
+
+    def _paths(self, user):
+        return [
+            reverse('pallate:dashboard'),
+            reverse('pallate:search') + '?q=art',
+            reverse('pallate:artist_profile'),
+            reverse('pallate:artist_profile_by_id', args=[user.pk]),
+            reverse('pallate:fetch_artworks_by_category') + '?categories=Digital%20Art',
+        ]
+
+    @contextmanager
+    def _server(self, name, options):
+        args = [
+            sys.executable, '-m', 'gunicorn', *SERVERS[name]['args'],
+            '--bind', f"127.0.0.1:{options['port']}",
+            '--workers', str(options['workers']),
+            '--threads', str(options['threads']),
+            '--log-level', 'warning',
+        ]
+        self.stdout.write(self.style.WARNING(f"Starting {name}: gunicorn {' '.join(args[3:])}"))
+        process = subprocess.Popen(args, env=dict(os.environ, **SERVERS[name]['env']))
+        try:
+            url = f"http://127.0.0.1:{options['port']}"
+            self._wait_until_up(url, process)
+            yield url
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    def _wait_until_up(self, url, process):
+        import httpx
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'Server exited with status {process.returncode}')
+            try:
+                httpx.get(url + reverse('pallate:login'), timeout=1)
+                return
+            except httpx.TransportError:
+                time.sleep(0.2)
+        raise CommandError(f'Server at {url} did not come up')
+
+    def _run_all(self, label, url, paths, cookies, options):
+        for concurrency in options['concurrency']:
+            result = asyncio.run(self._load(url, paths, cookies, concurrency, options['requests']))
+            self.stdout.write(
+                f"{label:<6} c={concurrency:<4} {result['per_second']:8.1f} req/s   "
+                f"median {result['median']:8.1f} ms   p95 {result['p95']:8.1f} ms   "
+                f"errors {result['errors']}"
+            )
+
+    async def _load(self, url, paths, cookies, concurrency, total):
+        import httpx
+
+        latencies = []
+        errors = 0
+        counter = iter(range(total))
+        headers = {'X-Requested-With': 'XMLHttpRequest'}
+        limits = httpx.Limits(max_connections=concurrency)
+
+        async with httpx.AsyncClient(base_url=url, cookies=cookies, headers=headers, limits=limits, timeout=60) as client:
+            # Warm up connections and caches on every worker
+            await asyncio.gather(*(client.get(path) for path in paths for _ in range(2)))
+
+            async def user():
+                nonlocal errors
+                for i in counter:
+                    start = time.perf_counter()
+                    try:
+                        response = await client.get(paths[i % len(paths)])
+                        ok = response.status_code == 200
+                    except httpx.HTTPError:
+                        ok = False
+                    if ok:
+                        latencies.append((time.perf_counter() - start) * 1000)
+                    else:
+                        errors += 1
+
+            start = time.perf_counter()
+            await asyncio.gather(*(user() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            'per_second': len(latencies) / elapsed,
+            'median': statistics.median(latencies) if latencies else 0,
+            'p95': latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0,
+            'errors': errors,
+        }
@@ -0,0 +1,60 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from pallattepartner.pallate.autocomplete import PrefixIndex
+from pallattepartner.pallate.benchmarks import format_stats, measure
+
+
+WORDS = [
+    'blue', 'harbour', 'portrait', 'city', 'forest', 'neon', 'study', 'dragon', 'night',
+    'garden', 'misty', 'golden', 'river', 'castle', 'sketch', 'robot', 'winter', 'dream',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure typeahead lookups on the in-memory prefix index with synthetic '
+        'usernames and artwork titles, with and without the LRU cache. No database access.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=327)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        for size in options['sizes']:
+            items = [
+                ('artist', i, ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12))))
+                for i in range(size // 4)
+            ]
+            items += [
+                ('artwork', i, ' '.join(rng.choices(WORDS, k=rng.randint(1, 4))).title())
+                for i in range(size - len(items))
+            ]
+            index = PrefixIndex()
+            start = time.perf_counter()
+            index.load(items)
+            self.stdout.write(self.style.WARNING(
+                f'\n{size:,} labels, loaded in {(time.perf_counter() - start) * 1000:,.0f} ms'
+            ))
+
+            prefixes = ['ha', 'harb', 'neon ci', 'qz', 'mist']
+            for prefix in prefixes:
+                def uncached():
+                    index._lru.clear()
+                    index.suggest(prefix)
+
+                self.stdout.write(format_stats(f'  [{prefix!r}] lookup', measure(uncached, repeat=options['repeat'])))
+                self.stdout.write(format_stats(f'  [{prefix!r}] LRU hit', measure(lambda: index.suggest(prefix), repeat=options['repeat'])))
+
+            def update():
+                index.add('artwork', 0, f'Renamed {rng.random()}')
+
+            self.stdout.write(format_stats('  incremental update', measure(update, repeat=options['repeat'])))
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Benchmark finished'))
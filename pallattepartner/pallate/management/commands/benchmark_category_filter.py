@@ -0,0 +1,100 @@
+import random
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from pallattepartner.pallate.benchmarks import bench_users, format_stats, measure, rolled_back
+from pallattepartner.pallate.categories import filter_by_categories, normalize_category
+from pallattepartner.pallate.models import Artwork, ArtworkCategory, Category
+
+
+COMMON_CATEGORIES = [
+    'Digital Art', 'Traditional Art', 'Photography', 'Illustration',
+    'Graphic Design', '3D Art', 'Animation', 'Concept Art',
+]
+# Used by ~0.1% of artworks, where a sequential scan hurts the most
+RARE_CATEGORY = 'Glass Mosaic'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare category filter latency (legacy iregex/icontains scans vs the '
+        'ArtworkCategory index) on synthetic artworks. All rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=327)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with rolled_back():
+            user = bench_users(1, prefix='bench_category')[0]
+            categories = {}
+            for name in COMMON_CATEGORIES + [RARE_CATEGORY]:
+                categories[name] = Category.objects.get_or_create(
+                    key=normalize_category(name), defaults={'name': name}
+                )[0]
+
+            created = 0
+            for size in sorted(options['sizes']):
+                self._grow(user, categories, created, size, rng)
+                created = size
+                self.stdout.write(self.style.WARNING(f'\n{size:,} artworks'))
+
+                for label, names in (
+                    ('common', ['Illustration']),
+                    ('rare', [RARE_CATEGORY]),
+                    ('multi', ['Animation', RARE_CATEGORY]),
+                ):
+                    self._report(label, names, options['repeat'])
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Benchmark finished (all rows rolled back)'))
+
+    def _grow(self, user, categories, start, size, rng, batch_size=5000):
+        for offset in range(start, size, batch_size):
+            count = min(batch_size, size - offset)
+            picked = []
+            for _ in range(count):
+                if rng.random() < 0.001:
+                    names = [RARE_CATEGORY]
+                else:
+                    names = rng.sample(COMMON_CATEGORIES, rng.randint(1, 3))
+                picked.append(names)
+
+            artworks = Artwork.objects.bulk_create([
+                Artwork(user=user, title=f'Bench {offset + i}', image='artworks/bench.png',
+                        categories=', '.join(names))
+                for i, names in enumerate(picked)
+            ])
+            ArtworkCategory.objects.bulk_create([
+                ArtworkCategory(artwork=artwork, category=categories[name])
+                for artwork, names in zip(artworks, picked)
+                for name in names
+            ])
+            # Signals don't run for bulk_create, so keep the counts right by hand
+            for name, total in Counter(name for names in picked for name in names).items():
+                Category.objects.filter(pk=categories[name].pk).update(
+                    artwork_count=F('artwork_count') + total
+                )
+
+    def _report(self, label, names, repeat):
+        def legacy_iregex():
+            condition = Q()
+            for name in names:
+                condition |= Q(categories__iregex=r'(?:^|,)\s*' + name + r'\s*(?:,|$)')
+            return list(Artwork.objects.filter(condition).order_by('-created_at')[:20])
+
+        def legacy_icontains():
+            condition = Q()
+            for name in names:
+                condition |= Q(categories__icontains=name)
+            return list(Artwork.objects.filter(condition).order_by('-created_at')[:20])
+
+        def indexed():
+            return list(filter_by_categories(Artwork.objects.all(), names).order_by('-created_at')[:20])
+
+        for name, func in (('iregex scan', legacy_iregex), ('icontains scan', legacy_icontains), ('ArtworkCategory index', indexed)):
+            self.stdout.write(format_stats(f'  [{label}] {name}', measure(func, repeat=repeat)))
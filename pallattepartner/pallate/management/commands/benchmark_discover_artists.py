@@ -0,0 +1,108 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Prefetch
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from pallattepartner.pallate.artists import discover_page
+from pallattepartner.pallate.benchmarks import format_stats, measure, rolled_back
+from pallattepartner.pallate.feeds import encode_cursor
+from pallattepartner.pallate.models import Artwork, Collaboration
+from pallattepartner.pallate.stats import rebuild_stats
+
+
+def legacy_discover_artists():
+    """The Discover Artists query before artists.py: every artist, joined counts"""
+    return User.objects.select_related('profile').prefetch_related(
+        Prefetch('artworks', queryset=Artwork.objects.order_by('-created_at')[:3], to_attr='recent_artworks')
+    ).annotate(
+        artwork_count=Count('artworks'),
+        collab_count=Count('owned_collaborations')
+    ).filter(is_active=True).order_by('-date_joined')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the old Discover Artists query (all artists, sliced prefetch, '
+        'joined counts) with the keyset pages of artists.py on synthetic users. '
+        'All rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50_000)
+        parser.add_argument('--artworks-per-user', type=int, default=5, help='Average, randomized per user')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--legacy-repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=327)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with rolled_back():
+            self._populate(options['users'], options['artworks_per_user'], rng)
+            self.stdout.write(self.style.WARNING(
+                f"\n{options['users']:,} artists, {Artwork.objects.count():,} artworks, "
+                f"{Collaboration.objects.count():,} collaborations"
+            ))
+
+            self._check_counts()
+
+            first_cursor = discover_page()[1]
+            deep_cursor = self._cursor_at(options['users'] // 2)
+            for label, cursor in (('first page', None), ('second page', first_cursor), ('middle page', deep_cursor)):
+                self._report(f'keyset {label}', lambda cursor=cursor: discover_page(cursor), options['repeat'])
+            self._report('legacy (all artists)', lambda: list(legacy_discover_artists()), options['legacy_repeat'])
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Benchmark finished (all rows rolled back)'))
+
+    def _populate(self, count, artworks_per_user, rng, batch_size=5000):
+        start = timezone.now() - timedelta(days=365)
+        users = [
+            User(username=f'bench_discover_{i}', date_joined=start + timedelta(seconds=i * 60))
+            for i in range(count)
+        ]
+        users = User.objects.bulk_create(users, batch_size=batch_size)
+
+        artworks, collaborations = [], []
+        for user in users:
+            for i in range(rng.randint(0, 2 * artworks_per_user)):
+                artworks.append(Artwork(user=user, title=f'Artwork {i}', image='artworks/bench.png'))
+            if rng.random() < 0.2:
+                collaborations.append(Collaboration(owner=user, title='Project', description='Synthetic'))
+            if len(artworks) >= batch_size:
+                Artwork.objects.bulk_create(artworks, batch_size=batch_size)
+                artworks = []
+        Artwork.objects.bulk_create(artworks, batch_size=batch_size)
+        Collaboration.objects.bulk_create(collaborations, batch_size=batch_size)
+        # bulk_create skips the signals that maintain UserStats
+        rebuild_stats(user_ids=[user.pk for user in users], batch_size=batch_size)
+
+    def _check_counts(self):
+        # An artist with both artworks and collaborations shows the problem
+        user = (
+            User.objects.filter(username__startswith='bench_discover_', owned_collaborations__isnull=False)
+            .annotate(n=Count('artworks', distinct=True)).filter(n__gt=1).first()
+        )
+        if user is None:
+            return
+        legacy = legacy_discover_artists().filter(pk=user.pk).first()
+        actual = (user.artworks.count(), user.owned_collaborations.count())
+        stats = user.stats
+        self.stdout.write(
+            f'  counts for {user.username}: actual {actual}, '
+            f'legacy {(legacy.artwork_count, legacy.collab_count)}, '
+            f'UserStats {(stats.artwork_count, stats.collab_count)}'
+        )
+
+    def _cursor_at(self, position):
+        artist = User.objects.filter(is_active=True).order_by('-date_joined', '-pk')[position]
+        return encode_cursor(artist, 'date_joined')
+
+    def _report(self, label, func, repeat):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        stats = measure(func, repeat=repeat, warmup=1)
+        self.stdout.write(format_stats(f'  {label}', stats) + f'   {len(queries)} queries')
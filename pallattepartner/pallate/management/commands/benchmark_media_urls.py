@@ -0,0 +1,99 @@
+import tempfile
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.utils import timezone
+from pallattepartner.pallate import media
+from pallattepartner.pallate.benchmarks import format_stats, measure
+from pallattepartner.pallate.feeds import serialize_artwork
+from pallattepartner.pallate.models import Artwork
+from pallattepartner.pallate.storage import PooledS3Storage
+
+BUCKET = 'pallate-bench'
+
+
+class Command(BaseCommand):
+    help = (
+        'Render a grid of artwork cards and serialize the same artworks for the '
+        'feed API, with media URLs built per card (cache cleared before every '
+        'render) and memoized by media.media_url. Runs against moto for the S3 '
+        'backends; nothing is written to the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with self._s3(), tempfile.TemporaryDirectory() as root:
+            backends = {
+                'file system': FileSystemStorage(location=root, base_url='/media/'),
+                'supabase (public domain)': self._s3_storage(
+                    custom_domain=f'bench.supabase.co/storage/v1/object/public/{BUCKET}',
+                ),
+                'supabase (signed urls)': self._s3_storage(custom_domain=None, querystring_auth=True),
+            }
+            for label, storage in backends.items():
+                artworks = self._artworks(storage, options['cards'])
+                self.stdout.write(self.style.WARNING(f'\n{label}: {len(artworks)} cards'))
+                self._report('render', lambda: render_to_string(
+                    'pallate/_artwork_cards.html', {'artworks': artworks, 'user_favorites': set()}
+                ), len(artworks), options['repeat'])
+                self._report('serialize', lambda: [serialize_artwork(a) for a in artworks],
+                             len(artworks), options['repeat'])
+
+        media.clear_cache()
+        self.stdout.write(self.style.SUCCESS('\n✓ Benchmark finished'))
+
+    @contextmanager
+    def _s3(self):
+        try:
+            import boto3
+            from moto import mock_aws
+        except ImportError:
+            raise CommandError("benchmark_media_urls needs the 'moto' package (pip install moto)")
+        with mock_aws():
+            boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+            yield
+
+    def _s3_storage(self, **options):
+        return PooledS3Storage(
+            bucket_name=BUCKET, location='media', region_name='us-east-1',
+            access_key='testing', secret_key='testing', default_acl=None, **options,
+        )
+
+    def _artworks(self, storage, count):
+        # Unsaved rows are enough for the template; only the image names matter
+        now = timezone.now()
+        version = int(now.timestamp())
+        artworks = []
+        for i in range(1, count + 1):
+            artwork = Artwork(
+                id=i, user=User(id=i, username=f'bench_media_{i}'), title=f'Artwork {i}',
+                description='Synthetic artwork', categories='Digital Art, Illustration',
+                image=f'artworks/bench_{i}.png', created_at=now,
+                image_variants={
+                    'source': f'artworks/bench_{i}.png', 'width': 2400, 'height': 1600, 'version': version,
+                    'formats': {
+                        name: [[w, w * 2 // 3, f'variants/artworks/bench_{i}_{w}.{name}'] for w in (480, 960, 1600)]
+                        for name in ('webp', 'jpg')
+                    },
+                },
+            )
+            artwork.image.storage = storage
+            artwork.comment_count = artwork.favorite_count = 0
+            artworks.append(artwork)
+        return artworks
+
+    def _report(self, label, func, count, repeat):
+        def cold():
+            media.clear_cache()
+            func()
+
+        for mode, run in (('per card', cold), ('memoized', func)):
+            stats = measure(run, repeat=repeat)
+            self.stdout.write(format_stats(f'  {label} ({mode})', stats))
+            self.stdout.write(f"    {stats['median'] / count * 1000:,.1f} µs per card")
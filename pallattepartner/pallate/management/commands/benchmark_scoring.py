@@ -0,0 +1,68 @@
+import random
+
+from django.core.management.base import BaseCommand
+from pallattepartner.pallate.benchmarks import format_stats, measure
+from pallattepartner.pallate.models import Profile
+from pallattepartner.pallate.scoring import ProfileMatrix, score_pair
+
+
+ART_TYPES = [
+    'Digital Art', 'Digital Painting', 'Traditional Art', 'Photography',
+    'Illustration', 'Graphic Design', '3D Art', 'Animation', 'Concept Art',
+]
+INTERESTS = [
+    'Fantasy Art', 'Portraits', 'Landscapes', 'Character Design', 'Anime',
+    'Sci-Fi', 'Comics', 'Watercolor', 'Pixel Art', 'Storyboarding',
+    'Typography', 'Street Art', 'Architecture', 'Nature', 'Abstract',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the per-pair collaborator scoring loop with the batch '
+        'ProfileMatrix scorer on synthetic, unsaved profiles.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=327)
+
+    def _profile(self, rng):
+        return Profile(
+            art_type=rng.choice(ART_TYPES + ['']),
+            interests=', '.join(rng.sample(INTERESTS, rng.randint(0, 5))),
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        count = options['profiles']
+        repeat = options['repeat']
+
+        self.stdout.write(self.style.WARNING(f'Generating {count:,} profiles...'))
+        owner = self._profile(rng)
+        candidates = [self._profile(rng) for _ in range(count)]
+
+        def per_pair():
+            return [score_pair(owner, candidate)[0] for candidate in candidates]
+
+        matrix = ProfileMatrix(candidates)
+
+        def batch():
+            return matrix.scores(owner)
+
+        if per_pair() != batch():
+            self.stdout.write(self.style.ERROR('Batch scores differ from per-pair scores'))
+            return
+
+        results = [
+            ('per-pair score_pair()', measure(per_pair, repeat=repeat, warmup=1)),
+            ('ProfileMatrix build', measure(lambda: ProfileMatrix(candidates), repeat=repeat, warmup=1)),
+            ('ProfileMatrix.scores() (prebuilt)', measure(batch, repeat=repeat, warmup=1)),
+        ]
+        for label, stats in results:
+            throughput = count / (stats['median'] / 1000)
+            self.stdout.write(f'{format_stats(label, stats)}   {throughput:12,.0f} profiles/s')
+
+        speedup = results[0][1]['median'] / results[2][1]['median']
+        self.stdout.write(self.style.SUCCESS(f'✓ Batch scoring is {speedup:.1f}x faster per owner'))
@@ -0,0 +1,102 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from pallattepartner.pallate.benchmarks import bench_users, format_stats, measure, rolled_back
+from pallattepartner.pallate.models import Artwork, SearchDocument
+from pallattepartner.pallate.search import artwork_document
+from pallattepartner.pallate.views import search_artworks
+
+
+# Word pool for the synthetic corpus; picked with a skewed distribution so a
+# few words are everywhere (like real titles) and most are rare
+SUBJECTS = [
+    'portrait', 'landscape', 'city', 'forest', 'ocean', 'harbour', 'mountain', 'garden',
+    'dragon', 'robot', 'castle', 'river', 'desert', 'festival', 'market', 'lighthouse',
+    'cathedral', 'meadow', 'glacier', 'volcano', 'orchard', 'subway', 'carnival', 'observatory',
+]
+STYLES = [
+    'watercolour', 'charcoal', 'digital', 'oil', 'ink', 'pastel', 'gouache', 'pixel',
+    'lowpoly', 'collage', 'acrylic', 'linocut', 'airbrush', 'graphite', 'mosaic', 'etching',
+]
+MOODS = [
+    'quiet', 'stormy', 'golden', 'neon', 'misty', 'frozen', 'sunlit', 'haunted',
+    'dreamy', 'crowded', 'lonely', 'ancient', 'futuristic', 'vivid', 'muted', 'nocturnal',
+]
+CATEGORIES = ['Digital Art', 'Traditional Art', 'Photography', 'Illustration', 'Concept Art']
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic artwork corpus and compare search latency (legacy '
+        'icontains scan vs the full-text index). All rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=327)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with rolled_back():
+            user = bench_users(1, prefix='bench_search')[0]
+            created = 0
+            for size in sorted(options['sizes']):
+                self._grow(user, created, size, rng)
+                created = size
+                self.stdout.write(self.style.WARNING(f'\n{size:,} artworks'))
+
+                for label, query in (
+                    ('common word', 'portrait'),
+                    ('rare word', 'observatory'),
+                    ('two words', 'misty harbour'),
+                    ('prefix', 'lightho'),
+                ):
+                    self._report(label, query, options['repeat'])
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Benchmark finished (all rows rolled back)'))
+
+    def _text(self, rng, words, length):
+        # Skewed toward the start of each list
+        return ' '.join(words[min(int(rng.expovariate(0.25)), len(words) - 1)] for _ in range(length))
+
+    def _grow(self, user, start, size, rng, batch_size=5000):
+        for offset in range(start, size, batch_size):
+            count = min(batch_size, size - offset)
+            artworks = Artwork.objects.bulk_create([
+                Artwork(
+                    user=user,
+                    title=f"{self._text(rng, MOODS, 1)} {self._text(rng, SUBJECTS, 1)}".title(),
+                    description=(
+                        f"{self._text(rng, STYLES, 2)} study of a {self._text(rng, MOODS, 1)} "
+                        f"{self._text(rng, SUBJECTS, 2)}, {self._text(rng, MOODS + SUBJECTS, 12)}"
+                    ),
+                    image='artworks/bench.png',
+                    categories=rng.choice(CATEGORIES),
+                )
+                for _ in range(count)
+            ])
+            # bulk_create skips the signals that write the search documents
+            SearchDocument.objects.bulk_create([
+                SearchDocument(kind='artwork', object_id=artwork.pk, title=title, body=body)
+                for artwork in artworks
+                for title, body in [artwork_document(artwork)]
+            ])
+
+    def _report(self, label, query, repeat):
+        def legacy_icontains():
+            return list(
+                Artwork.objects
+                .filter(Q(title__icontains=query) | Q(description__icontains=query))
+                .select_related('user')
+                .annotate(comment_count=Count('comments'))
+                .order_by('-created_at')
+            )
+
+        def full_text():
+            return search_artworks(query)
+
+        for name, func in (('icontains scan (all rows)', legacy_icontains), ('full-text page', full_text)):
+            self.stdout.write(format_stats(f'  [{label}] {name}', measure(func, repeat=repeat)))
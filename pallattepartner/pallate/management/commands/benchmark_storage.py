@@ -0,0 +1,113 @@
+import gc
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from pallattepartner.pallate import storage as pallate_storage
+from pallattepartner.pallate.benchmarks import format_stats, measure
+from pallattepartner.pallate.storage import PooledS3Storage
+from storages.backends.s3boto3 import S3Boto3Storage
+
+
+BACKENDS = {
+    'django-storages': S3Boto3Storage,
+    'pooled': PooledS3Storage,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare .url() and concurrent .save() throughput of the stock '
+        'django-storages S3 backend and the pooled one used for Supabase. '
+        'Runs against moto by default, or an S3 stand-in such as MinIO with --endpoint-url.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--files', type=int, default=20, help='Files saved per thread')
+        parser.add_argument('--file-size', type=int, default=20 * 1024)
+        parser.add_argument('--urls', type=int, default=1000, help='Names per .url() round')
+        parser.add_argument('--endpoint-url', help='S3-compatible endpoint, e.g. http://localhost:9000')
+        parser.add_argument('--bucket', default='pallate-bench')
+        parser.add_argument('--access-key', default='testing')
+        parser.add_argument('--secret-key', default='testing')
+
+    def handle(self, *args, **options):
+        with self._s3(options):
+            for label, backend in BACKENDS.items():
+                self.stdout.write(self.style.WARNING(f'\n{label}'))
+                self._bench_urls(self._storage(backend, options), options['urls'])
+                for threads in options['threads']:
+                    self._bench_saves(backend, threads, options)
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Benchmark finished'))
+
+    @contextmanager
+    def _s3(self, options):
+        if options['endpoint_url']:
+            yield
+            return
+        try:
+            import boto3
+            from moto import mock_aws
+        except ImportError:
+            raise CommandError("Without --endpoint-url, benchmark_storage needs the 'moto' package (pip install moto)")
+        with mock_aws():
+            boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=options['bucket'])
+            yield
+
+    def _storage(self, backend, options):
+        return backend(
+            bucket_name=options['bucket'],
+            location='media',
+            region_name='us-east-1',
+            endpoint_url=options['endpoint_url'],
+            access_key=options['access_key'],
+            secret_key=options['secret_key'],
+            custom_domain=f"bench.supabase.co/storage/v1/object/public/{options['bucket']}",
+            querystring_auth=False,
+            file_overwrite=False,
+            default_acl=None,
+        )
+
+    def _bench_urls(self, storage, count):
+        names = [f'artworks/bench_{i}.png' for i in range(count)]
+
+        def urls():
+            for name in names:
+                storage.url(name)
+
+        stats = measure(urls, repeat=20)
+        self.stdout.write(format_stats(f'  .url() x{count}', stats))
+        self.stdout.write(f"    {count / stats['median'] * 1000:,.0f} urls/s")
+
+    def _bench_saves(self, backend, threads, options):
+        # A fresh process as far as boto3 is concerned: no client built yet
+        pallate_storage._shared_resources.clear()
+        # Don't bill this run for collecting the previous run's clients
+        gc.collect()
+        storage = self._storage(backend, options)
+        payload = b'\0' * options['file_size']
+        first_saves = []
+
+        def worker(index):
+            for i in range(options['files']):
+                start = time.perf_counter()
+                storage.save(f'bench/{index}_{i}.bin', ContentFile(payload))
+                if i == 0:
+                    first_saves.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(worker, range(threads)))
+        elapsed = time.perf_counter() - start
+
+        total = threads * options['files']
+        first_saves.sort()
+        self.stdout.write(
+            f"  .save() {threads:>3} threads   {total / elapsed:8.0f} files/s   "
+            f"first save per thread: median {first_saves[len(first_saves) // 2]:7.1f} ms   "
+            f"max {first_saves[-1]:7.1f} ms"
+        )
@@ -0,0 +1,32 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from pallattepartner.pallate.direct_uploads import UPLOAD_KINDS, stale_uploads
+from storages.backends.s3boto3 import S3Boto3Storage
+
+
+class Command(BaseCommand):
+    help = 'Delete direct uploads that were sent to the bucket but never confirmed by a form'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the files that would be deleted',
+        )
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, S3Boto3Storage):
+            raise CommandError('Direct uploads are only used with S3-based storage.')
+
+        self.stdout.write(self.style.WARNING('Looking for unconfirmed direct uploads...'))
+        for kind in UPLOAD_KINDS:
+            deleted = 0
+            for name in stale_uploads(kind):
+                if options['dry_run']:
+                    self.stdout.write(f'  {name}')
+                else:
+                    default_storage.delete(name)
+                deleted += 1
+
+            action = 'found' if options['dry_run'] else 'deleted'
+            self.stdout.write(self.style.SUCCESS(f'✓ {kind}: {deleted} {action}'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from pallattepartner.pallate.images import current_variants, generate_variants
+from pallattepartner.pallate.models import Artwork, Message, Profile
+
+
+# (model, image field, variants field, kind)
+TARGETS = [
+    (Artwork, 'image', 'image_variants', 'artwork'),
+    (Profile, 'avatar', 'avatar_variants', 'avatar'),
+    (Message, 'image', 'image_variants', 'message'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Build the resized WebP/AVIF variants for images uploaded before they existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild variants even when they are already current',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Generating image variants...'))
+        default_avatar = Profile._meta.get_field('avatar').default
+
+        for model, field_name, variants_field, kind in TARGETS:
+            built = failed = 0
+            queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            for obj in queryset.only('pk', field_name, variants_field).iterator(chunk_size=500):
+                fieldfile = getattr(obj, field_name)
+                if fieldfile.name == default_avatar:
+                    continue
+                if not options['force'] and current_variants(fieldfile, getattr(obj, variants_field)):
+                    continue
+                try:
+                    generate_variants(model, obj.pk, field_name, variants_field, kind)
+                    built += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'  {model.__name__} {obj.pk}: {exc}')
+
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ {model.__name__}: {built} built, {failed} failed')
+            )
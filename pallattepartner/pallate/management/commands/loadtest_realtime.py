@@ -0,0 +1,107 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from pallattepartner.pallate.realtime import InMemoryBroker, event_stream, get_broker
+
+
+CHANNEL = 'collaboration:loadtest'
+
+
+class Command(BaseCommand):
+    help = (
+        'Open many Server-Sent Events streams in one event loop (as one ASGI '
+        'worker would), fan events out to all of them and report delivery '
+        'latency and memory per subscriber.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, nargs='+', default=[100, 1_000, 10_000])
+        parser.add_argument('--events', type=int, default=10)
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between published events')
+        parser.add_argument(
+            '--configured-broker',
+            action='store_true',
+            help='Use settings.REALTIME_BROKER instead of a fresh in-memory broker',
+        )
+
+    def handle(self, *args, **options):
+        for count in options['subscribers']:
+            broker = get_broker() if options['configured_broker'] else InMemoryBroker()
+            self.stdout.write(self.style.WARNING(f'{count:,} subscribers, {options["events"]} events...'))
+            result = asyncio.run(self._run(broker, count, options['events'], options['interval']))
+            self.stdout.write(
+                f"  connect {result['connect_ms']:9.1f} ms   "
+                f"{result['kb_per_subscriber']:6.1f} KB/subscriber   "
+                f"delivered {result['delivered']:,}/{result['expected']:,} "
+                f"({result['per_second']:,.0f}/s)"
+            )
+            self.stdout.write(
+                f"  latency median {result['median']:8.2f} ms   p95 {result['p95']:8.2f} ms   "
+                f"max {result['max']:8.2f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS('✓ Load test finished'))
+
+    async def _run(self, broker, count, events, interval):
+        latencies = []
+        done = asyncio.Event()
+        remaining = [count * events]
+
+        async def subscriber():
+            received = 0
+            async for frame in event_stream([CHANNEL], broker=broker):
+                if not frame.startswith('event:'):
+                    continue
+                payload = json.loads(frame.split('data: ', 1)[1])
+                latencies.append((time.perf_counter() - payload['sent']) * 1000)
+                received += 1
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+                if received == events:
+                    return
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(subscriber()) for _ in range(count)]
+        while broker.subscriber_count() < count:
+            await asyncio.sleep(0.01)
+        connect_ms = (time.perf_counter() - start) * 1000
+        per_subscriber = (tracemalloc.get_traced_memory()[0] - baseline) / count
+        tracemalloc.stop()
+
+        # Publish from another thread, like the notification worker or a request thread
+        def publisher():
+            for i in range(events):
+                broker.publish(CHANNEL, {'type': 'chat', 'data': {'id': i, 'sent': time.perf_counter()}})
+                time.sleep(interval)
+
+        thread = threading.Thread(target=publisher)
+        publish_start = time.perf_counter()
+        thread.start()
+        try:
+            await asyncio.wait_for(done.wait(), timeout=60 + events)
+        except asyncio.TimeoutError:
+            pass
+        elapsed = time.perf_counter() - publish_start
+        await asyncio.to_thread(thread.join)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        latencies.sort()
+        return {
+            'connect_ms': connect_ms,
+            'kb_per_subscriber': per_subscriber / 1024,
+            'delivered': len(latencies),
+            'expected': count * events,
+            'per_second': len(latencies) / elapsed,
+            'median': statistics.median(latencies) if latencies else 0,
+            'p95': latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0,
+            'max': latencies[-1] if latencies else 0,
+        }
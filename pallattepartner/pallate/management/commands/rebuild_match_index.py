@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from pallattepartner.pallate.matching import rebuild_index
+from pallattepartner.pallate.models import Profile
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the collaborator-matching inverted index (art types and interests) for every profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of profiles read from the database per round trip',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Rebuilding matching index from profiles...'))
+
+        profiles = (
+            Profile.objects
+            .order_by()
+            .only('id', 'art_type', 'interests')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        total = rebuild_index(profiles, batch_size=options['chunk_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Matching index rebuilt: {total} tokens')
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from pallattepartner.pallate.search import install_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents from existing artworks and profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of rows read from the database per round trip',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Rebuilding search index...'))
+
+        install_search_index()
+        total = rebuild_search_index(batch_size=options['chunk_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Search index rebuilt: {total} documents')
+        )
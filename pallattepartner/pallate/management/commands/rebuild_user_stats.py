@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from pallattepartner.pallate.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the per-user counters (UserStats) from artworks, collaborations, '
+        'favorites and feedback, fixing rows that drifted or are missing'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of users recomputed per round trip',
+        )
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Only create rows for users that have none (fast, run on every deploy)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Reconciling user stats...'))
+
+        checked, written = rebuild_stats(missing_only=options['missing_only'], batch_size=options['chunk_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ User stats reconciled: {written} of {checked} users updated')
+        )
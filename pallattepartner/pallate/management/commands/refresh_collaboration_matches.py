@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from pallattepartner.pallate.models import Collaboration
+from pallattepartner.pallate.suggestions import ACTIVE_STATUSES, refresh_matches
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh suggested matches of active collaborations. By default only '
+        'profiles changed since the last run are rescored.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Regenerate every suggestion from scratch instead of incrementally',
+        )
+        parser.add_argument(
+            '--collaboration',
+            type=int,
+            action='append',
+            dest='collaboration_ids',
+            help='Only refresh this collaboration (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        collaborations = Collaboration.objects.filter(status__in=ACTIVE_STATUSES)
+        if options['collaboration_ids']:
+            collaborations = Collaboration.objects.filter(pk__in=options['collaboration_ids'])
+
+        mode = 'full' if options['full'] else 'incremental'
+        self.stdout.write(self.style.WARNING(f'Refreshing collaboration matches ({mode})...'))
+
+        stats = refresh_matches(collaborations, full=options['full'])
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {stats}'))
+        if stats.collaborations:
+            per_collab = stats.seconds * 1000 / stats.collaborations
+            self.stdout.write(f'  {per_collab:.2f} ms per collaboration')
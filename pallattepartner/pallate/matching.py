@@ -0,0 +1,180 @@
+"""
+Collaborator matching engine.
+
+Every profile is indexed as a set of normalized tokens in ``ProfileToken``
+(an inverted index: token -> profile ids), refreshed when the profile is
+saved. Finding matches then only looks at profiles sharing at least one
+token with the current one, instead of looping over every user.
+
+Tokens are ``art:<art type>`` for the whole lowercased ``art_type`` and
+``interest:<interest>`` for each interest. Art types match when one contains
+the other ("paint" and "oil painting"), so a lookup first picks the matching
+ones from the (short) list of art types in the index, cached when the cache
+is shared by all workers (``FRAGMENT_CACHE``, see caching.py), and then asks
+for their exact tokens. Each candidate's overlap is weighted like the score
+in scoring.py, which makes the capped pool the best-scoring candidates.
+"""
+
+import heapq
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .caching import fragment_cache_enabled
+from .models import Profile, ProfileToken
+from .scoring import ART_TYPE_SCORE, INTEREST_SCORE, art_types_match, interest_set, score_candidates, score_pair
+from .stats import stats_for
+
+# Upper bound on candidates scored in Python for a single lookup
+CANDIDATE_POOL = 500
+
+ART_TYPES_CACHE_KEY = 'pallate:matching:art_types'
+ART_TYPES_CACHE_TIMEOUT = 60 * 10
+
+TOKEN_MAX_LENGTH = ProfileToken._meta.get_field('token').max_length
+
+
+def _token(prefix, value):
+    return f'{prefix}:{value}'[:TOKEN_MAX_LENGTH]
+
+
+def profile_tokens(profile):
+    tokens = {_token('interest', interest) for interest in interest_set(profile)}
+    if profile.art_type:
+        tokens.add(_token('art', profile.art_type.lower()))
+    return tokens
+
+
+def _load_art_types():
+    return [
+        token[len('art:'):]
+        for token in (
+            ProfileToken.objects
+            .filter(token__startswith='art:')
+            .order_by()
+            .values_list('token', flat=True)
+            .distinct()
+        )
+    ]
+
+
+def indexed_art_types():
+    """Distinct lowercased art types in the index, served from the cache if it is shared"""
+    if not fragment_cache_enabled():
+        return _load_art_types()
+    art_types = cache.get(ART_TYPES_CACHE_KEY)
+    if art_types is None:
+        art_types = _load_art_types()
+        cache.set(ART_TYPES_CACHE_KEY, art_types, ART_TYPES_CACHE_TIMEOUT)
+    return art_types
+
+
+def invalidate_art_types():
+    transaction.on_commit(lambda: cache.delete(ART_TYPES_CACHE_KEY))
+
+
+def index_profile(profile):
+    """Bring the profile's rows in the inverted index up to date"""
+    tokens = profile_tokens(profile)
+    existing = set(
+        ProfileToken.objects.filter(profile=profile).values_list('token', flat=True)
+    )
+    if tokens == existing:
+        return
+
+    with transaction.atomic():
+        stale = existing - tokens
+        if stale:
+            ProfileToken.objects.filter(profile=profile, token__in=stale).delete()
+        ProfileToken.objects.bulk_create(
+            [ProfileToken(profile=profile, token=token) for token in tokens - existing],
+            ignore_conflicts=True,
+        )
+    if any(token.startswith('art:') for token in tokens - existing):
+        invalidate_art_types()
+
+
+def rebuild_index(profiles, batch_size=1000):
+    """Re-index every given profile from scratch. Returns the number of tokens written."""
+    written = 0
+    with transaction.atomic():
+        ProfileToken.objects.all().delete()
+        batch = []
+        for profile in profiles:
+            batch.extend(ProfileToken(profile=profile, token=token) for token in profile_tokens(profile))
+            if len(batch) >= batch_size:
+                ProfileToken.objects.bulk_create(batch, ignore_conflicts=True)
+                written += len(batch)
+                batch = []
+        ProfileToken.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    invalidate_art_types()
+    return written
+
+
+def candidate_profiles(profile, exclude_user_ids=(), pool=CANDIDATE_POOL):
+    """
+    Profiles with a matching art type or a common interest, with their stats.
+
+    The pool is capped at ``pool`` profiles, preferring the highest scores
+    (art type and interest tokens weigh what they earn in scoring.py). Runs
+    two queries whatever the number of users, plus one when the list of art
+    types isn't cached.
+    """
+    interest_tokens = {token for token in profile_tokens(profile) if token.startswith('interest:')}
+    art_tokens = set()
+    if profile.art_type:
+        art_tokens = {
+            _token('art', art_type) for art_type in indexed_art_types()
+            if art_types_match(profile.art_type, art_type)
+        }
+    if not interest_tokens and not art_tokens:
+        return []
+
+    shared = (
+        ProfileToken.objects
+        .filter(token__in=interest_tokens | art_tokens)
+        .exclude(profile=profile)
+        .exclude(profile__user_id__in=exclude_user_ids)
+        .values('profile')
+        .annotate(weight=(
+            INTEREST_SCORE * Count('id', filter=Q(token__in=interest_tokens))
+            + ART_TYPE_SCORE * Count('id', filter=Q(token__in=art_tokens))
+        ))
+        .order_by('-weight', 'profile')
+        .values_list('profile', flat=True)[:pool]
+    )
+    return list(
+        Profile.objects
+        .filter(pk__in=list(shared))
+        .select_related('user__stats')
+    )
+
+
+def find_matches(profile, limit=50, exclude_user_ids=()):
+    """
+    Top ``limit`` collaborator suggestions for ``profile``, best first.
+
+    Each match is a dict with user, profile, match_score, match_reasons and
+    artworks_count, as used by the find_collaborators template.
+    """
+    candidates = candidate_profiles(profile, exclude_user_ids=exclude_user_ids)
+    scores = score_candidates(profile, candidates)
+    ranked = heapq.nlargest(
+        limit,
+        ((score, candidate) for score, candidate in zip(scores, candidates) if score > 0),
+        key=lambda pair: pair[0],
+    )
+
+    # Reasons are only spelled out for the matches actually shown
+    return [
+        {
+            'user': candidate.user,
+            'profile': candidate,
+            'match_score': score,
+            'match_reasons': score_pair(profile, candidate)[1],
+            'artworks_count': stats_for(candidate.user).artwork_count,
+        }
+        for score, candidate in ranked
+    ]
@@ -0,0 +1,76 @@
+"""
+Public URLs for stored media, computed from the stored name alone.
+
+``FieldFile.url`` asks the storage every time; depending on the backend
+that means path joining and quoting (FileSystemStorage) or request signing
+(S3 without a public domain). A grid of cards asks for the same few names
+over and over, so ``media_url`` memoizes the URL per (storage, name) for
+backends whose URLs are public and never expire: the local file system and
+the S3/Supabase backends with ``custom_domain`` and no query string auth.
+Signed URLs are still built per call.
+
+A version token can be added as ``?v=``: ``MEDIA_URL_VERSION`` busts CDN
+caches for everything, and derivatives that are rebuilt under the same name
+(images.py variants) pass their own.
+"""
+
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.functional import LazyObject, empty
+from storages.backends.s3boto3 import S3Boto3Storage
+
+URL_CACHE_SIZE = 16384
+
+
+def is_public(storage):
+    """Whether ``storage`` hands out stable, unsigned URLs"""
+    if isinstance(storage, FileSystemStorage):
+        return True
+    if isinstance(storage, S3Boto3Storage):
+        return bool(storage.custom_domain) and not (storage.querystring_auth and storage.cloudfront_signer)
+    return False
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _public_url(storage, name):
+    return storage.url(name)
+
+
+def clear_cache():
+    _public_url.cache_clear()
+
+
+@receiver(setting_changed)
+def _clear_on_setting_change(setting, **kwargs):
+    if setting in ('STORAGES', 'MEDIA_URL', 'MEDIA_ROOT', 'MEDIA_URL_VERSION'):
+        clear_cache()
+
+
+def version_token(version=None):
+    parts = [str(part) for part in (getattr(settings, 'MEDIA_URL_VERSION', ''), version) if part]
+    return '-'.join(parts)
+
+
+def media_url(file, storage=None, version=None):
+    """URL of a FieldFile, or of ``file`` as a name in ``storage``"""
+    if not file:
+        return ''
+    if storage is None:
+        storage, name = file.storage, file.name
+    else:
+        name = file
+    # default_storage is a lazy wrapper; key the cache on what it wraps
+    if isinstance(storage, LazyObject):
+        if storage._wrapped is empty:
+            storage._setup()
+        storage = storage._wrapped
+    url = _public_url(storage, name) if is_public(storage) else storage.url(name)
+
+    token = version_token(version)
+    if token:
+        url = f"{url}{'&' if '?' in url else '?'}v={token}"
+    return url
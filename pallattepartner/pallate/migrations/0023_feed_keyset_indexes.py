@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0022_merge_20251204_0358'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['-created_at', '-id'], name='artwork_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collaboration',
+            index=models.Index(fields=['-created_at', '-id'], name='collaboration_feed_idx'),
+        ),
+    ]
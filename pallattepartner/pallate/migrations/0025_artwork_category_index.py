@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0024_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtworkCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('artwork', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_links', to='pallate.artwork')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artwork_links', to='pallate.category')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='artwork',
+            name='category_tags',
+            field=models.ManyToManyField(blank=True, related_name='artworks', through='pallate.ArtworkCategory', to='pallate.category'),
+        ),
+        migrations.AddIndex(
+            model_name='artworkcategory',
+            index=models.Index(fields=['category', 'artwork'], name='artworkcategory_lookup_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='artworkcategory',
+            unique_together={('artwork', 'category')},
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:33
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_favorite_count(apps, schema_editor):
+    Artwork = apps.get_model('pallate', 'Artwork')
+    Favorite = apps.get_model('pallate', 'Favorite')
+    favorites = (
+        Favorite.objects
+        .filter(artwork=OuterRef('pk'))
+        .order_by()
+        .values('artwork')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Artwork.objects.update(favorite_count=Coalesce(Subquery(favorites), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0025_artwork_category_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artwork',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0, help_text='Denormalized number of favorites (updated by toggle_favorite)'),
+        ),
+        migrations.RunPython(backfill_favorite_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0026_artwork_favorite_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(help_text="'art:<word>' or 'interest:<interest>'", max_length=110)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_tokens', to='pallate.profile')),
+            ],
+            options={
+                'unique_together': {('token', 'profile')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0027_profile_match_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collaboration',
+            name='matches_refreshed_at',
+            field=models.DateTimeField(blank=True, help_text='Last time suggested matches were generated', null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0030_notification_dispatch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['collaboration', 'timestamp', 'id'], name='message_timeline_idx'),
+        ),
+    ]
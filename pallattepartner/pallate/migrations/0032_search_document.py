@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:52
+
+from django.db import migrations, models
+
+
+def backfill_search_documents(apps, schema_editor):
+    Artwork = apps.get_model('pallate', 'Artwork')
+    Profile = apps.get_model('pallate', 'Profile')
+    SearchDocument = apps.get_model('pallate', 'SearchDocument')
+    documents = [
+        SearchDocument(
+            kind='artwork',
+            object_id=artwork_id,
+            title=(title or '')[:255],
+            body=' '.join(filter(None, [description, categories])),
+        )
+        for artwork_id, title, description, categories
+        in Artwork.objects.values_list('id', 'title', 'description', 'categories').iterator()
+    ]
+    documents += [
+        SearchDocument(
+            kind='artist',
+            object_id=user_id,
+            title=username,
+            body=' '.join(filter(None, [art_type, bio])),
+        )
+        for user_id, username, art_type, bio
+        in Profile.objects.values_list('user_id', 'user__username', 'art_type', 'bio').iterator()
+    ]
+    SearchDocument.objects.bulk_create(documents, batch_size=2000)
+
+
+def create_search_index(apps, schema_editor):
+    from pallattepartner.pallate.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS searchdocument_fts_idx')
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS pallate_searchdocument_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0031_message_timeline_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('artwork', 'Artwork'), ('artist', 'Artist')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField(help_text='Artwork id, or user id for artists')),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('body', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0033_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='artwork_user_recent_idx'),
+        ),
+        # Keyset pages of Discover Artists (artists.py) walk auth_user by
+        # (date_joined, id); auth's own migrations don't index date_joined
+        migrations.RunSQL(
+            'CREATE INDEX pallate_user_joined_idx ON auth_user (date_joined DESC, id DESC)',
+            'DROP INDEX pallate_user_joined_idx',
+        ),
+    ]
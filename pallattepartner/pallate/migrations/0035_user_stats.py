@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('pallate', '0034_artwork_user_recent_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('artwork_count', models.PositiveIntegerField(default=0)),
+                ('collab_count', models.PositiveIntegerField(default=0, help_text='Collaborations owned')),
+                ('favorites_received', models.PositiveIntegerField(default=0, help_text="Favorites on the user's artworks")),
+                ('rating_count', models.PositiveIntegerField(default=0, help_text="Feedback on the user's collaborations")),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'user stats',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0035_user_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='collaborationfeedback',
+            index=models.Index(fields=['collaboration', '-created_at', '-id'], name='feedback_recent_idx'),
+        ),
+    ]
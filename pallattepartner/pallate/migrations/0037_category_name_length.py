@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0036_feedback_recent_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='key',
+            field=models.CharField(help_text='Lowercased name used for lookups', max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(max_length=255),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:50
+
+from django.db import migrations, models
+
+
+def reindex_profiles(apps, schema_editor):
+    # Art types are now one token for the whole value instead of one per
+    # word; rebuild every profile's tokens (same rules as matching.py)
+    Profile = apps.get_model('pallate', 'Profile')
+    ProfileToken = apps.get_model('pallate', 'ProfileToken')
+    ProfileToken.objects.all().delete()
+    tokens = []
+    for profile_id, art_type, interests in Profile.objects.values_list('id', 'art_type', 'interests').iterator():
+        values = {f'interest:{interest.strip().lower()}' for interest in (interests or '').split(',') if interest.strip()}
+        if art_type:
+            values.add(f'art:{art_type.lower()}')
+        tokens.extend(ProfileToken(profile_id=profile_id, token=value[:110]) for value in values)
+    ProfileToken.objects.bulk_create(tokens, batch_size=2000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0037_category_name_length'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profiletoken',
+            name='token',
+            field=models.CharField(help_text="'art:<art type>' or 'interest:<interest>'", max_length=110),
+        ),
+        migrations.RunPython(reindex_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:12
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill_category_index(apps, schema_editor):
+    # Fill the category index (0024/0025) from the existing
+    # Artwork.categories strings, same rules as categories.py. Runs after
+    # 0037 so that names up to 255 characters fit.
+    Artwork = apps.get_model('pallate', 'Artwork')
+    Category = apps.get_model('pallate', 'Category')
+    ArtworkCategory = apps.get_model('pallate', 'ArtworkCategory')
+    ArtworkCategory.objects.all().delete()
+    category_ids = dict(Category.objects.values_list('key', 'id'))
+    links = []
+    for artwork_id, value in Artwork.objects.values_list('id', 'categories').iterator():
+        names = {}
+        for name in (value or '').split(','):
+            name = name.strip()
+            if name:
+                names.setdefault(name.lower(), name)
+        for key, name in names.items():
+            if key not in category_ids:
+                category_ids[key] = Category.objects.create(key=key, name=name).id
+            links.append(ArtworkCategory(artwork_id=artwork_id, category_id=category_ids[key]))
+    ArtworkCategory.objects.bulk_create(links, batch_size=2000, ignore_conflicts=True)
+
+    counts = dict(
+        ArtworkCategory.objects.order_by().values_list('category').annotate(total=Count('artwork'))
+    )
+    categories = list(Category.objects.all())
+    for category in categories:
+        category.artwork_count = counts.get(category.id, 0)
+    Category.objects.bulk_update(categories, ['artwork_count'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0038_match_index_art_types'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_category_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:20
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def _total(queryset, owner, aggregate):
+    return Coalesce(Subquery(
+        queryset
+        .filter(**{owner: OuterRef('user')})
+        .order_by()
+        .values(owner)
+        .annotate(total=aggregate)
+        .values('total')
+    ), 0)
+
+
+def backfill_user_stats(apps, schema_editor):
+    # 0035 created the table empty and adjust_stats leaves missing rows
+    # alone: give every existing user a row computed from the source tables
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserStats = apps.get_model('pallate', 'UserStats')
+    Artwork = apps.get_model('pallate', 'Artwork')
+    Collaboration = apps.get_model('pallate', 'Collaboration')
+    Favorite = apps.get_model('pallate', 'Favorite')
+    CollaborationFeedback = apps.get_model('pallate', 'CollaborationFeedback')
+
+    missing = User.objects.filter(stats__isnull=True).values_list('pk', flat=True).iterator()
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=user_id) for user_id in missing), batch_size=2000, ignore_conflicts=True,
+    )
+    UserStats.objects.update(
+        artwork_count=_total(Artwork.objects.all(), 'user', Count('pk')),
+        collab_count=_total(Collaboration.objects.all(), 'owner', Count('pk')),
+        favorites_received=_total(Favorite.objects.all(), 'artwork__user', Count('pk')),
+        rating_count=_total(CollaborationFeedback.objects.all(), 'collaboration__owner', Count('pk')),
+        rating_sum=_total(CollaborationFeedback.objects.all(), 'collaboration__owner', Sum('rating')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pallate', '0039_backfill_category_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.conf import settings
 
+from .scoring import score_pair
+
 
 class Palette(models.Model):
 	"""A minimal model representing a color palette shared by an artist."""
@@ -16,6 +18,8 @@ class Palette(models.Model):
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     avatar = models.ImageField(upload_to='avatars/', default='avatars/default.png')
+    # Resized WebP/AVIF copies of the avatar (see images.py)
+    avatar_variants = models.JSONField(default=dict, blank=True)
     art_type = models.CharField(max_length=100, blank=True, default='')
     portfolio = models.URLField(blank=True, null=True)
     bio = models.TextField(blank=True, default='')
@@ -32,8 +36,25 @@ class Profile(models.Model):
     security_question = models.CharField(max_length=255, blank=True, default='', help_text='Security question for password recovery')
     security_answer = models.CharField(max_length=255, blank=True, default='', help_text='Answer to security question (stored hashed)')
 
+    # Lets match generation rescore only the profiles changed since its last run
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Denormalized number of unread notifications (see notifications.py)
+    unread_notifications = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"{self.user.username}'s Profile"
+
+    def save(self, *args, **kwargs):
+        # The unread counter only changes through F() updates (notifications.py)
+        # and the variants through the image job (images.py); never write back
+        # the possibly stale copies held by this instance
+        if not self._state.adding and self.pk and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('unread_notifications', 'avatar_variants')
+            ]
+        super().save(*args, **kwargs)
     
     def get_interests_list(self):
         """Returns list of interests from comma-separated string"""
@@ -46,17 +67,21 @@ class Profile(models.Model):
         if not other_profile:
             return False
         
-        # Check art_type match
-        art_type_match = self.art_type and other_profile.art_type and \
-                        self.art_type.lower() in other_profile.art_type.lower() or \
-                        other_profile.art_type.lower() in self.art_type.lower()
-        
-        # Check interests overlap
-        self_interests = set(i.lower() for i in self.get_interests_list())
-        other_interests = set(i.lower() for i in other_profile.get_interests_list())
-        interests_match = bool(self_interests & other_interests)
-        
-        return art_type_match or interests_match
+        # Same rules as the collaborator scoring (scoring.py)
+        return score_pair(self, other_profile)[0] > 0
+
+
+class ProfileToken(models.Model):
+    """Inverted index entry: the normalized art type or one interest of a profile (see matching.py)"""
+    token = models.CharField(max_length=110, help_text="'art:<art type>' or 'interest:<interest>'")
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='match_tokens')
+
+    class Meta:
+        # (token, profile) doubles as the lookup index: token -> profile ids
+        unique_together = ('token', 'profile')
+
+    def __str__(self):
+        return f"{self.token} -> {self.profile_id}"
     
 class Collaboration(models.Model):
     STATUS_CHOICES = [
@@ -77,6 +102,13 @@ class Collaboration(models.Model):
     budget = models.CharField(max_length=100, blank=True, help_text='Optional budget info')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    matches_refreshed_at = models.DateTimeField(blank=True, null=True, help_text='Last time suggested matches were generated')
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the dashboard feed (see feeds.py)
+            models.Index(fields=['-created_at', '-id'], name='collaboration_feed_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -213,9 +245,16 @@ class Message(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     text = models.TextField(blank=True)
     image = models.ImageField(upload_to="chat_images/", blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True)
     reaction = models.CharField(max_length=10, blank=True)  # e.g. "❤️", "👍"
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Latest page, "load older" keyset pages and since-id polls (see chat.py)
+            models.Index(fields=['collaboration', 'timestamp', 'id'], name='message_timeline_idx'),
+        ]
+
     def __str__(self):
         base = f"{self.sender.username}: "
         if self.text:
@@ -225,28 +264,86 @@ class Message(models.Model):
         return base + "[empty]"
 
 class Notification(models.Model):
+    TYPE_CHOICES = [
+        ('message', 'Message'),
+        ('comment', 'Comment'),
+        ('collab', 'Collaboration'),
+        ('feedback', 'Feedback'),
+        ('system', 'System'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='sent_notifications')
+    notification_type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='system')
     text = models.CharField(max_length=255)
+    target_url = models.CharField(max_length=255, blank=True, default='')
+    # Unread notifications sharing a group key are coalesced (see dispatch.py)
+    group_key = models.CharField(max_length=100, blank=True, default='')
+    event_count = models.PositiveIntegerField(default=1, help_text='Number of events coalesced into this notification')
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Inbox listing and unread counting without touching the table rows
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notification_inbox_idx'),
+            # Finding the unread notification an event coalesces into
+            models.Index(fields=['user', 'group_key', 'is_read'], name='notification_group_idx'),
+        ]
+
     def __str__(self):
         return f"To {self.user.username}: {self.text}"
 
 
+class Category(models.Model):
+    """Artwork category with a denormalized artwork count (kept current by signals)"""
+    # As long as Artwork.categories, so any single name in it fits
+    name = models.CharField(max_length=255)
+    key = models.CharField(max_length=255, unique=True, help_text='Lowercased name used for lookups')
+    artwork_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'categories'
+
+    def __str__(self):
+        return f"{self.name} ({self.artwork_count})"
+
+
 class Artwork(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='artworks')
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='artworks/')
+    # Resized WebP/AVIF copies of the image for srcset (see images.py)
+    image_variants = models.JSONField(default=dict, blank=True)
     categories = models.CharField(max_length=255, blank=True, null=True, help_text='Comma-separated categories')
+    # Indexed copy of `categories`, kept in sync by signals (see categories.py)
+    category_tags = models.ManyToManyField(Category, through='ArtworkCategory', related_name='artworks', blank=True)
+    favorite_count = models.PositiveIntegerField(default=0, help_text='Denormalized number of favorites (updated by toggle_favorite)')
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.title} by {self.user.username}"
 
+    def save(self, *args, **kwargs):
+        # image_variants is written by the image job (images.py), keep full
+        # saves of an older copy from erasing it
+        if not self._state.adding and self.pk and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'image_variants'
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the dashboard feed (see feeds.py)
+            models.Index(fields=['-created_at', '-id'], name='artwork_feed_idx'),
+            # Latest artworks per artist on Discover Artists (see artists.py)
+            models.Index(fields=['user', '-created_at', '-id'], name='artwork_user_recent_idx'),
+        ]
         
     def get_categories_list(self):
         """Returns list of categories from comma-separated string"""
@@ -255,6 +352,41 @@ class Artwork(models.Model):
         return []
 
 
+class ArtworkCategory(models.Model):
+    """Membership of an artwork in a category"""
+    artwork = models.ForeignKey(Artwork, on_delete=models.CASCADE, related_name='category_links')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='artwork_links')
+
+    class Meta:
+        unique_together = ('artwork', 'category')
+        indexes = [
+            # Category filter: all artworks in a category
+            models.Index(fields=['category', 'artwork'], name='artworkcategory_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.artwork.title} in {self.category.name}"
+
+
+class SearchDocument(models.Model):
+    """Searchable text of an artwork or an artist, kept current by signals (see search.py)"""
+    KIND_CHOICES = [
+        ('artwork', 'Artwork'),
+        ('artist', 'Artist'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField(help_text='Artwork id, or user id for artists')
+    title = models.CharField(max_length=255, blank=True, default='')
+    body = models.TextField(blank=True, default='')
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}: {self.title}"
+
+
 class ArtworkComment(models.Model):
     artwork = models.ForeignKey(
         Artwork,
@@ -305,6 +437,10 @@ class CollaborationFeedback(models.Model):
     class Meta:
         unique_together = ('collaboration', 'reviewer')
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pages of a collaboration's reviews (see ratings.py)
+            models.Index(fields=['collaboration', '-created_at', '-id'], name='feedback_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.reviewer.username} rated '{self.collaboration.title}' - {self.rating}/5"
@@ -324,4 +460,25 @@ class CollaborationMatch(models.Model):
         ordering = ['-match_score', '-created_at']
     
     def __str__(self):
-        return f"Match: {self.suggested_user.username} for '{self.collaboration.title}' (score: {self.match_score})"
\ No newline at end of file
+        return f"Match: {self.suggested_user.username} for '{self.collaboration.title}' (score: {self.match_score})"
+
+class UserStats(models.Model):
+    """Per-user counters shown on listings, kept in step by signals (see stats.py)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    artwork_count = models.PositiveIntegerField(default=0)
+    collab_count = models.PositiveIntegerField(default=0, help_text='Collaborations owned')
+    favorites_received = models.PositiveIntegerField(default=0, help_text='Favorites on the user\'s artworks')
+    rating_count = models.PositiveIntegerField(default=0, help_text='Feedback on the user\'s collaborations')
+    rating_sum = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'user stats'
+
+    def __str__(self):
+        return f"Stats for {self.user.username}"
+
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 1)
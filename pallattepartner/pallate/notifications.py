@@ -0,0 +1,117 @@
+"""
+Notification summary shown in the header of every page, and read state.
+
+The unread count is denormalized on ``Profile.unread_notifications``: the
+Notification signals (see signals.py) bump it on create and delete, and
+``mark_read`` lowers it by the number of rows its single UPDATE touched.
+Notifications should be marked read through ``mark_read`` rather than
+``save()`` so the counter stays in step.
+
+The latest notifications and the counter come from a single query and are
+cached per user. The cached summary is dropped whenever one of the user's
+notifications is created, marked read or deleted, and it is memoized on the
+request so the context processor and views share one cache lookup. That
+only reaches the other workers with a shared cache (``FRAGMENT_CACHE``, see
+caching.py); otherwise every request runs the query.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .caching import fragment_cache_enabled
+from .models import Notification, Profile
+
+
+SUMMARY_SIZE = 15
+SUMMARY_CACHE_TIMEOUT = 60 * 10
+
+_REQUEST_ATTR = '_notification_summary'
+
+
+def _cache_key(user_id):
+    return f'pallate:notifications:{user_id}'
+
+
+def _load_summary(user_id):
+    unread = Profile.objects.filter(user_id=OuterRef('user_id')).values('unread_notifications')[:1]
+    latest = list(
+        Notification.objects
+        .filter(user_id=user_id)
+        .select_related('actor')
+        .annotate(unread_total=Coalesce(Subquery(unread, output_field=IntegerField()), 0))
+        .order_by('-created_at')[:SUMMARY_SIZE]
+    )
+    # No rows at all means nothing is unread either
+    unread_count = latest[0].unread_total if latest else 0
+    return {'notifications': latest, 'unread_count': unread_count}
+
+
+def get_notification_summary(user):
+    """
+    Returns {'notifications': [...latest SUMMARY_SIZE...], 'unread_count': n}.
+
+    Served from the cache; a miss costs one query.
+    """
+    if not fragment_cache_enabled():
+        return _load_summary(user.pk)
+    key = _cache_key(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        summary = _load_summary(user.pk)
+        cache.set(key, summary, SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def request_notification_summary(request):
+    """The summary for the request's user, looked up at most once per request"""
+    summary = getattr(request, _REQUEST_ATTR, None)
+    if summary is None:
+        summary = get_notification_summary(request.user)
+        setattr(request, _REQUEST_ATTR, summary)
+    return summary
+
+
+def invalidate_notification_summary(user_id):
+    """Drop the cached summary once the current transaction commits"""
+    transaction.on_commit(lambda: cache.delete(_cache_key(user_id)))
+
+
+def adjust_unread_count(user_id, delta):
+    """Add ``delta`` (possibly negative) to the user's unread counter, never below 0"""
+    Profile.objects.filter(user_id=user_id).update(
+        unread_notifications=Greatest(F('unread_notifications') + delta, 0)
+    )
+
+
+def increment_unread_counts(counts):
+    """Add ``{user_id: increment}`` to the unread counters, one UPDATE per distinct increment"""
+    by_increment = {}
+    for user_id, increment in counts.items():
+        by_increment.setdefault(increment, []).append(user_id)
+    for increment, user_ids in by_increment.items():
+        Profile.objects.filter(user_id__in=user_ids).update(
+            unread_notifications=F('unread_notifications') + increment
+        )
+
+
+def mark_read(user, notification_ids=None):
+    """
+    Mark the user's unread notifications as read in one UPDATE.
+
+    ``notification_ids`` limits it to those notifications (other users' ids
+    are ignored); ``None`` marks everything. Returns the number marked.
+    """
+    unread = Notification.objects.filter(user=user, is_read=False)
+    if notification_ids is not None:
+        unread = unread.filter(pk__in=notification_ids)
+
+    with transaction.atomic():
+        marked = unread.update(is_read=True)
+        if marked:
+            # Relative even when marking everything: a notification created
+            # right after the UPDATE must stay counted
+            adjust_unread_count(user.pk, -marked)
+            invalidate_notification_summary(user.pk)
+    return marked
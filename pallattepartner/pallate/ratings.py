@@ -0,0 +1,91 @@
+"""
+Rating summaries for collaborations and their owners.
+
+The feedback page shows the average rating, the number of reviews and how
+they spread over 1-5 stars. All of it comes from a single aggregate query
+(``Avg``, ``Count`` and one filtered ``Count`` per star) that is cached per
+collaboration and dropped by the CollaborationFeedback signals (see
+signals.py) when a review is added, changed or deleted. Only with a cache
+shared by all workers (``FRAGMENT_CACHE``, see caching.py), though: with a
+per-process one the other workers would keep the old summary.
+
+The owner's reputation across all of their collaborations is read from the
+``rating_count``/``rating_sum`` counters on ``UserStats`` (stats.py).
+
+The reviews themselves are listed newest first, one keyset page at a time
+(feeds.py), so a popular collaboration doesn't load every row.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+
+from .caching import fragment_cache_enabled
+from .feeds import keyset_page, parse_page_size
+from .models import CollaborationFeedback
+
+FEEDBACK_PAGE_SIZE = 10
+SUMMARY_CACHE_TIMEOUT = 60 * 10
+
+RATINGS = [value for value, _ in CollaborationFeedback.RATING_CHOICES]
+
+
+def _cache_key(collaboration_id):
+    return f'pallate:ratings:{collaboration_id}'
+
+
+def _load_summary(collaboration_id):
+    aggregates = CollaborationFeedback.objects.filter(collaboration_id=collaboration_id).aggregate(
+        count=Count('pk'),
+        average=Avg('rating'),
+        **{f'stars_{rating}': Count('pk', filter=Q(rating=rating)) for rating in RATINGS},
+    )
+    count = aggregates['count']
+    return {
+        'count': count,
+        'average': round(aggregates['average'] or 0, 1),
+        # Highest rating first, as the bars are drawn
+        'histogram': [
+            {
+                'rating': rating,
+                'count': aggregates[f'stars_{rating}'],
+                'percent': round(100 * aggregates[f'stars_{rating}'] / count) if count else 0,
+            }
+            for rating in reversed(RATINGS)
+        ],
+    }
+
+
+def rating_summary(collaboration_id):
+    """
+    Returns {'count': n, 'average': 4.2, 'histogram': [{'rating', 'count', 'percent'}, ...]}.
+
+    Served from the cache; a miss costs one query.
+    """
+    if not fragment_cache_enabled():
+        return _load_summary(collaboration_id)
+    key = _cache_key(collaboration_id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = _load_summary(collaboration_id)
+        cache.set(key, summary, SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_rating_summary(collaboration_id):
+    """Drop the cached summary once the current transaction commits"""
+    transaction.on_commit(lambda: cache.delete(_cache_key(collaboration_id)))
+
+
+def feedback_page(collaboration_id, cursor=None, page_size=None):
+    """
+    Returns (feedbacks, next_cursor) for one page of a collaboration's
+    reviews, newest first. Raises ``feeds.InvalidCursor`` for a bad cursor.
+    """
+    queryset = (
+        CollaborationFeedback.objects
+        .filter(collaboration_id=collaboration_id)
+        .select_related('reviewer__profile')
+    )
+    page_size = parse_page_size(page_size, default=FEEDBACK_PAGE_SIZE)
+    return keyset_page(queryset, cursor=cursor, page_size=page_size)
@@ -0,0 +1,221 @@
+"""
+Real-time push of chat messages and notifications.
+
+A small publish/subscribe layer. Signals and the notification worker
+``publish()`` events once their transaction commits, and the
+``realtime_events`` view streams them to connected browsers as Server-Sent
+Events. Channels are ``user:<id>`` (notifications) and
+``collaboration:<id>`` (chat messages). Events carry ids, not content:
+clients fetch the rows themselves (chat.js polls right away), so the
+rendering and permission checks stay in the regular views.
+
+Streams need the ASGI app (config/asgi.py), where each open stream is a
+coroutine rather than a worker thread. Under WSGI the view answers
+204, which tells EventSource to stop reconnecting, and clients fall back to
+polling.
+
+The broker comes from ``settings.REALTIME_BROKER``:
+
+* ``InMemoryBroker`` (default) delivers inside the current process. That is
+  enough for a single worker, tests and ``manage.py loadtest_realtime``;
+* ``RedisBroker`` relays through Redis pub/sub, so every worker process
+  sees every event (``REALTIME_REDIS_URL``, see settings.py).
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Comment line sent when a stream has been idle this long, keeps proxies from closing it
+HEARTBEAT_SECONDS = 15
+
+# Events buffered per subscriber; the oldest are dropped for slow readers
+QUEUE_SIZE = 100
+
+DEFAULT_BROKER = {'BACKEND': 'pallattepartner.pallate.realtime.InMemoryBroker'}
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def collaboration_channel(collaboration_id):
+    return f'collaboration:{collaboration_id}'
+
+
+class Subscription:
+    """Events of some channels, buffered for one consumer on its event loop"""
+
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def put(self, event):
+        """Queue ``event``; must run on the subscription's loop"""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+def _put_all(subscriptions, event):
+    for subscription in subscriptions:
+        subscription.put(event)
+
+
+class InMemoryBroker:
+    """Delivers events to subscribers of the same process"""
+
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        """Deliver ``event`` to the channel's subscribers. Returns how many there were."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        if not subscribers:
+            return 0
+
+        # Encode once for every stream, and wake each event loop once per event
+        event = dict(event, frame=format_event(event))
+        by_loop = defaultdict(list)
+        for subscription in subscribers:
+            by_loop[subscription.loop].append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_put_all, subscriptions, event)
+            except RuntimeError:
+                # Event loop already closed, its streams are going away
+                pass
+        return len(subscribers)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subs in self._subscribers.values() for s in subs})
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                for channel in channels:
+                    subscribers = self._subscribers.get(channel)
+                    if subscribers is not None:
+                        subscribers.discard(subscription)
+                        if not subscribers:
+                            del self._subscribers[channel]
+
+
+class RedisBroker:
+    """
+    Relays events through Redis pub/sub.
+
+    Publishing is a plain PUBLISH. Each worker process keeps a single
+    pattern subscription on its event loop and hands what it receives to a
+    local InMemoryBroker, so the number of Redis connections does not grow
+    with the number of open streams.
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='pallate:realtime:', queue_size=QUEUE_SIZE):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RedisBroker needs the 'redis' package (pip install redis)")
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._local = InMemoryBroker(queue_size)
+        self._listener = None
+
+    def publish(self, channel, event):
+        return self._client.publish(self.prefix + channel, json.dumps(event, cls=DjangoJSONEncoder))
+
+    def subscriber_count(self):
+        return self._local.subscriber_count()
+
+    def subscribe(self, channels):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return self._local.subscribe(channels)
+
+    async def _listen(self):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(self.prefix + '*')
+        try:
+            async for message in pubsub.listen():
+                if message['type'] != 'pmessage':
+                    continue
+                channel = message['channel'].decode()[len(self.prefix):]
+                self._local.publish(channel, json.loads(message['data']))
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            config = getattr(settings, 'REALTIME_BROKER', DEFAULT_BROKER)
+            _broker = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+        return _broker
+
+
+def publish(channel, event_type, data):
+    """Publish an event once the current transaction commits"""
+    event = {'type': event_type, 'data': data}
+
+    def send():
+        try:
+            get_broker().publish(channel, event)
+        except Exception:
+            logger.exception("Publishing %s to %s failed", event_type, channel)
+
+    transaction.on_commit(send)
+
+
+def format_event(event):
+    """One Server-Sent Events frame"""
+    data = json.dumps(event['data'], cls=DjangoJSONEncoder)
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+
+async def event_stream(channels, heartbeat=HEARTBEAT_SECONDS, broker=None):
+    """Server-Sent Events frames for everything published on ``channels``"""
+    broker = broker or get_broker()
+    async with broker.subscribe(channels) as subscription:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event = await subscription.get(timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield event.get('frame') or format_event(event)
@@ -0,0 +1,106 @@
+"""
+Collaborator scoring rules, shared by every place that compares profiles.
+
+A candidate earns ``ART_TYPE_SCORE`` when one art type contains the other
+(case-insensitive) and ``INTEREST_SCORE`` per interest in common.
+
+For scoring one profile against many candidates, interests are encoded as
+integer bitsets over an interest vocabulary: common interests are then a
+single ``&`` and ``int.bit_count()`` per candidate instead of building and
+intersecting two sets for every pair.
+"""
+
+ART_TYPE_SCORE = 50
+INTEREST_SCORE = 20
+
+
+def interest_set(profile):
+    """Lowercased interests of a profile"""
+    return {interest.lower() for interest in profile.get_interests_list()}
+
+
+def art_types_match(art_type, other_art_type):
+    """True when both art types are set and one contains the other"""
+    if not art_type or not other_art_type:
+        return False
+    art_type, other_art_type = art_type.lower(), other_art_type.lower()
+    return art_type in other_art_type or other_art_type in art_type
+
+
+def score_pair(profile, candidate):
+    """Returns (score, reasons) for ``candidate`` as a collaborator of ``profile``"""
+    score = 0
+    reasons = []
+
+    if art_types_match(profile.art_type, candidate.art_type):
+        score += ART_TYPE_SCORE
+        reasons.append(f"Matching art type: {candidate.art_type}")
+
+    common_interests = interest_set(profile) & interest_set(candidate)
+    if common_interests:
+        score += len(common_interests) * INTEREST_SCORE
+        reasons.append(f"Common interests: {', '.join(sorted(common_interests))}")
+
+    return score, reasons
+
+
+class InterestVocabulary:
+    """Assigns each distinct interest a bit position"""
+
+    def __init__(self):
+        self._bits = {}
+
+    def __len__(self):
+        return len(self._bits)
+
+    def encode(self, interests):
+        """Bitset of the given lowercased interests, growing the vocabulary as needed"""
+        mask = 0
+        for interest in interests:
+            bit = self._bits.get(interest)
+            if bit is None:
+                bit = self._bits[interest] = len(self._bits)
+            mask |= 1 << bit
+        return mask
+
+    def project(self, interests):
+        """Bitset restricted to interests already in the vocabulary"""
+        mask = 0
+        for interest in interests:
+            bit = self._bits.get(interest)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+
+class ProfileMatrix:
+    """
+    Candidates encoded once (lowercased art type + interest bitset) so that
+    any number of profiles can be scored against all of them in one pass.
+    """
+
+    def __init__(self, candidates, vocabulary=None):
+        self.vocabulary = vocabulary or InterestVocabulary()
+        self.candidates = list(candidates)
+        self.art_types = [(c.art_type or '').lower() for c in self.candidates]
+        self.masks = [self.vocabulary.encode(interest_set(c)) for c in self.candidates]
+
+    def scores(self, profile):
+        """Scores of every candidate for ``profile``, in candidate order"""
+        own_mask = self.vocabulary.project(interest_set(profile))
+        own_art = (profile.art_type or '').lower()
+        art_score = ART_TYPE_SCORE
+        interest_score = INTEREST_SCORE
+
+        if own_art:
+            return [
+                (art_score if art and (own_art in art or art in own_art) else 0)
+                + interest_score * (own_mask & mask).bit_count()
+                for art, mask in zip(self.art_types, self.masks)
+            ]
+        return [interest_score * (own_mask & mask).bit_count() for mask in self.masks]
+
+
+def score_candidates(profile, candidates):
+    """Scores of ``candidates`` for ``profile`` (one vectorized pass)"""
+    return ProfileMatrix(candidates).scores(profile)
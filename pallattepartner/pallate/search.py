@@ -0,0 +1,257 @@
+"""
+Full-text search over artworks and artists.
+
+Every artwork and every artist has one ``SearchDocument`` row (a title and a
+body), upserted by the Artwork/Profile signals (see signals.py). The row is
+indexed by the database's own full-text engine:
+
+* PostgreSQL: a GIN index on the weighted ``tsvector`` of title and body,
+  ranked with ``ts_rank_cd`` (title words weighted by ``TITLE_WEIGHT``) and
+  highlighted with ``ts_headline``;
+* SQLite: an FTS5 table kept in step with ``pallate_searchdocument`` by
+  triggers, ranked with ``bm25`` (same weights) and highlighted with
+  ``snippet``.
+
+``install_search_index()`` creates whichever of the two applies. It runs
+from the migration and after every ``migrate`` (so test databases built
+without migrations get it too), and is safe to run again.
+
+Queries match every word, the last one as a prefix so results show up while
+typing. Only the requested page is read (``SEARCH_PAGE_SIZE`` rows plus one
+to know whether there is a next page).
+"""
+
+import re
+from dataclasses import dataclass
+
+from django.db import connection as default_connection, transaction
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Artwork, Profile, SearchDocument
+
+
+SEARCH_PAGE_SIZE = 20
+
+# Longer queries are cut to their first words
+MAX_TERMS = 8
+
+# Title matches count this many times more than body matches
+TITLE_WEIGHT = 10.0
+
+# Highlight markers produced by the database, turned into <mark> after escaping
+_START, _STOP = '\x02', '\x03'
+
+TABLE = SearchDocument._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+
+PG_CONFIG = 'english'
+PG_VECTOR = (
+    f"(setweight(to_tsvector('{PG_CONFIG}'::regconfig, title), 'A') || "
+    f"setweight(to_tsvector('{PG_CONFIG}'::regconfig, body), 'B'))"
+)
+# ts_rank_cd weights for {D, C, B, A}: title (A) hits worth TITLE_WEIGHT body (B) hits
+PG_WEIGHTS = [0.1, 0.2, 1.0 / TITLE_WEIGHT, 1.0]
+
+_TERM_RE = re.compile(r'\w+')
+
+
+@dataclass
+class SearchHit:
+    object_id: int
+    rank: float
+    snippet: str
+
+
+def artwork_document(artwork):
+    """(title, body) indexed for an artwork"""
+    return artwork.title or '', ' '.join(filter(None, [artwork.description, artwork.categories]))
+
+
+def artist_document(profile):
+    """(title, body) indexed for an artist, by user id"""
+    return profile.user.username, ' '.join(filter(None, [profile.art_type, profile.bio]))
+
+
+def _upsert(kind, object_id, title, body):
+    SearchDocument.objects.bulk_create(
+        [SearchDocument(kind=kind, object_id=object_id, title=title[:255], body=body)],
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['title', 'body'],
+    )
+
+
+def index_artwork(artwork):
+    _upsert('artwork', artwork.pk, *artwork_document(artwork))
+
+
+def index_artist(profile):
+    _upsert('artist', profile.user_id, *artist_document(profile))
+
+
+def remove_document(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild_search_index(batch_size=2000):
+    """Recreate every search document from the artworks and profiles. Returns the count."""
+    total = 0
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        batch = []
+
+        def flush():
+            nonlocal batch, total
+            SearchDocument.objects.bulk_create(batch, batch_size=batch_size)
+            total += len(batch)
+            batch = []
+
+        artworks = Artwork.objects.order_by().only('id', 'title', 'description', 'categories')
+        for artwork in artworks.iterator(chunk_size=batch_size):
+            title, body = artwork_document(artwork)
+            batch.append(SearchDocument(kind='artwork', object_id=artwork.pk, title=title[:255], body=body))
+            if len(batch) >= batch_size:
+                flush()
+        profiles = Profile.objects.order_by().select_related('user').only(
+            'user_id', 'user__username', 'art_type', 'bio'
+        )
+        for profile in profiles.iterator(chunk_size=batch_size):
+            title, body = artist_document(profile)
+            batch.append(SearchDocument(kind='artist', object_id=profile.user_id, title=title, body=body))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    return total
+
+
+def install_search_index(connection=None):
+    """Create the full-text index for the current database backend"""
+    connection = connection or default_connection
+    if TABLE not in connection.introspection.table_names():
+        # Migrated back to before the search documents existed
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS searchdocument_fts_idx ON {TABLE} USING gin ({PG_VECTOR})"
+            )
+        elif connection.vendor == 'sqlite':
+            _install_fts5(cursor)
+
+
+def _install_fts5(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+    if cursor.fetchone():
+        return
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        f"title, body, content='{TABLE}', content_rowid='id', tokenize='porter unicode61')"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END"
+    )
+    # Documents written before the table existed
+    cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def search_terms(query):
+    """Lowercased words of ``query``, at most MAX_TERMS"""
+    return _TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def parse_page_number(value):
+    """A ?page= query value as a page number (1 when missing or invalid)"""
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+def highlight(snippet):
+    """Escape a database snippet and wrap its matches in <mark>"""
+    html = escape(snippet).replace(_START, '<mark>').replace(_STOP, '</mark>')
+    return mark_safe(html)
+
+
+def search_documents(kind, query, page=1, page_size=SEARCH_PAGE_SIZE, connection=None):
+    """
+    One page of ``kind`` documents matching ``query``, best first.
+
+    Returns ([SearchHit, ...], has_next).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+    connection = connection or default_connection
+    page = max(1, page)
+    offset = (page - 1) * page_size
+
+    if connection.vendor == 'postgresql':
+        rows = _search_postgresql(connection, kind, terms, page_size + 1, offset)
+    elif connection.vendor == 'sqlite':
+        rows = _search_sqlite(connection, kind, terms, page_size + 1, offset)
+    else:
+        rows = _search_fallback(kind, terms, page_size + 1, offset)
+
+    hits = [SearchHit(object_id, rank, highlight(snippet or '')) for object_id, rank, snippet in rows]
+    return hits[:page_size], len(hits) > page_size
+
+
+def _search_postgresql(connection, kind, terms, limit, offset):
+    # Every word must match, the last one as a prefix: 'blue' & 'harb':*
+    tsquery = ' & '.join(f"'{term}'" for term in terms) + ':*'
+    headline_options = f'StartSel={_START}, StopSel={_STOP}, MaxWords=24, MinWords=8, MaxFragments=2'
+    sql = f"""
+        SELECT page.object_id, page.rank,
+               ts_headline('{PG_CONFIG}', page.title || ' ' || page.body, page.query, %s)
+        FROM (
+            SELECT d.id, d.object_id, d.title, d.body, q.query,
+                   ts_rank_cd(%s::float4[], {PG_VECTOR}, q.query) AS rank
+            FROM {TABLE} d, to_tsquery('{PG_CONFIG}', %s) AS q(query)
+            WHERE d.kind = %s AND {PG_VECTOR} @@ q.query
+            ORDER BY rank DESC, d.id DESC
+            LIMIT %s OFFSET %s
+        ) page
+        ORDER BY page.rank DESC, page.id DESC
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [headline_options, PG_WEIGHTS, tsquery, kind, limit, offset])
+        return cursor.fetchall()
+
+
+def _search_sqlite(connection, kind, terms, limit, offset):
+    match = ' '.join(f'"{term}"' for term in terms) + '*'
+    sql = f"""
+        SELECT d.object_id, bm25({FTS_TABLE}, %s, 1.0) AS rank,
+               snippet({FTS_TABLE}, -1, %s, %s, '…', 16)
+        FROM {FTS_TABLE}
+        JOIN {TABLE} d ON d.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND d.kind = %s
+        ORDER BY rank, d.id DESC
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [TITLE_WEIGHT, _START, _STOP, match, kind, limit, offset])
+        # bm25 is lower-is-better; flip it so every backend ranks higher-is-better
+        return [(object_id, -rank, snippet) for object_id, rank, snippet in cursor.fetchall()]
+
+
+def _search_fallback(kind, terms, limit, offset):
+    """Unranked substring match for backends without a full-text engine"""
+    documents = SearchDocument.objects.filter(kind=kind)
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    rows = documents.order_by('-id').values_list('object_id', 'title')[offset:offset + limit]
+    return [(object_id, 0.0, title) for object_id, title in rows]
@@ -1,7 +1,25 @@
-from django.db.models.signals import post_save
+from django.db import connections
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Profile
+from .categories import apply_category_changes, split_categories
+from .direct_uploads import schedule_image_processing
+from .matching import index_profile
+from .models import (
+    Artwork, ArtworkComment, Collaboration, CollaborationFeedback, Favorite, Message, Notification, Profile,
+    UserStats,
+)
+from .notifications import adjust_unread_count, invalidate_notification_summary
+from .realtime import collaboration_channel, publish, user_channel
+from .autocomplete import index_label, unindex_label
+from .caching import bump_versions
+from .search import index_artist, index_artwork, install_search_index, remove_document
+from .ratings import invalidate_rating_summary
+from .stats import adjust_stats, artwork_owner, collaboration_owner
+
+def _login_only(update_fields):
+    """True for the save done by a login, which only writes last_login"""
+    return update_fields is not None and set(update_fields) <= {'last_login'}
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -9,6 +27,239 @@ def create_user_profile(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, update_fields=None, **kwargs):
+    # Re-saving the profile on every login would bump Profile.updated_at and
+    # make every logged in user look changed to the match refresh (suggestions.py)
+    if _login_only(update_fields):
+        return
     if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
+        instance.profile.save()
+
+# Keep the collaborator-matching index (matching.py) current
+@receiver(post_save, sender=Profile)
+def update_match_index(sender, instance, **kwargs):
+    index_profile(instance)
+
+
+# Keep the category index (categories.py) in step with Artwork.categories
+@receiver(pre_save, sender=Artwork)
+def remember_artwork_categories(sender, instance, **kwargs):
+    previous = None
+    if not instance._state.adding and instance.pk:
+        previous = (
+            Artwork.objects
+            .filter(pk=instance.pk)
+            .values_list('categories', flat=True)
+            .first()
+        )
+    instance._previous_categories = split_categories(previous)
+
+@receiver(post_save, sender=Artwork)
+def update_category_index(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_categories', {})
+    current = split_categories(instance.categories)
+    apply_category_changes(
+        instance,
+        added={key: name for key, name in current.items() if key not in previous},
+        removed={key: name for key, name in previous.items() if key not in current},
+    )
+    instance._previous_categories = current
+
+@receiver(post_delete, sender=Artwork)
+def remove_from_category_index(sender, instance, **kwargs):
+    apply_category_changes(instance, removed=split_categories(instance.categories))
+
+
+# Unread counter and cached summary (notifications.py)
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        adjust_unread_count(instance.user_id, 1)
+    invalidate_notification_summary(instance.user_id)
+    if created:
+        publish(user_channel(instance.user_id), 'notification', {
+            'id': instance.pk, 'notification_type': instance.notification_type,
+        })
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread_count(instance.user_id, -1)
+    invalidate_notification_summary(instance.user_id)
+
+
+# Push new chat messages to connected members (realtime.py)
+@receiver(post_save, sender=Message)
+def announce_message(sender, instance, created, **kwargs):
+    if created:
+        publish(collaboration_channel(instance.collaboration_id), 'chat', {
+            'id': instance.pk, 'sender_id': instance.sender_id,
+        })
+
+
+# Search documents (search.py)
+@receiver(post_save, sender=Artwork)
+def update_artwork_search_document(sender, instance, **kwargs):
+    index_artwork(instance)
+
+@receiver(post_delete, sender=Artwork)
+def remove_artwork_search_document(sender, instance, **kwargs):
+    remove_document('artwork', instance.pk)
+
+@receiver(post_save, sender=Profile)
+def update_artist_search_document(sender, instance, **kwargs):
+    # Profiles are saved along with their user, which covers username changes
+    index_artist(instance)
+
+@receiver(post_delete, sender=Profile)
+def remove_artist_search_document(sender, instance, **kwargs):
+    remove_document('artist', instance.user_id)
+
+def create_search_index(sender, using, **kwargs):
+    """post_migrate hook (connected in apps.py): make sure the full-text index exists"""
+    install_search_index(connections[using])
+
+
+# Typeahead index (autocomplete.py)
+@receiver(post_save, sender=User)
+def update_artist_suggestion(sender, instance, update_fields=None, **kwargs):
+    # Logins only save last_login
+    if update_fields is not None and not {'username', 'is_active'} & set(update_fields):
+        return
+    if instance.is_active:
+        index_label('artist', instance.pk, instance.username)
+    else:
+        unindex_label('artist', instance.pk)
+
+@receiver(post_delete, sender=User)
+def remove_artist_suggestion(sender, instance, **kwargs):
+    unindex_label('artist', instance.pk)
+
+@receiver(post_save, sender=Artwork)
+def update_artwork_suggestions(sender, instance, **kwargs):
+    index_label('artwork', instance.pk, instance.title)
+    # New categories become suggestions right away; unused ones go at the next reload
+    for key, name in split_categories(instance.categories).items():
+        index_label('category', key, name)
+
+@receiver(post_delete, sender=Artwork)
+def remove_artwork_suggestion(sender, instance, **kwargs):
+    unindex_label('artwork', instance.pk)
+
+
+# Resized image variants (images.py), built in the background; direct uploads
+# (direct_uploads.py) are normalized first
+@receiver(post_save, sender=Artwork)
+def build_artwork_variants(sender, instance, **kwargs):
+    schedule_image_processing(instance, 'image', 'image_variants', 'artwork')
+
+@receiver(post_save, sender=Profile)
+def build_avatar_variants(sender, instance, **kwargs):
+    # Every profile starts with the shared default avatar
+    default = Profile._meta.get_field('avatar').default
+    schedule_image_processing(instance, 'avatar', 'avatar_variants', 'avatar', skip={default})
+
+@receiver(post_save, sender=Message)
+def build_message_image_variants(sender, instance, **kwargs):
+    schedule_image_processing(instance, 'image', 'image_variants', 'message')
+
+
+# Per-user counters (stats.py)
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.create(user=instance)
+
+@receiver(post_save, sender=Artwork)
+def count_new_artwork(sender, instance, created, **kwargs):
+    if created:
+        adjust_stats(instance.user_id, artwork_count=1)
+
+@receiver(post_delete, sender=Artwork)
+def uncount_deleted_artwork(sender, instance, **kwargs):
+    adjust_stats(instance.user_id, artwork_count=-1)
+
+@receiver(post_save, sender=Collaboration)
+def count_new_collaboration(sender, instance, created, **kwargs):
+    if created:
+        adjust_stats(instance.owner_id, collab_count=1)
+
+@receiver(post_delete, sender=Collaboration)
+def uncount_deleted_collaboration(sender, instance, **kwargs):
+    adjust_stats(instance.owner_id, collab_count=-1)
+
+@receiver(post_save, sender=Favorite)
+def count_new_favorite(sender, instance, created, **kwargs):
+    if created:
+        adjust_stats(artwork_owner(instance.artwork_id), favorites_received=1)
+
+@receiver(post_delete, sender=Favorite)
+def uncount_deleted_favorite(sender, instance, **kwargs):
+    # Cascades delete favorites before their artwork, so the owner is still there
+    adjust_stats(artwork_owner(instance.artwork_id), favorites_received=-1)
+
+@receiver(pre_save, sender=CollaborationFeedback)
+def remember_feedback_rating(sender, instance, **kwargs):
+    previous = None
+    if not instance._state.adding and instance.pk:
+        previous = (
+            CollaborationFeedback.objects
+            .filter(pk=instance.pk)
+            .values_list('rating', flat=True)
+            .first()
+        )
+    instance._previous_rating = previous
+
+@receiver(post_save, sender=CollaborationFeedback)
+def count_feedback_rating(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    if previous is None:
+        adjust_stats(collaboration_owner(instance.collaboration_id), rating_count=1, rating_sum=instance.rating)
+    else:
+        adjust_stats(collaboration_owner(instance.collaboration_id), rating_sum=instance.rating - previous)
+    instance._previous_rating = instance.rating
+
+@receiver(post_delete, sender=CollaborationFeedback)
+def uncount_deleted_feedback(sender, instance, **kwargs):
+    adjust_stats(collaboration_owner(instance.collaboration_id), rating_count=-1, rating_sum=-instance.rating)
+
+
+# Cached rating summaries (ratings.py)
+@receiver(post_save, sender=CollaborationFeedback)
+def invalidate_saved_feedback_summary(sender, instance, **kwargs):
+    invalidate_rating_summary(instance.collaboration_id)
+
+@receiver(post_delete, sender=CollaborationFeedback)
+def invalidate_deleted_feedback_summary(sender, instance, **kwargs):
+    invalidate_rating_summary(instance.collaboration_id)
+
+
+# Versioned fragment and view caches (caching.py)
+@receiver(post_save, sender=Artwork)
+@receiver(post_delete, sender=Artwork)
+@receiver(post_save, sender=ArtworkComment)
+@receiver(post_delete, sender=ArtworkComment)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def bump_artworks_cache(sender, **kwargs):
+    bump_versions('artworks')
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def bump_profiles_cache(sender, **kwargs):
+    bump_versions('profiles')
+
+@receiver(post_save, sender=User)
+def bump_profiles_cache_for_user(sender, update_fields=None, **kwargs):
+    if _login_only(update_fields):
+        return
+    bump_versions('profiles')
+
+@receiver(post_delete, sender=User)
+def bump_profiles_cache_for_deleted_user(sender, **kwargs):
+    bump_versions('profiles')
+
+@receiver(post_save, sender=Collaboration)
+@receiver(post_delete, sender=Collaboration)
+def bump_collaborations_cache(sender, **kwargs):
+    bump_versions('collaborations')
@@ -0,0 +1,123 @@
+"""
+Denormalized per-user counters (``UserStats``).
+
+Listings show how many artworks and collaborations an artist has, how many
+favorites their work received and their average collaboration rating.
+Counting those per row meant one or two queries per artist; instead every
+user has a ``UserStats`` row that the listing reads through a join
+(``select_related('stats')``).
+
+The row is created with the user and adjusted by the signals in signals.py
+with relative ``F()`` updates, so concurrent writers can't lose updates.
+The update runs on the same connection right after the change that caused
+it. It is only transactional with that change inside ``transaction.atomic()``,
+where a rollback takes the adjustment with it; in autocommit mode (most
+views) the two commit separately, and a failure in between leaves the
+counter off by one.
+
+``rebuild_stats`` recomputes the rows from the source tables in bulk
+(``manage.py rebuild_user_stats``), e.g. after bulk imports, raw SQL that
+bypassed the signals, or such a failure.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models import Count, F, IntegerField, Subquery, Sum
+from django.db.models.functions import Greatest
+
+from .models import Artwork, Collaboration, CollaborationFeedback, Favorite, UserStats
+
+COUNTERS = ('artwork_count', 'collab_count', 'favorites_received', 'rating_count', 'rating_sum')
+
+
+def adjust_stats(user, **deltas):
+    """
+    Add ``deltas`` (counter name -> increment, possibly negative) to one
+    user's counters, never below 0.
+
+    ``user`` is a user id or a subquery that selects one, so callers that
+    only know e.g. an artwork id don't have to load the artwork first.
+    Missing rows (a user being deleted) are left alone.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    UserStats.objects.filter(user_id=user).update(**{
+        name: Greatest(F(name) + delta, 0) for name, delta in deltas.items()
+    })
+
+
+def stats_for(user):
+    """``user.stats`` (use ``select_related('stats')``), or zeros until its row exists"""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return UserStats(user=user)
+
+
+def artwork_owner(artwork_id):
+    return Subquery(Artwork.objects.filter(pk=artwork_id).values('user_id')[:1], output_field=IntegerField())
+
+
+def collaboration_owner(collaboration_id):
+    return Subquery(
+        Collaboration.objects.filter(pk=collaboration_id).values('owner_id')[:1], output_field=IntegerField()
+    )
+
+
+def computed_stats(user_ids):
+    """{user_id: {counter: value}} recomputed from the source tables"""
+    stats = {user_id: dict.fromkeys(COUNTERS, 0) for user_id in user_ids}
+
+    def collect(queryset, owner, **aggregates):
+        rows = queryset.filter(**{f'{owner}__in': user_ids}).values(owner).annotate(**aggregates).order_by()
+        for row in rows:
+            user_stats = stats[row.pop(owner)]
+            for name, value in row.items():
+                user_stats[name] = value or 0
+
+    collect(Artwork.objects.all(), 'user_id', artwork_count=Count('pk'))
+    collect(Collaboration.objects.all(), 'owner_id', collab_count=Count('pk'))
+    collect(Favorite.objects.all(), 'artwork__user_id', favorites_received=Count('pk'))
+    collect(
+        CollaborationFeedback.objects.all(), 'collaboration__owner_id',
+        rating_count=Count('pk'), rating_sum=Sum('rating'),
+    )
+    return stats
+
+
+def rebuild_stats(user_ids=None, missing_only=False, batch_size=1000):
+    """
+    Recompute ``UserStats`` for ``user_ids`` (default: every user) and write
+    the rows that are missing or out of date. ``missing_only`` skips users
+    that already have a row.
+
+    Returns (users checked, rows written).
+    """
+    users = User.objects.order_by('pk').values_list('pk', flat=True)
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    if missing_only:
+        users = users.filter(stats__isnull=True)
+
+    checked = written = 0
+    last_pk = 0
+    while True:
+        # Keyset batches keep memory flat on large user tables
+        batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return checked, written
+        last_pk = batch[-1]
+        stored = {
+            row['user_id']: row
+            for row in UserStats.objects.filter(user_id__in=batch).values('user_id', *COUNTERS)
+        }
+        rows = [
+            UserStats(user_id=user_id, **counters)
+            for user_id, counters in computed_stats(batch).items()
+            if stored.get(user_id) != {'user_id': user_id, **counters}
+        ]
+        UserStats.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['user'], update_fields=list(COUNTERS),
+        )
+        checked += len(batch)
+        written += len(rows)
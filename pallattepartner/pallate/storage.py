@@ -3,33 +3,144 @@ Custom storage backends for Supabase Storage integration.
 
 Supabase Storage is S3-compatible, so we use django-storages with boto3.
 This file provides custom storage classes for different media types.
+
+Both backends share one boto3 client per process (``PooledS3Storage``).
+django-storages builds a new boto3 session and client for every thread that
+touches storage, which is slow (the first upload after a worker starts pays
+for it) and opens a separate connection pool each time. boto3 clients are
+thread-safe, so threads only get their own lightweight resource objects on
+top of the shared client and its keep-alive connection pool.
 """
 
+import threading
+
+from botocore.config import Config
 from django.conf import settings
+from django.core.exceptions import SuspiciousOperation
+from django.utils.encoding import filepath_to_uri
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name, safe_join
+
+# Uploads below this size go out as a single PutObject instead of through
+# the s3transfer manager, which starts a thread pool for every file
+SINGLE_PUT_LIMIT = 8 * 1024 * 1024
+
+# (credentials, endpoint, ...) -> shared S3 resource, whose client is reused
+_shared_resources = {}
+_shared_lock = threading.Lock()
+
+
+def _public_url(prefix, location, name):
+    try:
+        key = safe_join(location, clean_name(name))
+    except ValueError:
+        raise SuspiciousOperation("Attempted access to '%s' denied." % name)
+    return prefix + filepath_to_uri(key)
+
+
+class PooledS3Storage(S3Boto3Storage):
+    """S3 storage with a process-wide, thread-safe boto3 client"""
+
+    def _client_config(self):
+        return self.client_config.merge(Config(
+            max_pool_connections=getattr(settings, 'AWS_S3_MAX_POOL_CONNECTIONS', 50),
+            tcp_keepalive=True,
+            retries={'max_attempts': 3, 'mode': 'standard'},
+        ))
+
+    def _shared_resource(self):
+        key = (
+            self.access_key, self.secret_key, self.security_token, self.session_profile,
+            self.region_name, self.endpoint_url, self.use_ssl, self.verify,
+        )
+        resource = _shared_resources.get(key)
+        if resource is None:
+            with _shared_lock:
+                resource = _shared_resources.get(key)
+                if resource is None:
+                    resource = self._create_session().resource(
+                        's3',
+                        region_name=self.region_name,
+                        use_ssl=self.use_ssl,
+                        endpoint_url=self.endpoint_url,
+                        config=self._client_config(),
+                        verify=self.verify,
+                    )
+                    _shared_resources[key] = resource
+        return resource
+
+    @property
+    def connection(self):
+        # Resource objects aren't thread-safe, the client under them is
+        connection = getattr(self._connections, 'connection', None)
+        if connection is None:
+            shared = self._shared_resource()
+            connection = type(shared)(client=shared.meta.client)
+            self._connections.connection = connection
+        return connection
+
+    @property
+    def bucket(self):
+        bucket = getattr(self._connections, 'bucket', None)
+        if bucket is None:
+            bucket = self._connections.bucket = self.connection.Bucket(self.bucket_name)
+        return bucket
+
+    def warm_up(self):
+        """Create the shared client now rather than on the first request"""
+        self._shared_resource()
+
+    def _save(self, name, content):
+        size = getattr(content, 'size', None)
+        if size is None or size >= SINGLE_PUT_LIMIT or self.gzip:
+            return super()._save(name, content)
+
+        cleaned_name = clean_name(name)
+        key = self._normalize_name(cleaned_name)
+        params = self._get_write_parameters(key, content)
+        content.seek(0)
+        body = content.read()
+        if isinstance(body, str):
+            body = body.encode()
+        self.connection.meta.client.put_object(Bucket=self.bucket_name, Key=key, Body=body, **params)
+        return cleaned_name
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        # Public objects behind custom_domain: no signing, no boto3 involved
+        if self.custom_domain and not parameters and not (self.querystring_auth and self.cloudfront_signer):
+            return _public_url(f'{self.url_protocol}//{self.custom_domain}/', self.location, name)
+        return super().url(name, parameters, expire, http_method)
+
+
+# Only set with USE_SUPABASE_STORAGE; the classes below stay importable without it
+SUPABASE_BUCKET = getattr(settings, 'SUPABASE_STORAGE_BUCKET_NAME', None)
+SUPABASE_PUBLIC_DOMAIN = (
+    f"{settings.SUPABASE_URL.replace('https://', '').replace('http://', '')}/storage/v1/object/public/{SUPABASE_BUCKET}"
+    if getattr(settings, 'SUPABASE_URL', None) else None
+)
 
 
-class SupabaseMediaStorage(S3Boto3Storage):
+class SupabaseMediaStorage(PooledS3Storage):
     """
     Storage backend for user-uploaded media files (avatars, artworks, chat images).
     Uses Supabase Storage bucket configured via environment variables.
     """
     location = 'media'
-    bucket_name = settings.SUPABASE_STORAGE_BUCKET_NAME
+    bucket_name = SUPABASE_BUCKET
     # Remove https:// as boto3 adds it automatically
-    custom_domain = f"{settings.SUPABASE_URL.replace('https://', '').replace('http://', '')}/storage/v1/object/public/{settings.SUPABASE_STORAGE_BUCKET_NAME}"
+    custom_domain = SUPABASE_PUBLIC_DOMAIN
     file_overwrite = False  # Don't overwrite files with same name
     default_acl = None  # Use bucket's default ACL
 
 
-class SupabaseStaticStorage(S3Boto3Storage):
+class SupabaseStaticStorage(PooledS3Storage):
     """
     Storage backend for static files (CSS, JS, icons) - for production deployment.
     Uses Supabase Storage bucket for serving static assets.
     """
     location = 'static'
-    bucket_name = settings.SUPABASE_STORAGE_BUCKET_NAME
+    bucket_name = SUPABASE_BUCKET
     # Remove https:// as boto3 adds it automatically
-    custom_domain = f"{settings.SUPABASE_URL.replace('https://', '').replace('http://', '')}/storage/v1/object/public/{settings.SUPABASE_STORAGE_BUCKET_NAME}"
+    custom_domain = SUPABASE_PUBLIC_DOMAIN
     file_overwrite = True  # Overwrite static files on collectstatic
     default_acl = None
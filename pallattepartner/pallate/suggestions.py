@@ -0,0 +1,223 @@
+"""
+Generation of CollaborationMatch suggestions.
+
+Matches used to be created lazily, one INSERT per suggested user, the first
+time an owner opened the matches page, and were never refreshed. Here they
+are written in bulk (``bulk_create(ignore_conflicts=True)`` on the
+(collaboration, suggested_user) unique key plus ``bulk_update`` for changed
+scores), and an incremental refresh rescores only the profiles saved since
+each collaboration's ``matches_refreshed_at``.
+
+Entry points: ``manage.py refresh_collaboration_matches`` and
+``schedule_refresh()`` for the in-process background job.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .jobs import run_in_background
+from .matching import find_matches
+from .models import Collaboration, CollaborationMatch, Profile
+from .scoring import ProfileMatrix
+
+logger = logging.getLogger(__name__)
+
+# Suggestions kept per collaboration (contacted users come on top)
+MAX_SUGGESTIONS = 100
+
+# Collaborations whose matches are kept fresh
+ACTIVE_STATUSES = ('open', 'in_progress')
+
+# How long a scheduled refresh keeps others from queueing the same collaboration
+REFRESH_LOCK_TIMEOUT = 60 * 5
+
+
+@dataclass
+class RefreshStats:
+    collaborations: int = 0
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+
+    def __str__(self):
+        return (
+            f"{self.collaborations} collaborations, {self.created} created, "
+            f"{self.updated} updated, {self.deleted} removed in {self.seconds * 1000:.1f} ms"
+        )
+
+
+def _apply_scores(collaboration, scores, refreshed_at, stats, prune=False, limit=None):
+    """
+    Upsert ``{user_id: score}`` for one collaboration and stamp its refresh time.
+
+    Users scored 0 lose their suggestion unless the owner already contacted
+    them. With ``prune`` every other uncontacted suggestion is dropped too
+    (used by full regeneration). With ``limit`` only the best ``limit``
+    suggestions are kept, plus the contacted ones, as a full regeneration
+    would (used by incremental refreshes).
+    """
+    existing = {
+        match.suggested_user_id: match
+        for match in CollaborationMatch.objects.filter(collaboration=collaboration)
+    }
+
+    to_create, to_update, to_delete = [], [], []
+    for user_id, score in scores.items():
+        match = existing.get(user_id)
+        if score <= 0:
+            if match and not match.is_contacted:
+                to_delete.append(match.pk)
+        elif match is None:
+            to_create.append(CollaborationMatch(
+                collaboration=collaboration, suggested_user_id=user_id, match_score=score,
+            ))
+        elif match.match_score != score:
+            match.match_score = score
+            to_update.append(match)
+
+    if prune:
+        to_delete.extend(
+            match.pk for user_id, match in existing.items()
+            if user_id not in scores and not match.is_contacted
+        )
+
+    if limit is not None:
+        deleted = set(to_delete)
+        final = {
+            user_id: match.match_score for user_id, match in existing.items() if match.pk not in deleted
+        }
+        final.update({match.suggested_user_id: match.match_score for match in to_create + to_update})
+        ranked = sorted(final, key=lambda user_id: (-final[user_id], user_id))
+        dropped = {
+            user_id for user_id in ranked[limit:]
+            if user_id not in existing or not existing[user_id].is_contacted
+        }
+        to_create = [match for match in to_create if match.suggested_user_id not in dropped]
+        to_update = [match for match in to_update if match.suggested_user_id not in dropped]
+        to_delete.extend(existing[user_id].pk for user_id in dropped if user_id in existing)
+
+    with transaction.atomic():
+        if to_delete:
+            CollaborationMatch.objects.filter(pk__in=to_delete).delete()
+        CollaborationMatch.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+        CollaborationMatch.objects.bulk_update(to_update, ['match_score'], batch_size=500)
+        Collaboration.objects.filter(pk=collaboration.pk).update(matches_refreshed_at=refreshed_at)
+    collaboration.matches_refreshed_at = refreshed_at
+
+    stats.created += len(to_create)
+    stats.updated += len(to_update)
+    stats.deleted += len(to_delete)
+
+
+def generate_matches(collaboration, stats=None):
+    """Full regeneration of one collaboration's suggestions from the matching index"""
+    stats = stats or RefreshStats()
+    owner_profile = getattr(collaboration.owner, 'profile', None)
+    if owner_profile is None:
+        return stats
+
+    # Stamp before reading, so profiles saved meanwhile are picked up next time
+    started = timezone.now()
+    matches = find_matches(
+        owner_profile, limit=MAX_SUGGESTIONS, exclude_user_ids=[collaboration.owner_id]
+    )
+    scores = {match['user'].id: match['match_score'] for match in matches}
+    _apply_scores(collaboration, scores, started, stats, prune=True)
+    stats.collaborations += 1
+    return stats
+
+
+def refresh_matches(collaborations=None, full=False):
+    """
+    Refresh suggestions for ``collaborations`` (default: every active one).
+
+    Collaborations never generated before, or whose owner changed their
+    profile, are regenerated fully. The others only rescore the profiles
+    saved since their last refresh. Returns RefreshStats.
+    """
+    start = time.perf_counter()
+    stats = RefreshStats()
+    if collaborations is None:
+        collaborations = Collaboration.objects.filter(status__in=ACTIVE_STATUSES)
+    collaborations = list(collaborations.select_related('owner__profile'))
+
+    incremental = []
+    for collaboration in collaborations:
+        owner_profile = getattr(collaboration.owner, 'profile', None)
+        if owner_profile is None:
+            continue
+        if (
+            full
+            or collaboration.matches_refreshed_at is None
+            or owner_profile.updated_at > collaboration.matches_refreshed_at
+        ):
+            generate_matches(collaboration, stats)
+        else:
+            incremental.append(collaboration)
+
+    if incremental:
+        since = min(c.matches_refreshed_at for c in incremental)
+        started = timezone.now()
+        changed = list(
+            Profile.objects
+            .filter(updated_at__gt=since)
+            .only('id', 'user_id', 'art_type', 'interests', 'updated_at')
+        )
+        # Changed profiles are encoded once and scored against every owner
+        matrix = ProfileMatrix(changed)
+        for collaboration in incremental:
+            all_scores = matrix.scores(collaboration.owner.profile)
+            scores = {
+                profile.user_id: score
+                for profile, score in zip(changed, all_scores)
+                if profile.updated_at > collaboration.matches_refreshed_at
+                and profile.user_id != collaboration.owner_id
+            }
+            _apply_scores(collaboration, scores, started, stats, limit=MAX_SUGGESTIONS)
+            stats.collaborations += 1
+
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def needs_refresh(collaboration):
+    """True when any profile changed after the collaboration's last refresh"""
+    if collaboration.matches_refreshed_at is None:
+        return True
+    return Profile.objects.filter(updated_at__gt=collaboration.matches_refreshed_at).exists()
+
+
+def _refresh_lock_key(collaboration_id):
+    return f'pallate:match-refresh:{collaboration_id}'
+
+
+def _refresh_job(collaboration_ids, full):
+    try:
+        stats = refresh_matches(Collaboration.objects.filter(pk__in=collaboration_ids), full=full)
+    finally:
+        cache.delete_many([_refresh_lock_key(pk) for pk in collaboration_ids])
+    logger.info("Collaboration match refresh: %s", stats)
+    return stats
+
+
+def schedule_refresh(collaboration_ids, full=False):
+    """
+    Refresh the given collaborations' suggestions in a background job.
+
+    Collaborations that already have a refresh queued or running are left
+    out. Returns the job's Future, or None when there was nothing to queue.
+    """
+    queued = [
+        pk for pk in collaboration_ids
+        if cache.add(_refresh_lock_key(pk), True, REFRESH_LOCK_TIMEOUT)
+    ]
+    if not queued:
+        return None
+    return run_in_background(_refresh_job, queued, full)
+
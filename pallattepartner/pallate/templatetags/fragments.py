@@ -0,0 +1,64 @@
+"""
+Cached template fragments (caching.py).
+
+    {% load fragments %}
+    {% cachedfragment "discover_grid" "artworks,profiles,collaborations" request.GET.cursor %}
+        ...
+    {% endcachedfragment %}
+
+caches the enclosed output under the fragment name and any number of extra
+values to vary on, until a model in one of the listed namespaces changes.
+``timeout=<seconds>`` overrides ``FRAGMENT_CACHE_TIMEOUT``. The fragment
+must not depend on the current user.
+"""
+
+from django import template
+
+from ..caching import NAMESPACES, cached
+
+register = template.Library()
+
+
+class CachedFragmentNode(template.Node):
+    def __init__(self, nodelist, name, namespaces, vary_on, timeout):
+        self.nodelist = nodelist
+        self.name = name
+        self.namespaces = namespaces
+        self.vary_on = vary_on
+        self.timeout = timeout
+
+    def render(self, context):
+        namespaces = [namespace.strip() for namespace in self.namespaces.resolve(context).split(',')]
+        unknown = set(namespaces) - set(NAMESPACES)
+        if unknown:
+            raise template.TemplateSyntaxError(f"Unknown cache namespace(s): {', '.join(sorted(unknown))}")
+        timeout = self.timeout.resolve(context) if self.timeout else None
+        return cached(
+            self.name.resolve(context),
+            namespaces,
+            lambda: self.nodelist.render(context),
+            vary_on=[value.resolve(context) for value in self.vary_on],
+            timeout=None if timeout is None else int(timeout),
+        )
+
+
+@register.tag
+def cachedfragment(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' takes a fragment name and the namespaces it depends on"
+        )
+    nodelist = parser.parse(('endcachedfragment',))
+    parser.delete_first_token()
+
+    timeout = None
+    vary_on = []
+    for bit in bits[3:]:
+        if bit.startswith('timeout='):
+            timeout = parser.compile_filter(bit[len('timeout='):])
+        else:
+            vary_on.append(parser.compile_filter(bit))
+    return CachedFragmentNode(
+        nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]), vary_on, timeout,
+    )
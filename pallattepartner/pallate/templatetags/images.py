@@ -0,0 +1,54 @@
+"""
+Responsive images from the variants built by images.py.
+
+    {% load images %}
+    {% responsive_image artwork.image artwork.image_variants sizes="(min-width: 1024px) 33vw, 100vw" alt=artwork.title class="w-full h-full object-cover" %}
+
+renders a ``<picture>`` with one ``<source srcset=...>`` per format and the
+original as the ``<img>`` fallback, with the intrinsic width/height so the
+layout doesn't jump while loading. Without (current) variants it falls back
+to a plain ``<img>``.
+"""
+
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..images import FORMATS, current_variants, variant_srcset
+from ..media import media_url as build_media_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(fieldfile, variants=None, sizes='100vw', alt='', loading='lazy', **attrs):
+    if not fieldfile:
+        return ''
+    # data_artwork_id=... becomes data-artwork-id="..."
+    attributes = format_html_join('', ' {}="{}"', sorted((name.replace('_', '-'), value) for name, value in attrs.items()))
+    variants = current_variants(fieldfile, variants)
+    if not variants:
+        return format_html(
+            '<img src="{}" alt="{}" loading="{}" decoding="async"{}>',
+            build_media_url(fieldfile), alt, loading, attributes,
+        )
+
+    sources = format_html_join(
+        '',
+        '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (FORMATS[name][2], variant_srcset(fieldfile, entries, variants.get('version')), sizes)
+            for name, entries in variants['formats'].items()
+            if name in FORMATS and entries
+        ),
+    )
+    return format_html(
+        '<picture style="display: contents">{}<img src="{}" alt="{}" width="{}" height="{}" '
+        'loading="{}" decoding="async"{}></picture>',
+        sources, build_media_url(fieldfile), alt, variants['width'], variants['height'], loading, attributes,
+    )
+
+
+@register.filter
+def media_url(fieldfile):
+    """``{{ profile.avatar|media_url }}``: memoized public URL (media.py)"""
+    return build_media_url(fieldfile)
@@ -1,3 +1,1504 @@
-from django.test import TestCase
+import base64
+import json
+import shutil
+import threading
+import struct
+import tempfile
+import tracemalloc
+import zlib
+from datetime import timedelta
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import async_views
+from .artists import discover_page
+from .autocomplete import RELOAD_INTERVAL, VERSION_CACHE_KEY, PrefixIndex, autocomplete, suggest
+from .categories import apply_category_changes, filter_by_categories, get_category_counts, split_categories
+from .caching import bump_versions, cache_stats, cached
+from .direct_uploads import TOKEN_SALT, presign_upload, resolve_upload, stale_uploads
+from .dispatch import NotificationEvent, write_events
+from .feeds import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+from .forms import ArtworkForm
+from .images import available_formats
+from .matching import candidate_profiles, find_matches, indexed_art_types
+from .media import media_url
+from .chat import CHAT_PAGE_SIZE
+from .models import (
+    Artwork, ArtworkCategory, Category, Collaboration, CollaborationFeedback, CollaborationMatch, CollaborationRole,
+    Favorite, Message, Notification, Profile, ProfileToken, UserStats,
+)
+from .notifications import adjust_unread_count, get_notification_summary, mark_read
+from .ratings import rating_summary
+from .realtime import InMemoryBroker, event_stream
+from .scoring import ProfileMatrix, score_pair
+from .search import search_documents
+from .stats import COUNTERS, computed_stats, rebuild_stats
+from .suggestions import generate_matches, needs_refresh, refresh_matches, schedule_refresh
+from .storage import PooledS3Storage
+from PIL import Image
+
+try:
+    import boto3
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+
+def make_artist(username, art_type, interests=''):
+    """A user whose profile has the given art type and interests"""
+    profile = User.objects.create_user(username, password='pass12345').profile
+    profile.art_type, profile.interests = art_type, interests
+    profile.save()
+    return profile
+
+
+class KeysetFeedTests(TestCase):
+    """Dashboard feeds are paged by (created_at, id) cursors"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('viewer', password='pass12345')
+        self.client.force_login(self.user)
+        self.artworks = [
+            Artwork.objects.create(user=self.user, title=f'Artwork {i}', image='artworks/test.png')
+            for i in range(5)
+        ]
+        # Ties on created_at are broken by id
+        Artwork.objects.filter(pk__in=[a.pk for a in self.artworks[1:4]]).update(
+            created_at=self.artworks[0].created_at,
+        )
+
+    def test_keyset_page_walks_every_row_once(self):
+        seen, cursor = [], None
+        while True:
+            items, cursor = keyset_page(Artwork.objects.all(), cursor=cursor, page_size=2)
+            seen += [item.pk for item in items]
+            if cursor is None:
+                break
+        expected = list(Artwork.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    @staticmethod
+    def _cursor(payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+    def test_decode_cursor_rejects_tampered_cursors(self):
+        valid = encode_cursor(self.artworks[0])
+        self.assertEqual(decode_cursor(valid), (self.artworks[0].created_at, self.artworks[0].pk))
+        for cursor in (
+            'not a cursor', valid[:-3] + '!!!', 'W10',  # [] after decoding
+            self._cursor(['2024-01-01T00:00:00', 'x']),
+            self._cursor(['yesterday', 1]),
+            self._cursor({'created_at': '2024-01-01T00:00:00', 'id': 1}),
+        ):
+            with self.assertRaises(InvalidCursor, msg=cursor):
+                decode_cursor(cursor)
+
+    def test_feed_endpoints(self):
+        url = reverse('pallate:feed', args=['artworks'])
+        first = self.client.get(url, {'limit': 3}).json()
+        self.assertEqual(len(first['items']), 3)
+        second = self.client.get(url, {'limit': 3, 'cursor': first['next_cursor']}).json()
+        self.assertEqual(len(second['items']), 2)
+        self.assertIsNone(second['next_cursor'])
+        self.assertFalse({item['id'] for item in first['items']} & {item['id'] for item in second['items']})
+
+        self.assertEqual(self.client.get(url, {'cursor': 'bogus'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('pallate:feed', args=['nope'])).status_code, 404)
+
+        fragment_url = reverse('pallate:feed_fragment', args=['artworks'])
+        response = self.client.get(fragment_url, {'limit': 4})
+        self.assertContains(response, 'Artwork 4')
+        self.assertTrue(response['X-Next-Cursor'])
+        response = self.client.get(fragment_url, {'limit': 4, 'cursor': response['X-Next-Cursor']})
+        self.assertEqual(response['X-Next-Cursor'], '')
+        self.assertEqual(self.client.get(fragment_url, {'cursor': 'bogus'}).status_code, 400)
+
+
+class CategoryIndexTests(TestCase):
+    """Category counts and memberships follow Artwork.categories"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('artist', password='pass12345')
+
+    def _counts(self):
+        return dict(Category.objects.filter(artwork_count__gt=0).values_list('name', 'artwork_count'))
+
+    def test_signals_keep_counts(self):
+        first = Artwork.objects.create(
+            user=self.user, title='One', image='artworks/test.png', categories='Photography, Digital Art',
+        )
+        second = Artwork.objects.create(
+            user=self.user, title='Two', image='artworks/test.png', categories='photography',
+        )
+        self.assertEqual(self._counts(), {'Photography': 2, 'Digital Art': 1})
+
+        first.categories = 'Digital Art, Animation'
+        first.save()
+        self.assertEqual(self._counts(), {'Photography': 1, 'Digital Art': 1, 'Animation': 1})
+
+        second.delete()
+        self.assertEqual(self._counts(), {'Digital Art': 1, 'Animation': 1})
+        self.assertIn({'name': 'Animation', 'count': 1}, get_category_counts())
+
+    def test_existing_memberships_are_not_counted_again(self):
+        artwork = Artwork.objects.create(
+            user=self.user, title='One', image='artworks/test.png', categories='Photography',
+        )
+        call_command('backfill_categories', stdout=StringIO())
+        # A repeated save, or one after the backfill already indexed the artwork
+        apply_category_changes(artwork, added=split_categories('Photography, Anime'))
+        self.assertEqual(self._counts(), {'Photography': 1, 'Anime': 1})
+
+    @override_settings(FRAGMENT_CACHE=False)
+    def test_counts_are_read_fresh_without_a_shared_cache(self):
+        Artwork.objects.create(user=self.user, title='One', image='artworks/test.png', categories='Anime')
+        self.assertIn({'name': 'Anime', 'count': 1}, get_category_counts())
+        # As changed by another worker: its cache invalidation never reaches this one
+        Category.objects.filter(key='anime').update(artwork_count=2)
+        self.assertIn({'name': 'Anime', 'count': 2}, get_category_counts())
+
+    def test_long_category_names_fit(self):
+        name = 'A very specific category ' * 8
+        Artwork.objects.create(user=self.user, title='Long', image='artworks/test.png', categories=name)
+        category = Category.objects.get()
+        category.full_clean()
+        self.assertEqual(category.name, name.strip())
+
+    def test_backfill_categories_repairs_the_index(self):
+        artwork = Artwork.objects.create(
+            user=self.user, title='One', image='artworks/test.png', categories='Photography',
+        )
+        # Bypass the signals, as bulk imports or raw SQL would
+        Artwork.objects.filter(pk=artwork.pk).update(categories='Illustration, 3D Art')
+        Category.objects.filter(name='Photography').update(artwork_count=5)
+
+        out = StringIO()
+        call_command('backfill_categories', stdout=out)
+        self.assertIn('2 categories in use', out.getvalue())
+        self.assertEqual(self._counts(), {'Illustration': 1, '3D Art': 1})
+        self.assertEqual(
+            set(ArtworkCategory.objects.filter(artwork=artwork).values_list('category__name', flat=True)),
+            {'Illustration', '3D Art'},
+        )
+
+
+class CategoryFilterTests(TestCase):
+    """filter_by_categories matches whole category names through the join table"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('artist', password='pass12345')
+        self.digital = self._artwork('Digital', 'Digital Art, Illustration')
+        self.photo = self._artwork('Photo', 'Photography')
+        self.plain = self._artwork('Plain', '')
+
+    def _artwork(self, title, categories):
+        return Artwork.objects.create(user=self.user, title=title, image='artworks/test.png', categories=categories)
+
+    def _titles(self, *names):
+        return set(filter_by_categories(Artwork.objects.all(), names).values_list('title', flat=True))
+
+    def test_exact_case_insensitive_match(self):
+        self.assertEqual(self._titles('digital art'), {'Digital'})
+        self.assertEqual(self._titles('Illustration', 'PHOTOGRAPHY'), {'Digital', 'Photo'})
+        # Unlike the old icontains filter, part of a name matches nothing
+        self.assertEqual(self._titles('Art'), set())
+        self.assertEqual(self._titles('Photo'), set())
+        self.assertEqual(self._titles(' '), {'Digital', 'Photo', 'Plain'})
+
+    def test_index_join_or_exists_depending_on_selectivity(self):
+        def sql(names):
+            return str(filter_by_categories(Artwork.objects.all(), names).query).upper()
+
+        self.assertNotIn('EXISTS', sql(['Digital Art']))
+        with mock.patch('pallattepartner.pallate.categories.SELECTIVE_FILTER_ROWS', 0):
+            self.assertIn('EXISTS', sql(['Digital Art']))
+            self.assertEqual(self._titles('Digital Art'), {'Digital'})
+
+    def test_memberships_follow_the_artwork(self):
+        def memberships(artwork):
+            return set(ArtworkCategory.objects.filter(artwork=artwork).values_list('category__key', flat=True))
+
+        self.assertEqual(memberships(self.digital), {'digital art', 'illustration'})
+        self.digital.categories = 'Illustration, Concept Art'
+        self.digital.save()
+        self.assertEqual(memberships(self.digital), {'illustration', 'concept art'})
+        self.assertEqual(self._titles('Digital Art'), set())
+        self.assertEqual(self._titles('Concept Art'), {'Digital'})
+
+        pk = self.digital.pk
+        self.digital.delete()
+        self.assertFalse(ArtworkCategory.objects.filter(artwork_id=pk).exists())
+        self.assertEqual(self._titles('Illustration'), set())
+
+
+class ArtworksApiQueryCountTests(TestCase):
+    """The artworks JSON API must not issue per-row queries"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', password='pass12345')
+        self.fans = [User.objects.create_user(f'fan{i}', password='pass12345') for i in range(3)]
+        self.client.force_login(self.user)
+
+    def _create_artworks(self, count):
+        for i in range(count):
+            artwork = Artwork.objects.create(
+                user=self.user,
+                title=f'Artwork {i}',
+                image='artworks/test.png',
+                categories='Digital Art',
+            )
+            for fan in self.fans:
+                self.client.force_login(fan)
+                self.client.get(reverse('pallate:toggle_favorite', args=[artwork.id]))
+        self.client.force_login(self.user)
+
+    def _count_queries(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_fetch_artworks_by_category_query_count_is_constant(self):
+        url = reverse('pallate:fetch_artworks_by_category')
+
+        self._create_artworks(2)
+        small_count, small = self._count_queries(url, {'categories': 'Digital Art'})
+        self._create_artworks(18)
+        large_count, large = self._count_queries(url, {'categories': 'Digital Art'})
+
+        self.assertEqual(len(small['artworks']), 2)
+        self.assertEqual(len(large['artworks']), 20)
+        self.assertEqual(small_count, large_count)
+        self.assertTrue(all(a['favorite_count'] == 3 for a in large['artworks']))
+
+    def test_feed_query_count_is_constant_for_any_page_size(self):
+        url = reverse('pallate:feed', args=['artworks'])
+        self._create_artworks(20)
+
+        counts = {
+            limit: self._count_queries(url, {'limit': limit})[0]
+            for limit in (1, 5, 20)
+        }
+        self.assertEqual(len(set(counts.values())), 1, counts)
+
+    def test_toggle_favorite_updates_counter(self):
+        artwork = Artwork.objects.create(user=self.user, title='Solo', image='artworks/test.png')
+        url = reverse('pallate:toggle_favorite', args=[artwork.id])
+
+        response = self.client.get(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json(), {'favorited': True, 'favorite_count': 1})
+
+        response = self.client.get(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json(), {'favorited': False, 'favorite_count': 0})
+        self.assertFalse(Favorite.objects.filter(artwork=artwork).exists())
+
+
+class DiscoverArtistsTests(TestCase):
+    """Discover Artists: exact counts, three recent artworks, keyset pages"""
+
+    def setUp(self):
+        self.viewer = User.objects.create_user('viewer', password='pass12345')
+        self.artist = User.objects.create_user('artist', password='pass12345')
+        self.client.force_login(self.viewer)
+
+    def test_counts_do_not_multiply(self):
+        artworks = [
+            Artwork.objects.create(user=self.artist, title=f'Artwork {i}', image='artworks/test.png')
+            for i in range(4)
+        ]
+        for i in range(3):
+            Collaboration.objects.create(owner=self.artist, title=f'Project {i}', description='Help wanted')
+
+        artists, next_cursor = discover_page()
+        artist = next(a for a in artists if a.pk == self.artist.pk)
+        self.assertEqual((artist.artwork_count, artist.collab_count), (4, 3))
+        self.assertEqual([a.pk for a in artist.recent_artworks], [a.pk for a in reversed(artworks[1:])])
+        self.assertIsNone(next_cursor)
+
+    def test_keyset_pages_with_constant_queries(self):
+        for i in range(5):
+            user = User.objects.create_user(f'painter{i}', password='pass12345')
+            for j in range(4):
+                Artwork.objects.create(user=user, title=f'Artwork {i}.{j}', image='artworks/test.png')
+
+        url = reverse('pallate:artist_profile')
+        seen, cursor, query_counts = [], None, set()
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                artists, cursor = discover_page(cursor, page_size=3)
+            query_counts.add(len(queries))
+            seen += [artist.username for artist in artists]
+            self.assertTrue(all(len(artist.recent_artworks) <= 3 for artist in artists))
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), User.objects.count())
+        self.assertEqual(query_counts, {2})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'painter4')
+        self.assertEqual(self.client.get(url, {'cursor': 'bogus'}).status_code, 400)
+
+
+@override_settings(BACKGROUND_JOBS_EAGER=True)
+class UserStatsTests(TestCase):
+    """Signals keep UserStats in step; rebuild_stats repairs drift"""
+
+    def setUp(self):
+        self.artist = User.objects.create_user('artist', password='pass12345')
+        self.fan = User.objects.create_user('fan', password='pass12345')
+        self.client.force_login(self.fan)
+
+    def _stats(self):
+        stats = UserStats.objects.get(user=self.artist)
+        return {name: getattr(stats, name) for name in COUNTERS}
+
+    def test_signals_match_recomputed_counts(self):
+        artworks = [
+            Artwork.objects.create(user=self.artist, title=f'Artwork {i}', image='artworks/test.png')
+            for i in range(2)
+        ]
+        collaboration = Collaboration.objects.create(owner=self.artist, title='Mural', description='Help wanted')
+        for artwork in artworks:
+            self.client.get(reverse('pallate:toggle_favorite', args=[artwork.id]))
+        feedback = CollaborationFeedback.objects.create(collaboration=collaboration, reviewer=self.fan, rating=2)
+        feedback.rating = 5
+        feedback.save()
+        self.assertEqual(self._stats(), {
+            'artwork_count': 2, 'collab_count': 1, 'favorites_received': 2, 'rating_count': 1, 'rating_sum': 5,
+        })
+        self.assertEqual(UserStats.objects.get(user=self.artist).average_rating, 5.0)
+
+        # Deleting cascades to the favorites and the feedback
+        artworks[0].delete()
+        collaboration.delete()
+        self.assertEqual(self._stats(), computed_stats([self.artist.pk])[self.artist.pk])
+        self.assertEqual(self._stats()['favorites_received'], 1)
+
+    def test_rebuild_repairs_drift(self):
+        Artwork.objects.create(user=self.artist, title='Artwork', image='artworks/test.png')
+        UserStats.objects.filter(user=self.artist).update(artwork_count=7)
+        UserStats.objects.filter(user=self.fan).delete()
+
+        self.assertEqual(rebuild_stats(missing_only=True), (1, 1))
+        self.assertEqual(rebuild_stats(), (2, 1))
+        self.assertEqual(self._stats()['artwork_count'], 1)
+        self.assertEqual(rebuild_stats(), (2, 0))
+
+    def test_featured_artists_query_count_is_constant(self):
+        def page_queries():
+            bump_versions('artworks', 'profiles')  # render the grid, not the cached fragment
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(reverse('pallate:featured_artists')).status_code, 200)
+            return len(queries)
+
+        def feature(username):
+            user = User.objects.create_user(username, password='pass12345')
+            Profile.objects.filter(user=user).update(is_featured=True)
+            for i in range(3):
+                Artwork.objects.create(user=user, title=f'Artwork {i}', image='artworks/test.png')
+
+        feature('featured0')
+        page_queries()  # warms the per-user caches (notification summary, ...)
+        few = page_queries()
+        for i in range(1, 5):
+            feature(f'featured{i}')
+        self.assertEqual(page_queries(), few)
+
+
+class RatingSummaryTests(TestCase):
+    """Ratings are aggregated in SQL, cached per collaboration and paginated"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pass12345')
+        self.collaboration = Collaboration.objects.create(owner=self.owner, title='Mural', description='Help wanted')
+        self.reviewers = [User.objects.create_user(f'reviewer{i}', password='pass12345') for i in range(12)]
+
+    def _review(self, reviewer, rating):
+        with self.captureOnCommitCallbacks(execute=True):
+            return CollaborationFeedback.objects.create(
+                collaboration=self.collaboration, reviewer=reviewer, rating=rating,
+            )
+
+    @override_settings(FRAGMENT_CACHE=True)
+    def test_summary_is_cached_until_feedback_changes(self):
+        for reviewer, rating in zip(self.reviewers, (5, 4, 4)):
+            feedback = self._review(reviewer, rating)
+
+        summary = rating_summary(self.collaboration.pk)
+        self.assertEqual((summary['count'], summary['average']), (3, 4.3))
+        self.assertEqual(
+            [(bar['rating'], bar['count'], bar['percent']) for bar in summary['histogram']],
+            [(5, 1, 33), (4, 2, 67), (3, 0, 0), (2, 0, 0), (1, 0, 0)],
+        )
+        with self.assertNumQueries(0):
+            rating_summary(self.collaboration.pk)
+
+        feedback.rating = 1
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback.save()
+        self.assertEqual(rating_summary(self.collaboration.pk)['average'], 3.3)
+
+    @override_settings(FRAGMENT_CACHE=False)
+    def test_summary_is_not_cached_without_a_shared_cache(self):
+        self._review(self.reviewers[0], 5)
+        rating_summary(self.collaboration.pk)
+        # As written by another worker: no signal reaches this process
+        CollaborationFeedback.objects.filter(collaboration=self.collaboration).update(rating=2)
+        with self.assertNumQueries(1):
+            self.assertEqual(rating_summary(self.collaboration.pk)['average'], 2)
+
+    def test_feedback_page_is_paginated(self):
+        for i, reviewer in enumerate(self.reviewers):
+            self._review(reviewer, i % 5 + 1)
+        self.client.force_login(self.owner)
+        url = reverse('pallate:collaboration_feedback', args=[self.collaboration.pk])
+
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['feedbacks']), 10)
+        self.assertEqual(response.context['rating_summary']['count'], 12)
+        self.assertEqual(response.context['owner_stats'].rating_count, 12)
+
+        response = self.client.get(url, {'cursor': response.context['next_cursor']})
+        self.assertEqual(len(response.context['feedbacks']), 2)
+        self.assertIsNone(response.context['next_cursor'])
+
+
+@override_settings(BACKGROUND_JOBS_EAGER=True, FRAGMENT_CACHE=True)
+class FragmentCacheTests(TestCase):
+    """Fragments and views are cached until a model they depend on changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.artist = User.objects.create_user('artist', password='pass12345')
+        Profile.objects.filter(user=self.artist).update(is_featured=True)
+        self.client.force_login(self.artist)
+
+    def _featured_grid(self):
+        return self.client.get(reverse('pallate:featured_artists')).content.decode()
+
+    def assertNoArtworkQueries(self, queries):
+        self.assertFalse([query for query in queries if 'pallate_artwork' in query['sql']])
+
+    def test_fragment_is_served_until_its_namespace_changes(self):
+        renders = []
+        render = lambda: renders.append(1) or f'render {len(renders)}'
+        self.assertEqual(cached('test', ['artworks'], render), 'render 1')
+        self.assertEqual(cached('test', ['artworks'], render), 'render 1')
+        self.assertEqual(cached('test', ['profiles'], render), 'render 2')
+
+        Artwork.objects.create(user=self.artist, title='Sunset', image='artworks/test.png')
+        self.assertEqual(cached('test', ['artworks'], render), 'render 3')
+        self.assertEqual(cached('test', ['profiles'], render), 'render 2')
+        self.assertEqual(
+            {row['name']: (row['hits'], row['misses']) for row in cache_stats()}, {'test': (2, 3)},
+        )
+
+    def test_featured_grid_shows_new_artworks(self):
+        self.assertNotIn('Sunset', self._featured_grid())
+        with CaptureQueriesContext(connection) as queries:
+            self._featured_grid()
+        self.assertNoArtworkQueries(queries)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Artwork.objects.create(user=self.artist, title='Sunset', image='artworks/test.png')
+        self.assertIn('Sunset', self._featured_grid())
+
+    def test_feed_api_is_cached(self):
+        url = reverse('pallate:feed', args=['artworks'])
+        Artwork.objects.create(user=self.artist, title='Sunset', image='artworks/test.png')
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            cached_response = self.client.get(url)
+        self.assertNoArtworkQueries(queries)
+        self.assertEqual(cached_response.json(), first.json())
+
+        Artwork.objects.create(user=self.artist, title='Dusk', image='artworks/test.png')
+        titles = [item['title'] for item in self.client.get(url).json()['items']]
+        self.assertEqual(titles, ['Dusk', 'Sunset'])
+
+    @override_settings(FRAGMENT_CACHE=False)
+    def test_nothing_is_cached_without_a_shared_cache(self):
+        renders = []
+        render = lambda: renders.append(1) or f'render {len(renders)}'
+        self.assertEqual(cached('test', ['artworks'], render), 'render 1')
+        self.assertEqual(cached('test', ['artworks'], render), 'render 2')
+        self.assertEqual(cache_stats(), [])
+
+        self._featured_grid()
+        with CaptureQueriesContext(connection) as queries:
+            self._featured_grid()
+        self.assertTrue([query for query in queries if 'pallate_profile' in query['sql']])
+
+    def test_stats_page_is_staff_only(self):
+        url = reverse('cache_stats')
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        User.objects.filter(pk=self.artist.pk).update(is_staff=True)
+        self._featured_grid()
+        response = self.client.get(url)
+        self.assertContains(response, 'featured_artists')
+        self.client.post(url)
+        self.assertEqual(cache_stats()[0]['requests'], 0)
+
+
+@override_settings(BACKGROUND_JOBS_EAGER=True, FRAGMENT_CACHE=True)
+class ConditionalGetTests(TestCase):
+    """Unchanged listings are answered with a 304 from the cache versions alone"""
+
+    def setUp(self):
+        cache.clear()
+        self.artist = User.objects.create_user('artist', password='pass12345')
+        Profile.objects.filter(user=self.artist).update(is_featured=True)
+        self.client.force_login(self.artist)
+
+    def _artwork(self, title):
+        return Artwork.objects.create(user=self.artist, title=title, image='artworks/test.png', categories='Photography')
+
+    def test_page_is_not_modified_until_an_artwork_changes(self):
+        url = reverse('pallate:featured_artists')
+        self.client.get(url)  # sets the CSRF cookie, which is part of the ETag
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Only the session and the user were loaded
+        self.assertFalse([query for query in queries if 'pallate_' in query['sql']])
+
+        self._artwork('Sunset')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Another user gets their own sidebar, so never the first user's ETag
+        self.client.force_login(User.objects.create_user('fan', password='pass12345'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_artworks_api_sends_last_modified(self):
+        url = reverse('pallate:fetch_artworks_by_category')
+        self._artwork('Sunset')
+        response = self.client.get(url, {'categories': 'Photography'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        last_modified = response['Last-Modified']
+
+        response = self.client.get(
+            url, {'categories': 'Photography'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest', HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+        self.assertEqual(response.status_code, 304)
+        # Errors carry no validators
+        self.assertFalse(self.client.get(url).has_header('ETag'))
+
+    @override_settings(FRAGMENT_CACHE=False)
+    def test_no_validators_without_a_shared_cache(self):
+        url = reverse('pallate:featured_artists')
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 200)
+
+
+class MatchingTests(TestCase):
+    """Collaborator candidates come from the inverted index, best scores first"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = make_artist('owner', 'Paint', 'Portraits, Anime')
+
+    def _tokens(self, profile):
+        return set(ProfileToken.objects.filter(profile=profile).values_list('token', flat=True))
+
+    def test_index_profile_follows_the_profile(self):
+        self.assertEqual(self._tokens(self.owner), {'art:paint', 'interest:portraits', 'interest:anime'})
+        self.owner.art_type, self.owner.interests = 'Digital Art', 'anime'
+        self.owner.save()
+        self.assertEqual(self._tokens(self.owner), {'art:digital art', 'interest:anime'})
+
+    def test_find_matches_uses_the_scoring_rules(self):
+        painter = make_artist('painter', 'Oil Painting')
+        fan = make_artist('fan', 'Photography', 'anime, portraits')
+        make_artist('stranger', 'Photography', 'Landscapes')
+
+        matches = find_matches(self.owner)
+        self.assertEqual(
+            [(match['user'].username, match['match_score']) for match in matches],
+            [('painter', 50), ('fan', 40)],
+        )
+        for match in matches:
+            self.assertEqual(match['match_score'], score_pair(self.owner, match['profile'])[0])
+        self.assertEqual(find_matches(self.owner, exclude_user_ids=[painter.user_id])[0]['profile'], fan)
+
+        # A generic word in common is not a match
+        digital = make_artist('digital', 'Digital Art')
+        make_artist('traditional', 'Traditional Art')
+        self.assertEqual(find_matches(digital), [])
+
+    def test_art_types_are_cached_only_when_the_cache_is_shared(self):
+        sculptor = make_artist('sculptor', '')
+        with override_settings(FRAGMENT_CACHE=True):
+            self.assertEqual(indexed_art_types(), ['paint'])
+            # Indexed by another worker: its invalidation doesn't reach this one
+            ProfileToken.objects.create(profile=sculptor, token='art:sculpture')
+            self.assertEqual(indexed_art_types(), ['paint'])
+        with override_settings(FRAGMENT_CACHE=False):
+            self.assertEqual(sorted(indexed_art_types()), ['paint', 'sculpture'])
+
+    def test_pool_keeps_the_best_scores(self):
+        for i in range(3):
+            make_artist(f'weak{i}', '', 'Anime')
+        best = make_artist('best', 'Painting', 'Anime, Portraits')
+        self.assertEqual(candidate_profiles(self.owner, pool=1), [best])
+
+
+@override_settings(BACKGROUND_JOBS_EAGER=True)
+class CollaborationMatchTests(TestCase):
+    """Suggestions are generated in bulk and refreshed incrementally"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = make_artist('owner', 'Painting', 'Anime')
+        self.collaboration = Collaboration.objects.create(
+            owner=self.owner.user, title='Mural', description='Help wanted',
+        )
+        self.painter = make_artist('painter', 'Oil Painting')
+        self.fan = make_artist('fan', 'Photography', 'Anime')
+        self.stranger = make_artist('stranger', 'Photography', 'Landscapes')
+
+    def _scores(self):
+        return dict(
+            CollaborationMatch.objects.filter(collaboration=self.collaboration)
+            .values_list('suggested_user__username', 'match_score')
+        )
+
+    def test_generate_matches(self):
+        stats = generate_matches(self.collaboration)
+        self.assertEqual((stats.collaborations, stats.created), (1, 2))
+        self.assertEqual(self._scores(), {'painter': 50, 'fan': 20})
+        self.assertIsNotNone(Collaboration.objects.get(pk=self.collaboration.pk).matches_refreshed_at)
+
+        # Regenerating drops suggestions that no longer match
+        self.fan.interests = 'Landscapes'
+        self.fan.save()
+        generate_matches(self.collaboration)
+        self.assertEqual(self._scores(), {'painter': 50})
+
+    def test_incremental_refresh_only_rescores_changed_profiles(self):
+        generate_matches(self.collaboration)
+        self.stranger.interests = 'Anime, Landscapes'
+        self.stranger.save()
+        self.fan.interests = ''
+        self.fan.save()
+
+        stats = refresh_matches()
+        self.assertEqual((stats.created, stats.deleted), (1, 1))
+        self.assertEqual(self._scores(), {'painter': 50, 'stranger': 20})
+        self.assertEqual(refresh_matches().created + refresh_matches().updated, 0)
+
+    def test_incremental_refresh_keeps_the_best_suggestions(self):
+        generate_matches(self.collaboration)
+        CollaborationMatch.objects.filter(suggested_user=self.fan.user).update(is_contacted=True)
+        rival = make_artist('rival', 'Painting', 'Anime')
+        make_artist('follower', 'Photography', 'Anime')
+
+        with mock.patch('pallattepartner.pallate.suggestions.MAX_SUGGESTIONS', 2):
+            refresh_matches()
+        # Same as a full regeneration: the two best, plus whoever was contacted
+        self.assertEqual(self._scores(), {'rival': score_pair(self.owner, rival)[0], 'painter': 50, 'fan': 20})
+
+    def test_logins_do_not_count_as_profile_changes(self):
+        generate_matches(self.collaboration)
+        self.collaboration.refresh_from_db()
+        self.assertTrue(self.client.login(username='painter', password='pass12345'))
+        self.assertFalse(needs_refresh(self.collaboration))
+
+    def test_scheduled_refreshes_are_deduplicated(self):
+        generate_matches(self.collaboration)
+        with mock.patch('pallattepartner.pallate.suggestions.run_in_background') as run:
+            schedule_refresh([self.collaboration.pk])
+            self.assertIsNone(schedule_refresh([self.collaboration.pk]))
+        self.assertEqual(run.call_count, 1)
+
+        # Once the job ran, the collaboration can be queued again
+        run.call_args.args[0](*run.call_args.args[1:])
+        self.assertIsNotNone(schedule_refresh([self.collaboration.pk]))
+
+
+class ScoringTests(TestCase):
+    """Batch and per-pair scoring must agree"""
+
+    def test_matrix_scores_match_score_pair(self):
+        owner = Profile(art_type='Digital Art', interests='Anime, Portraits')
+        candidates = [
+            Profile(art_type='digital', interests='anime, portraits'),
+            Profile(art_type='', interests='Portraits'),
+            Profile(art_type='Photography', interests='Nature'),
+        ]
+        self.assertEqual(
+            ProfileMatrix(candidates).scores(owner),
+            [score_pair(owner, candidate)[0] for candidate in candidates],
+        )
+        self.assertEqual(ProfileMatrix(candidates).scores(owner), [90, 20, 0])
+
+    def test_matches_criteria_without_art_type(self):
+        # Used to raise or match on an empty art type because of operator precedence
+        owner = Profile(art_type='', interests='Anime')
+        self.assertFalse(owner.matches_criteria(Profile(art_type='Photography', interests='')))
+        self.assertTrue(owner.matches_criteria(Profile(art_type='', interests='anime')))
+
+
+class NotificationSummaryTests(TestCase):
+    """Latest notifications + unread count: one query, then cached"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('notified', password='pass12345')
+        for i in range(3):
+            Notification.objects.create(user=self.user, text=f'Note {i}')
+
+    @override_settings(FRAGMENT_CACHE=True)
+    def test_summary_is_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            summary = get_notification_summary(self.user)
+        self.assertEqual(summary['unread_count'], 3)
+        self.assertEqual(len(summary['notifications']), 3)
+        with self.assertNumQueries(0):
+            get_notification_summary(self.user)
+
+    @override_settings(FRAGMENT_CACHE=False)
+    def test_summary_is_not_cached_without_a_shared_cache(self):
+        get_notification_summary(self.user)
+        with self.assertNumQueries(1):
+            summary = get_notification_summary(self.user)
+        self.assertEqual(summary['unread_count'], 3)
+
+    @override_settings(FRAGMENT_CACHE=True)
+    def test_create_and_read_invalidate_summary(self):
+        get_notification_summary(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            note = Notification.objects.create(user=self.user, text='New')
+        self.assertEqual(get_notification_summary(self.user)['unread_count'], 4)
+
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(
+                reverse('pallate:mark_notification_as_read', args=[note.id]),
+                {'next': '/'},
+            )
+        self.assertEqual(get_notification_summary(self.user)['unread_count'], 3)
+
+    def test_counter_and_bulk_mark_read(self):
+        other = User.objects.create_user('other', password='pass12345')
+        foreign = Notification.objects.create(user=other, text='Not yours')
+        notes = list(Notification.objects.filter(user=self.user))
+        self.assertEqual(Profile.objects.get(user=self.user).unread_notifications, 3)
+
+        self.client.force_login(self.user)
+        url = reverse('pallate:mark_notifications_read')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                url, {'ids': [notes[0].id, foreign.id]}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            )
+        notification_queries = [q['sql'] for q in queries if 'pallate_notification' in q['sql']]
+        self.assertEqual(len(notification_queries), 1)
+        self.assertTrue(notification_queries[0].startswith('UPDATE'))
+        self.assertEqual(response.json(), {'marked': 1, 'unread_count': 2})
+        self.assertFalse(Notification.objects.get(pk=foreign.pk).is_read)
+
+        response = self.client.post(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json(), {'marked': 2, 'unread_count': 0})
+        self.assertFalse(Notification.objects.filter(user=self.user, is_read=False).exists())
+
+    def test_mark_all_read_only_subtracts_what_it_marked(self):
+        # A notification counted after the UPDATE (e.g. created concurrently)
+        # must survive marking everything read
+        with mock.patch(
+            'pallattepartner.pallate.notifications.adjust_unread_count', wraps=adjust_unread_count,
+        ) as adjust:
+            Profile.objects.filter(user=self.user).update(unread_notifications=4)
+            self.assertEqual(mark_read(self.user), 3)
+        adjust.assert_called_once_with(self.user.pk, -3)
+        self.assertEqual(Profile.objects.get(user=self.user).unread_notifications, 1)
+
+    def test_mark_read_redirects_stay_on_site(self):
+        self.client.force_login(self.user)
+        url = reverse('pallate:mark_notifications_read')
+        self.assertRedirects(
+            self.client.post(url, {'next': 'https://evil.example/'}),
+            reverse('pallate:notifications_list'), fetch_redirect_response=False,
+        )
+        self.assertRedirects(
+            self.client.post(url, {'next': '/dashboard/'}), '/dashboard/', fetch_redirect_response=False,
+        )
+        note = Notification.objects.filter(user=self.user).first()
+        response = self.client.get(
+            reverse('pallate:mark_notification_as_read', args=[note.id]), {'next': '//evil.example/'},
+        )
+        self.assertFalse(response['Location'].startswith('//'))
+
+
+@override_settings(BACKGROUND_JOBS_EAGER=True)
+class NotificationDispatchTests(TestCase):
+    """Queued notification events are coalesced, fanned out and written in bulk"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass12345')
+        self.member = User.objects.create_user('member', password='pass12345')
+        self.collaboration = Collaboration.objects.create(
+            owner=self.owner, title='Mural', description='Wall'
+        )
+        CollaborationRole.objects.create(
+            collaboration=self.collaboration, title='Painter', description='Paint',
+            filled_by=self.member,
+        )
+
+    def _post_message(self, user, text):
+        self.client.force_login(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('pallate:collab_messages', args=[self.collaboration.pk]), {'text': text}
+            )
+
+    def test_messages_fan_out_and_coalesce(self):
+        for i in range(5):
+            self._post_message(self.member, f'Hello {i}')
+
+        notification = Notification.objects.get(user=self.owner)
+        self.assertEqual(notification.event_count, 5)
+        self.assertEqual(notification.text, "5 new messages in 'Mural'")
+        self.assertEqual(notification.actor, self.member)
+        self.assertEqual(Profile.objects.get(user=self.owner).unread_notifications, 1)
+        self.assertFalse(Notification.objects.filter(user=self.member).exists())
+
+        self._post_message(self.owner, 'Thanks')
+        self.assertEqual(Notification.objects.get(user=self.member).event_count, 1)
+
+    def test_titles_with_braces_coalesce(self):
+        Collaboration.objects.filter(pk=self.collaboration.pk).update(title='Proj {alpha} {count}')
+        for i in range(2):
+            self._post_message(self.member, f'Hello {i}')
+        self.assertEqual(
+            Notification.objects.get(user=self.owner).text, "2 new messages in 'Proj {alpha} {count}'",
+        )
+        # Unescaped user text falls back to the single-event text instead of raising
+        event = NotificationEvent(text='New message', group_text="{count} new in 'Proj {alpha}'")
+        self.assertEqual(event.render(3), 'New message')
+
+    def test_batch_is_deduplicated_and_bulk_written(self):
+        event = NotificationEvent(text='Welcome', user_ids=(self.owner.pk, self.member.pk))
+        with self.assertNumQueries(4):  # savepoint, INSERT, counters, release
+            created, updated = write_events([event, event])
+        self.assertEqual((created, updated), (2, 0))
+        self.assertEqual(Profile.objects.get(user=self.member).unread_notifications, 1)
+
+
+class ChatPagingTests(TestCase):
+    """The chat page renders the latest messages; the rest is paged and polled"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('chatter', password='pass12345')
+        self.collaboration = Collaboration.objects.create(
+            owner=self.user, title='Zine', description='Pages'
+        )
+        Message.objects.bulk_create([
+            Message(collaboration=self.collaboration, sender=self.user, text=f'Message {i}')
+            for i in range(CHAT_PAGE_SIZE + 5)
+        ])
+        self.client.force_login(self.user)
+
+    def test_latest_page_then_older(self):
+        response = self.client.get(reverse('pallate:collab_messages', args=[self.collaboration.pk]))
+        shown = response.context['messages']
+        self.assertEqual(len(shown), CHAT_PAGE_SIZE)
+        self.assertEqual(shown[-1].text, f'Message {CHAT_PAGE_SIZE + 4}')
+
+        older = self.client.get(
+            reverse('pallate:collab_messages_older', args=[self.collaboration.pk]),
+            {'cursor': response.context['older_cursor']},
+        ).json()
+        self.assertIsNone(older['next_cursor'])
+        self.assertEqual(older['html'].count('class="chat-message"'), 5)
+
+    def test_poll_returns_only_newer_messages(self):
+        url = reverse('pallate:collab_messages_poll', args=[self.collaboration.pk])
+        last_id = Message.objects.latest('pk').pk
+        self.assertEqual(self.client.get(url, {'after': last_id}).json()['messages'], [])
+
+        new = Message.objects.create(collaboration=self.collaboration, sender=self.user, text='Hi')
+        data = self.client.get(url, {'after': last_id}).json()
+        self.assertEqual([m['id'] for m in data['messages']], [new.id])
+        self.assertEqual(data['last_id'], new.id)
+
+
+class RealtimeTests(TestCase):
+    """Published events reach Server-Sent Events streams of the channel"""
+
+    async def test_event_stream_receives_published_events(self):
+        broker = InMemoryBroker()
+        stream = event_stream(['collaboration:1'], broker=broker)
+        self.assertEqual(await stream.__anext__(), 'retry: 5000\n\n')
+
+        self.assertEqual(broker.publish('collaboration:2', {'type': 'chat', 'data': {'id': 1}}), 0)
+        self.assertEqual(broker.publish('collaboration:1', {'type': 'chat', 'data': {'id': 2}}), 1)
+        self.assertEqual(await stream.__anext__(), 'event: chat\ndata: {"id": 2}\n\n')
+
+        await stream.aclose()
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    def test_events_view_without_asgi_tells_client_to_stop(self):
+        User.objects.create_user('streamer', password='pass12345')
+        self.client.login(username='streamer', password='pass12345')
+        self.assertEqual(self.client.get(reverse('pallate:realtime_events')).status_code, 204)
+
+
+@override_settings(ASYNC_VIEW_READ_WORKERS=0)
+class AsyncViewsTests(TestCase):
+    """The ASGI versions of the read-heavy pages render the same data"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader', password='pass12345')
+        self.artwork = Artwork.objects.create(
+            user=self.user, title='Harbour at dusk', image='artworks/test.png', categories='Photography'
+        )
+        Favorite.objects.create(user=self.user, artwork=self.artwork)
+
+    def _get(self, view, path, *args, **headers):
+        request = RequestFactory().get(path, **headers)
+        request.user = self.user
+
+        async def auser():
+            return self.user
+
+        request.auser = auser
+        request.session = self.client.session
+        return async_to_sync(view)(request, *args)
+
+    def test_pages_render(self):
+        for view, path, args in [
+            (async_views.dashboard, '/dashboard/', ()),
+            (async_views.search, '/search/?q=harbour', ()),
+            (async_views.artist_profile, '/artist-profile/', ()),
+            (async_views.artist_profile, f'/artist/{self.user.pk}/', (self.user.pk,)),
+        ]:
+            response = self._get(view, path, *args)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertContains(response, 'Harbour at dusk', msg_prefix=path)
+
+    def test_fetch_artworks_by_category_matches_sync_view(self):
+        response = self._get(
+            async_views.fetch_artworks_by_category, '/api/fetch-artworks-by-category/?categories=Photography',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.client.force_login(self.user)
+        expected = self.client.get(
+            reverse('pallate:fetch_artworks_by_category'), {'categories': 'Photography'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.content, expected.content)
+
+    @override_settings(FRAGMENT_CACHE=True)
+    def test_fetch_artworks_by_category_is_cached(self):
+        cache.clear()
+        path = '/api/fetch-artworks-by-category/?categories=Photography'
+        first = self._get(async_views.fetch_artworks_by_category, path, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        with CaptureQueriesContext(connection) as queries:
+            second = self._get(async_views.fetch_artworks_by_category, path, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertFalse([query for query in queries if 'pallate_artwork' in query['sql']])
+        self.assertEqual(second.content, first.content)
+        # Shared with the sync view
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                reverse('pallate:fetch_artworks_by_category'), {'categories': 'Photography'},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+        self.assertFalse([query for query in queries if 'pallate_artwork' in query['sql']])
+        self.assertEqual(
+            {row['name']: (row['hits'], row['misses']) for row in cache_stats()},
+            {'artworks_by_category': (2, 1)},
+        )
+
+    @override_settings(FRAGMENT_CACHE=True)
+    def test_artist_profile_is_not_modified(self):
+        path = f'/artist/{self.user.pk}/'
+        etag = self._get(async_views.artist_profile, path, self.user.pk)['ETag']
+        response = self._get(async_views.artist_profile, path, self.user.pk, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class SearchTests(TestCase):
+    """Full-text search documents follow saves and rank title matches first"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('searcher', password='pass12345')
+
+    def _artwork(self, title, description=''):
+        return Artwork.objects.create(
+            user=self.user, title=title, description=description, image='artworks/test.png'
+        )
+
+    def _ids(self, kind, query, **kwargs):
+        hits, _ = search_documents(kind, query, **kwargs)
+        return [hit.object_id for hit in hits]
+
+    def test_title_matches_rank_above_description_matches(self):
+        in_description = self._artwork('Evening study', 'Boats in the harbour')
+        in_title = self._artwork('Harbour lights')
+        self._artwork('Mountain pass')
+
+        self.assertEqual(self._ids('artwork', 'harbour'), [in_title.pk, in_description.pk])
+        # Last word is a prefix, every word must match
+        self.assertEqual(self._ids('artwork', 'harbour lig'), [in_title.pk])
+
+    def test_documents_follow_saves_and_deletes(self):
+        artwork = self._artwork('Untitled')
+        self.assertEqual(self._ids('artwork', 'lighthouse'), [])
+
+        artwork.title = 'Lighthouse at night'
+        artwork.save()
+        self.assertEqual(self._ids('artwork', 'lighthouse'), [artwork.pk])
+
+        artwork.delete()
+        self.assertEqual(self._ids('artwork', 'lighthouse'), [])
+
+        self.user.profile.bio = 'Watercolour landscapes'
+        self.user.profile.save()
+        self.assertEqual(self._ids('artist', 'watercolour'), [self.user.pk])
+
+    def test_snippets_are_escaped_and_highlighted(self):
+        self._artwork('Study', '<script>alert(1)</script> charcoal sketch')
+        hits, _ = search_documents('artwork', 'charcoal')
+        self.assertIn('<mark>charcoal</mark>', hits[0].snippet)
+        self.assertNotIn('<script>', hits[0].snippet)
+
+    def test_pages(self):
+        for i in range(5):
+            self._artwork(f'Portrait {i}')
+        first, more = search_documents('artwork', 'portrait', page_size=3)
+        second, more_after = search_documents('artwork', 'portrait', page=2, page_size=3)
+        self.assertEqual((len(first), more, len(second), more_after), (3, True, 2, False))
+
+    def test_search_view(self):
+        self._artwork('Neon city')
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('pallate:search'), {'q': 'neon'})
+        self.assertContains(response, '<mark>Neon</mark>')
+
+
+@override_settings(BACKGROUND_JOBS_EAGER=True)
+class AutocompleteTests(TestCase):
+    """Typeahead answers come from the in-memory index, kept current by signals"""
+
+    def setUp(self):
+        cache.clear()
+        autocomplete.loaded = False
+        self.user = User.objects.create_user('harbourmaster', password='pass12345')
+
+    def test_prefix_index_ranking_and_updates(self):
+        index = PrefixIndex()
+        index.load([('artwork', 1, 'Blue Harbour'), ('artwork', 2, 'Harbour'), ('artist', 3, 'harriet')])
+
+        result = index.suggest('har')
+        self.assertEqual(result['artwork'], [(2, 'Harbour'), (1, 'Blue Harbour')])
+        self.assertEqual(result['artist'], [(3, 'harriet')])
+
+        index.add('artwork', 2, 'Mountain')
+        index.remove('artist', 3)
+        self.assertEqual(index.suggest('har'), {'artist': [], 'artwork': [(1, 'Blue Harbour')], 'category': []})
+
+    def test_lookups_skip_the_database_once_loaded(self):
+        suggest('ha')
+        with self.assertNumQueries(0):
+            result = suggest('harb')
+        self.assertEqual(result['artist'], [(self.user.pk, 'harbourmaster')])
+
+    def test_signals_update_the_loaded_index(self):
+        suggest('ha')
+        with self.captureOnCommitCallbacks(execute=True):
+            artwork = Artwork.objects.create(
+                user=self.user, title='Harbour at dawn', image='artworks/test.png', categories='Harbour Scenes'
+            )
+        result = suggest('harbour')
+        self.assertEqual(result['artwork'], [(artwork.pk, 'Harbour at dawn')])
+        self.assertEqual(result['category'], [('harbour scenes', 'Harbour Scenes')])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            artwork.delete()
+        self.assertEqual(suggest('harbour')['artwork'], [])
+
+    def _create_elsewhere(self, title):
+        # As saved by another process: no signal reaches this index
+        return Artwork.objects.bulk_create([
+            Artwork(user=self.user, title=title, image='artworks/test.png')
+        ])[0]
+
+    @override_settings(FRAGMENT_CACHE=True)
+    def test_other_processes_changes_through_the_shared_version(self):
+        suggest('ha')
+        artwork = self._create_elsewhere('Harbour lights')
+        self.assertEqual(suggest('harbour')['artwork'], [])
+        cache.set(VERSION_CACHE_KEY, cache.get(VERSION_CACHE_KEY, 0) + 1)
+        self.assertEqual(suggest('harbour')['artwork'], [(artwork.pk, 'Harbour lights')])
+
+    @override_settings(FRAGMENT_CACHE=False)
+    def test_other_processes_changes_after_the_reload_interval(self):
+        suggest('ha')
+        artwork = self._create_elsewhere('Harbour lights')
+        cache.set(VERSION_CACHE_KEY, cache.get(VERSION_CACHE_KEY, 0) + 1)
+        self.assertEqual(suggest('harbour')['artwork'], [])
+        autocomplete.loaded_at -= RELOAD_INTERVAL + 1
+        self.assertEqual(suggest('harbour')['artwork'], [(artwork.pk, 'Harbour lights')])
+
+    def test_endpoint(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('pallate:autocomplete'), {'q': 'harb'})
+        self.assertEqual(response.json()['artists'], [{
+            'id': self.user.pk,
+            'label': 'harbourmaster',
+            'url': reverse('pallate:artist_profile_by_id', args=[self.user.pk]),
+        }])
+
+
+class ImageVariantsTests(TestCase):
+    """Uploads get resized WebP copies and the tag turns them into a srcset"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, BACKGROUND_JOBS_EAGER=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user('painter', password='pass12345')
+
+    def _upload(self, size=(1600, 900), name='canvas.png'):
+        buffer = BytesIO()
+        Image.new('RGB', size, (200, 80, 40)).save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def test_upload_builds_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            artwork = Artwork.objects.create(user=self.user, title='Canvas', image=self._upload())
+        artwork.refresh_from_db()
+
+        variants = artwork.image_variants
+        self.assertEqual((variants['source'], variants['width'], variants['height']), (artwork.image.name, 1600, 900))
+        self.assertIn('webp', available_formats())
+        self.assertEqual([entry[:2] for entry in variants['formats']['webp']], [[320, 180], [640, 360], [1280, 720]])
+        for _, _, name in variants['formats']['webp']:
+            self.assertTrue(artwork.image.storage.exists(name))
+
+        html = Template(
+            '{% load images %}{% responsive_image artwork.image artwork.image_variants sizes="50vw" alt=artwork.title data_artwork_id=artwork.id %}'
+        ).render(Context({'artwork': artwork}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn(f"_640w.webp?v={variants['version']} 640w", html)
+        self.assertIn('width="1600" height="900"', html)
+        self.assertIn(f'data-artwork-id="{artwork.pk}"', html)
+
+        # A title-only edit keeps the variants
+        artwork.title = 'Renamed'
+        artwork.save()
+        artwork.refresh_from_db()
+        self.assertEqual(artwork.image_variants, variants)
+
+    def test_small_images_are_not_upscaled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            artwork = Artwork.objects.create(user=self.user, title='Tiny', image=self._upload((200, 100)))
+        artwork.refresh_from_db()
+        self.assertEqual([entry[:2] for entry in artwork.image_variants['formats']['webp']], [[200, 100]])
+
+    def test_replaced_file_falls_back_until_rebuilt(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            artwork = Artwork.objects.create(user=self.user, title='Canvas', image=self._upload())
+        artwork.refresh_from_db()
+        artwork.image = 'artworks/elsewhere.png'
+        html = Template('{% load images %}{% responsive_image artwork.image artwork.image_variants %}').render(
+            Context({'artwork': artwork})
+        )
+        self.assertNotIn('srcset', html)
+        self.assertIn('elsewhere.png', html)
+
+
+class MediaUrlTests(TestCase):
+    """Public media URLs are memoized per name and carry the version token"""
+
+    def test_public_urls_are_memoized(self):
+        storage = FileSystemStorage(location=tempfile.gettempdir(), base_url='/media/')
+        with mock.patch.object(FileSystemStorage, 'url', autospec=True, return_value='/media/a.png') as url:
+            self.assertEqual(media_url('artworks/a.png', storage), '/media/a.png')
+            self.assertEqual(media_url('artworks/a.png', storage), '/media/a.png')
+        url.assert_called_once()
+
+    def test_version_token(self):
+        artwork = Artwork(image='artworks/a b.png')
+        self.assertEqual(media_url(artwork.image), '/media/artworks/a%20b.png')
+        self.assertEqual(media_url(artwork.image, version=7), '/media/artworks/a%20b.png?v=7')
+        with override_settings(MEDIA_URL_VERSION='r2'):
+            self.assertEqual(media_url(artwork.image, version=7), '/media/artworks/a%20b.png?v=r2-7')
+        with override_settings(MEDIA_URL='https://cdn.example.com/media/'):
+            # The memoized URL for the old MEDIA_URL is dropped
+            self.assertEqual(media_url(artwork.image), 'https://cdn.example.com/media/artworks/a%20b.png')
+        self.assertEqual(media_url(Artwork().image), '')
+
+
+@override_settings(IMAGE_UPLOAD_MAX_SIZE=1024 * 1024, IMAGE_UPLOAD_MAX_PIXELS=40_000_000, IMAGE_UPLOAD_MAX_DIMENSION=2560)
+class UploadLimitTests(TestCase):
+    """Oversized uploads are dropped while parsing, accepted ones are normalized"""
+
+    def _png_header(self, width, height):
+        # Signature, IHDR and the start of the pixel data: enough for Pillow to read the size
+        def chunk(kind, data):
+            return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+        ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+        return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr) + chunk(b'IDAT', zlib.compress(b'\0' * 4096))
+
+    def _parse(self, data, name='upload.png'):
+        request = RequestFactory().post('/upload/', {'title': 'Big', 'image': SimpleUploadedFile(name, data)})
+        tracemalloc.start()
+        try:
+            upload = request.FILES['image']
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return upload, peak
+
+    def test_oversized_upload_is_discarded_while_parsing(self):
+        data = self._png_header(100, 100) + b'\0' * (20 * 1024 * 1024)
+        upload, peak = self._parse(data)
+        self.assertIn('at most 1.0', upload.rejection)
+        # Never buffered: the rest of the 20 MB body is read and dropped chunk by chunk
+        self.assertLess(peak, 2 * 1024 * 1024)
+
+        form = ArtworkForm({'title': 'Big'}, {'image': upload})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['image'], [upload.rejection])
+
+    def test_decompression_bombs_are_rejected_from_the_header(self):
+        upload, _ = self._parse(self._png_header(8000, 8000) + b'\0' * 1024)
+        self.assertIn('8000×8000', upload.rejection)
+
+        # Beyond what Pillow itself agrees to open
+        upload, _ = self._parse(self._png_header(50000, 50000))
+        self.assertIn('too many pixels', upload.rejection)
+
+        # Files that never went through the handler get the same check
+        form = ArtworkForm({'title': 'Bomb'}, {'image': SimpleUploadedFile('bomb.png', self._png_header(8000, 8000))})
+        self.assertFalse(form.is_valid())
+        self.assertIn('8000×8000', form.errors['image'][0])
+
+    def test_accepted_images_are_reencoded_without_exif(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90° clockwise
+        exif[0x010F] = 'Test camera'
+        noise = Image.effect_noise((4000, 3000), 64)
+        buffer = BytesIO()
+        Image.merge('RGB', (noise, noise, noise)).save(buffer, 'JPEG', quality=70, exif=exif)
+
+        with override_settings(IMAGE_UPLOAD_MAX_SIZE=20 * 1024 * 1024):
+            upload, _ = self._parse(buffer.getvalue(), name='photo.jpeg')
+            form = ArtworkForm({'title': 'Photo'}, {'image': upload})
+            tracemalloc.start()
+            try:
+                self.assertTrue(form.is_valid(), form.errors)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        image_file = form.cleaned_data['image']
+        self.assertEqual(image_file.name, 'photo.jpg')
+        with Image.open(image_file) as image:
+            self.assertEqual(image.size, (1920, 2560))
+            self.assertEqual(dict(image.getexif()), {})
+        # Pixels stay in Pillow; Python holds roughly the encoded files, not the 36 MB bitmap
+        self.assertLess(peak, 2 * len(buffer.getvalue()) + 2 * 1024 * 1024)
+
+
+class DirectUploadDisabledTests(TestCase):
+    """With local storage everything keeps going through the server"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('uploader', password='pass12345')
+        self.client.force_login(self.user)
+
+    def test_presign_endpoint_is_unavailable(self):
+        response = self.client.post(reverse('pallate:presign_upload'), {
+            'kind': 'artwork', 'filename': 'a.png', 'content_type': 'image/png', 'size': 10,
+        })
+        self.assertEqual(response.status_code, 404)
+
+    def test_tokens_are_ignored(self):
+        form = ArtworkForm({'title': 'Sneaky', 'image_upload': 'token'}, {})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['image'], ['This field is required.'])
+        self.assertNotIn('data-direct-upload', str(form['image']))
+
+
+@skipUnless(mock_aws, 'moto is not installed')
+@override_settings(
+    STORAGES={
+        'default': {
+            'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage',
+            'OPTIONS': {
+                'bucket_name': 'pallate-test', 'location': 'media', 'region_name': 'us-east-1',
+                'access_key': 'testing', 'secret_key': 'testing', 'querystring_auth': False,
+                # As in SupabaseMediaStorage
+                'file_overwrite': False,
+            },
+        },
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    BACKGROUND_JOBS_EAGER=True,
+    IMAGE_UPLOAD_MAX_SIZE=1024 * 1024,
+)
+class DirectUploadTests(TestCase):
+    """Presigned uploads against a local S3 stand-in (moto)"""
+
+    def setUp(self):
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        self.s3 = boto3.client('s3', region_name='us-east-1')
+        self.s3.create_bucket(Bucket='pallate-test')
+        self.user = User.objects.create_user('uploader', password='pass12345')
+
+    def _upload(self, kind, data, declared_size=None, content_type='image/png'):
+        """What direct_upload.js does: presign, then PUT to the bucket"""
+        upload = presign_upload(kind, 'canvas.png', content_type, declared_size or len(data), self.user.pk)
+        key = 'media/' + signing.loads(upload['token'], salt=f'{TOKEN_SALT}:{kind}')['name']
+        self.assertIn(key, upload['url'])
+        self.s3.put_object(Bucket='pallate-test', Key=key, Body=data, ContentType=content_type)
+        return upload['token'], key
+
+    def _confirm(self, token):
+        form = ArtworkForm({'title': 'Direct', 'image_upload': token}, {}, uploader=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            artwork = form.save(commit=False)
+            artwork.user = self.user
+            artwork.save()
+        return artwork
+
+    def _png(self, size=(1600, 900)):
+        buffer = BytesIO()
+        Image.new('RGB', size, (10, 120, 200)).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def test_presign_endpoint(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('pallate:presign_upload'), {
+            'kind': 'artwork', 'filename': 'a.png', 'content_type': 'image/png', 'size': 2 * 1024 * 1024,
+        })
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('pallate:presign_upload'), {
+            'kind': 'artwork', 'filename': 'a.png', 'content_type': 'image/png', 'size': 1024,
+        })
+        self.assertEqual(response.json()['method'], 'PUT')
+
+    def test_confirmed_upload_creates_the_row_and_is_normalized(self):
+        token, key = self._upload('artwork', self._png())
+        artwork = self._confirm(token)
+
+        artwork.refresh_from_db()
+        self.assertTrue(artwork.image.name.startswith('artworks/'))
+        self.assertNotIn('incoming', artwork.image.name)
+        self.assertEqual(artwork.image_variants['source'], artwork.image.name)
+        # The incoming original is gone
+        self.assertNotIn('Contents', self.s3.list_objects_v2(Bucket='pallate-test', Prefix=key))
+
+    def test_oversized_and_foreign_uploads_are_rejected(self):
+        # The browser can send more than it announced
+        token, key = self._upload('artwork', self._png() + b'\0' * (2 * 1024 * 1024), declared_size=1024)
+        with self.assertRaises(ValidationError):
+            resolve_upload(token, 'artwork', self.user.pk)
+        self.assertNotIn('Contents', self.s3.list_objects_v2(Bucket='pallate-test', Prefix=key))
+
+        # A token is only good for the kind it was issued for
+        token, _ = self._upload('avatar', self._png((64, 64)))
+        with self.assertRaises(ValidationError):
+            resolve_upload(token, 'artwork', self.user.pk)
+
+    def test_tokens_are_bound_to_the_user_and_used_once(self):
+        token, key = self._upload('artwork', self._png())
+        other = User.objects.create_user('other', password='pass12345')
+        with self.assertRaises(ValidationError):
+            resolve_upload(token, 'artwork', other.pk)
+        form = ArtworkForm({'title': 'Anonymous', 'image_upload': token}, {})
+        self.assertFalse(form.is_valid())
+
+        self._confirm(token)
+        form = ArtworkForm({'title': 'Again', 'image_upload': token}, {}, uploader=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(Artwork.objects.count(), 1)
+
+    def test_unconfirmed_uploads_are_found(self):
+        confirmed, _ = self._upload('artwork', self._png())
+        self._confirm(confirmed)
+        _, abandoned = self._upload('artwork', self._png())
+        self.assertEqual(list(stale_uploads('artwork')), [])
+
+        later = timezone.now() + timedelta(minutes=1)
+        self.assertEqual(list(stale_uploads('artwork', before=later)), [abandoned[len('media/'):]])
+        self.assertEqual(list(stale_uploads('avatar', before=later)), [])
+
+
+
+@skipUnless(mock_aws, 'moto is not installed')
+class PooledStorageTests(TestCase):
+    """One boto3 client per process, public URLs built without it"""
+
+    def setUp(self):
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='pallate-test')
+        self.storage = PooledS3Storage(
+            bucket_name='pallate-test', location='media', region_name='us-east-1',
+            access_key='testing', secret_key='testing', file_overwrite=False,
+            custom_domain='project.supabase.co/storage/v1/object/public/pallate-test', querystring_auth=False,
+        )
+
+    def test_threads_share_one_client(self):
+        clients = []
+
+        def use_storage():
+            clients.append(self.storage.connection.meta.client)
+
+        threads = [threading.Thread(target=use_storage) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(client) for client in clients}), 1)
+
+    def test_save_open_and_url(self):
+        name = self.storage.save('artworks/hello world.txt', ContentFile(b'hello'))
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b'hello')
+        self.assertEqual(
+            self.storage.url(name),
+            'https://project.supabase.co/storage/v1/object/public/pallate-test/media/artworks/hello%20world.txt',
+        )
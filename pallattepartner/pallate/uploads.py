@@ -0,0 +1,186 @@
+"""
+Limits and normalization for uploaded images (artworks, avatars, chat images).
+
+Two layers:
+
+* ``ImageUploadLimitHandler`` sits first in ``FILE_UPLOAD_HANDLERS`` and
+  watches image fields while the request body is parsed. As soon as a file
+  passes ``IMAGE_UPLOAD_MAX_SIZE`` bytes, or its header declares more than
+  ``IMAGE_UPLOAD_MAX_PIXELS`` pixels (a decompression bomb), the rest of it
+  is discarded instead of being written to memory or a temp file, and the
+  form gets a ``RejectedUpload`` that carries the reason.
+* ``UploadedImageField`` (used by ArtworkForm, MessageForm and ProfileForm)
+  reports those rejections, applies the same limits to files that didn't
+  come through the handler, and re-encodes accepted images: EXIF and other
+  metadata dropped, orientation applied, longest side capped at
+  ``IMAGE_UPLOAD_MAX_DIMENSION``.
+"""
+
+import os
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+# Multipart field names holding images; other uploads (collaboration files) pass through
+IMAGE_FIELDS = ('image', 'avatar')
+
+# Header bytes buffered while waiting for Pillow to find the image size
+HEADER_LIMIT = 256 * 1024
+
+# Pillow format -> (saved as, save options, extension, MIME type)
+OUTPUT_FORMATS = {
+    'JPEG': ('JPEG', {'quality': 90, 'optimize': True, 'progressive': True}, 'jpg', 'image/jpeg'),
+    'WEBP': ('WEBP', {'quality': 90, 'method': 4}, 'webp', 'image/webp'),
+    'PNG': ('PNG', {'optimize': True}, 'png', 'image/png'),
+}
+
+
+def max_upload_size():
+    return getattr(settings, 'IMAGE_UPLOAD_MAX_SIZE', 10 * 1024 * 1024)
+
+
+def max_pixels():
+    return getattr(settings, 'IMAGE_UPLOAD_MAX_PIXELS', 40_000_000)
+
+
+def max_dimension():
+    return getattr(settings, 'IMAGE_UPLOAD_MAX_DIMENSION', 2560)
+
+
+def size_error():
+    return f'Images can be at most {filesizeformat(max_upload_size())}.'
+
+
+def pixels_error(width=None, height=None):
+    if width is None:
+        return f'This image has too many pixels (at most {max_pixels():,} allowed).'
+    return f'This image is too large ({width}×{height} pixels, at most {max_pixels():,} allowed).'
+
+
+def declared_size(file):
+    """(width, height) from an image's header without decoding it, or None.
+
+    Raises ``Image.DecompressionBombError`` for sizes even Pillow refuses to open.
+    """
+    try:
+        with Image.open(file) as image:
+            return image.size
+    except Image.DecompressionBombError:
+        raise
+    except Exception:
+        return None
+
+
+class RejectedUpload(UploadedFile):
+    """Stands in for an image the upload handler stopped reading"""
+
+    def __init__(self, name, content_type, size, rejection):
+        super().__init__(BytesIO(), name, content_type, size)
+        self.rejection = rejection
+
+
+class ImageUploadLimitHandler(FileUploadHandler):
+    """Stops reading an image field once it breaks the size or pixel limits"""
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.watching = field_name in IMAGE_FIELDS
+        self.received = 0
+        self.header = b''
+        self.rejection = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.watching:
+            return raw_data
+        if self.rejection:
+            return None
+
+        self.received += len(raw_data)
+        if self.received > max_upload_size():
+            self.rejection = size_error()
+            return None
+
+        if self.header is not None:
+            self.header += raw_data
+            try:
+                size = declared_size(BytesIO(self.header))
+            except Image.DecompressionBombError:
+                self.rejection = pixels_error()
+                return None
+            if size:
+                self.header = None
+                if size[0] * size[1] > max_pixels():
+                    self.rejection = pixels_error(*size)
+                    return None
+            elif len(self.header) >= HEADER_LIMIT:
+                # Not something Pillow recognizes; the form field will say so
+                self.header = None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.watching and self.rejection:
+            # Returned ahead of the partial file the next handler holds
+            return RejectedUpload(self.file_name, self.content_type, self.received, self.rejection)
+        return None
+
+
+def normalize_image(upload):
+    """Re-encoded copy of ``upload`` without metadata and within the maximum dimension"""
+    upload.seek(0)
+    with Image.open(upload) as image:
+        source_format = image.format
+        icc_profile = image.info.get('icc_profile')
+        limit = max_dimension()
+        # thumbnail() lets JPEG decode at a reduced scale instead of at full size
+        image.thumbnail((limit, limit), Image.LANCZOS)
+        image = ImageOps.exif_transpose(image)
+
+    if source_format not in OUTPUT_FORMATS:
+        # GIF, BMP, TIFF, ... are stored as PNG (first frame only)
+        source_format = 'PNG'
+    pil_format, options, extension, content_type = OUTPUT_FORMATS[source_format]
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        image = image.convert('RGBA')
+
+    buffer = BytesIO()
+    # Only the colour profile is carried over; EXIF (GPS, camera, ...) is not
+    image.save(buffer, pil_format, icc_profile=icc_profile, **options)
+    size = buffer.tell()
+    buffer.seek(0)
+    name = f'{os.path.splitext(os.path.basename(upload.name))[0]}.{extension}'
+    return InMemoryUploadedFile(buffer, getattr(upload, 'field_name', None), name, content_type, size, None)
+
+
+class UploadedImageField(forms.ImageField):
+    """ImageField that enforces the upload limits and stores a normalized copy"""
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return None
+        rejection = getattr(data, 'rejection', None)
+        if rejection:
+            raise forms.ValidationError(rejection, code='rejected')
+        if data.size is not None and data.size > max_upload_size():
+            raise forms.ValidationError(size_error(), code='file_too_large')
+
+        # Check the declared size before Pillow decodes anything
+        data.seek(0)
+        try:
+            size = declared_size(data)
+        except Image.DecompressionBombError:
+            raise forms.ValidationError(pixels_error(), code='too_many_pixels')
+        if size and size[0] * size[1] > max_pixels():
+            raise forms.ValidationError(pixels_error(*size), code='too_many_pixels')
+
+        data = super().to_python(data)
+        try:
+            return normalize_image(data)
+        except Exception as exc:
+            raise forms.ValidationError(self.error_messages['invalid_image'], code='invalid_image') from exc
@@ -1,9 +1,13 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import async_views, views
 
 app_name = 'pallate'
 
+# Read-heavy pages with an ASGI-native version (async_views.py)
+read_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
     path('', views.landing, name='landing'),
     path('login/', views.login_view, name='login'),
@@ -11,21 +15,29 @@ urlpatterns = [
     path('register/', views.register, name='register'),
     path('welcome/', views.welcome, name='welcome'),
     path('account/', views.account, name='account'),
-    path('dashboard/', views.dashboard, name='dashboard'),
-    path('search/', views.search, name='search'),
-    path('artist-profile/', views.artist_profile, name='artist_profile'),  # supports ?user=
-    path('artist/<int:user_id>/', views.artist_profile, name='artist_profile_by_id'),
+    path('dashboard/', read_views.dashboard, name='dashboard'),
+    path('search/', read_views.search, name='search'),
+    path('api/autocomplete/', views.autocomplete, name='autocomplete'),
+    path('artist-profile/', read_views.artist_profile, name='artist_profile'),  # supports ?user=
+    path('artist/<int:user_id>/', read_views.artist_profile, name='artist_profile_by_id'),
     path('collaboration-detail/', views.collaboration_detail, name='collaboration_detail_legacy'),
     path('collaboration/<int:pk>/', views.collaboration_detail, name='collaboration_detail'),
     path('profile/', views.profile_view, name='profile'),
     path('edit-profile/', views.edit_profile, name='edit_profile'),
     path('favorites/', views.favorites, name='favorites'),
     path('upload-artwork/', views.upload_artwork, name='upload_artwork'),
+    path('api/uploads/presign/', views.presign_upload, name='presign_upload'),
     path('toggle-favorite/<int:artwork_id>/', views.toggle_favorite, name='toggle_favorite'),
     path('collaboration/<int:pk>/messages/', views.collab_messages, name='collab_messages'),
+    path('collaboration/<int:pk>/messages/older/', views.collab_messages_older, name='collab_messages_older'),
+    path('collaboration/<int:pk>/messages/poll/', views.collab_messages_poll, name='collab_messages_poll'),
+    path('events/', views.realtime_events, name='realtime_events'),
     path('artwork/<int:artwork_id>/comments/', views.artwork_comments, name='artwork_comments'),
-    path('api/fetch-artworks-by-category/', views.fetch_artworks_by_category, name='fetch_artworks_by_category'),
+    path('api/feed/<str:kind>/', views.feed, name='feed'),
+    path('feed/<str:kind>/fragment/', views.feed_fragment, name='feed_fragment'),
+    path('api/fetch-artworks-by-category/', read_views.fetch_artworks_by_category, name='fetch_artworks_by_category'),
     path('notifications/mark-as-read/<int:notification_id>/', views.mark_notification_as_read, name='mark_notification_as_read'),
+    path('notifications/mark-read/', views.mark_notifications_read, name='mark_notifications_read'),
     path('notifications/', views.notifications_list, name='notifications_list'),
     
     # New features: Matching, Feedback, Featured Artists
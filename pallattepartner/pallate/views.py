@@ -1,13 +1,36 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
 from django.views.decorators.clickjacking import xframe_options_exempt
+from django.views.decorators.http import require_POST
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Count, F, Q
 from django.contrib.auth.models import User
-
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+
+from .artists import discover_page, recent_artworks
+from .autocomplete import suggest
+from .categories import get_category_counts
+from .chat import message_page, messages_after, serialize_message
+from .direct_uploads import direct_uploads_enabled, presign_upload as presign_direct_upload
+from .dispatch import group_text_escape, notify, notify_collaboration
+from .caching import cache_view, deferred
+from .conditional import conditional
+from .feeds import FEED_KINDS, InvalidCursor, artwork_feed_queryset, decode_cursor, feed_page, serialize_artwork
+from .matching import find_matches
+from .notifications import mark_read, request_notification_summary
+from .ratings import feedback_page, rating_summary
+from .realtime import collaboration_channel, event_stream, user_channel
+from .search import parse_page_number, search_documents
+from .stats import stats_for
+from .suggestions import generate_matches, needs_refresh, schedule_refresh
 from .forms import (
     RegisterForm,
     CollaborationForm,
@@ -86,69 +109,22 @@ def dashboard(request):
     # Get selected categories from query params
     selected_categories = request.GET.getlist('categories')
     
-    # Collab posts
-    posts = (
-        Collaboration.objects
-        .select_related('owner')
-        .order_by('-created_at')
-    )
-
-    # Artworks + number of comments per artwork
-    artworks_queryset = (
-        Artwork.objects
-        .select_related('user')
-        .annotate(comment_count=Count('comments'))
-        .order_by('-created_at')
+    # Only the first page of each feed is rendered; dashboard.js pulls the
+    # rest through feed_fragment as the user scrolls. The posts panel is a
+    # cached fragment (caching.py), so its page is only read on a miss.
+    posts_page = deferred(lambda: feed_page('posts'))
+    artworks, next_artworks_cursor, _ = feed_page(
+        'artworks', categories=selected_categories
     )
-    
-    # Filter artworks by categories if specified
-    if selected_categories:
-        # Create a Q object for OR filtering across categories
-        category_filter = Q()
-        for category in selected_categories:
-            category_filter |= Q(categories__icontains=category)
-        artworks_queryset = artworks_queryset.filter(category_filter)
-    
-    artworks = artworks_queryset
 
     # Favorites of current user
-    user_favorites = Favorite.objects.filter(
-        user=request.user
-    ).values_list('artwork_id', flat=True)
+    user_favorites = favorite_artwork_ids(request.user)
 
-    # 🔔 Notifications for this user (top 10 newest)
-    notifications = (
-        Notification.objects
-        .filter(user=request.user)
-        .order_by('-created_at')[:10]
-    )
+    # 🔔 Latest notifications + unread count (cached, shared with the context processor)
+    notification_summary = request_notification_summary(request)
 
-    # Unread count (for the little dot / badge)
-    unread_count = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).count()
-
-    # Define default categories
-    default_categories = [
-        'Digital Art', 'Traditional Art', 'Photography', 
-        'Illustration', 'Graphic Design', '3D Art', 
-        'Animation', 'Concept Art'
-    ]
-    
-    # Get all unique categories from artworks
-    all_artworks = Artwork.objects.all()
-    all_categories = set()
-    for artwork in all_artworks:
-        categories_list = artwork.get_categories_list()
-        all_categories.update(categories_list)
-    
-    # Combine artwork categories with default categories
-    # This ensures we always have categories to display
-    all_categories = sorted(list(set(list(all_categories) + default_categories)))
-    
-    # Debug: Print categories to console
-    print(f"All categories: {all_categories}")
+    # Sorted categories with artwork counts, served from the category index
+    all_categories = deferred(get_category_counts)
 
     if request.method == 'POST':
         form = CollaborationForm(request.POST)
@@ -162,15 +138,72 @@ def dashboard(request):
 
     return render(request, 'pallate/dashboard.html', {
         'form': form,
-        'posts': posts,
+        'posts': deferred(lambda: posts_page[0]),
+        'next_posts_cursor': deferred(lambda: posts_page[1]),
         'artworks': artworks,
+        'next_artworks_cursor': next_artworks_cursor,
         'user_favorites': user_favorites,
-        'notifications': notifications,
-        'unread_count': unread_count,
+        'notifications': notification_summary['notifications'],
+        'unread_count': notification_summary['unread_count'],
         'all_categories': all_categories,
         'selected_categories': selected_categories,
     })
 
+def _feed_request_page(request, kind):
+    """Shared by the JSON and HTML feed endpoints"""
+    if kind not in FEED_KINDS:
+        raise Http404("Unknown feed")
+    categories = request.GET.getlist('categories')
+    if len(categories) == 1 and ',' in categories[0]:
+        categories = [cat.strip() for cat in categories[0].split(',') if cat.strip()]
+    return feed_page(
+        kind,
+        cursor=request.GET.get('cursor') or None,
+        page_size=request.GET.get('limit'),
+        categories=categories,
+    )
+
+
+# Infinite scroll: one page of a dashboard feed as JSON
+@login_required(login_url='pallate:login')
+@cache_view('feed', 'artworks', 'profiles', 'collaborations')
+def feed(request, kind):
+    try:
+        items, next_cursor, serializer = _feed_request_page(request, kind)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    return JsonResponse({
+        'items': [serializer(item) for item in items],
+        'next_cursor': next_cursor,
+    })
+
+
+# Infinite scroll: one page of a dashboard feed as HTML cards for dashboard.js
+@login_required(login_url='pallate:login')
+def feed_fragment(request, kind):
+    try:
+        items, next_cursor, _ = _feed_request_page(request, kind)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+
+    if kind == 'artworks':
+        template = 'pallate/_artwork_cards.html'
+        context = {
+            'artworks': items,
+            'user_favorites': set(
+                Favorite.objects.filter(user=request.user).values_list('artwork_id', flat=True)
+            ),
+        }
+    else:
+        template = 'pallate/_collab_posts.html'
+        context = {'posts': items}
+
+    response = render(request, template, context)
+    response['X-Next-Cursor'] = next_cursor or ''
+    return response
+
+
 @login_required(login_url='pallate:login')
 def mark_notification_as_read(request, notification_id):
     notification = get_object_or_404(
@@ -179,18 +212,46 @@ def mark_notification_as_read(request, notification_id):
         user=request.user
     )
 
-    # mark as read
-    if not notification.is_read:
-        notification.is_read = True
-        notification.save(update_fields=['is_read'])
+    # mark as read (also lowers the unread counter)
+    mark_read(request.user, [notification.id])
 
     # asa ta mo-redirect after clicking
-    redirect_url = request.GET.get('next') or notification.target_url
+    redirect_url = _safe_next(request, request.GET.get('next')) or notification.target_url
     if not redirect_url:
         redirect_url = reverse('pallate:dashboard')
 
     return redirect(redirect_url)
 
+
+def _safe_next(request, url):
+    """``url`` if it points back to this site, else None (no open redirects)"""
+    if url and url_has_allowed_host_and_scheme(
+        url, allowed_hosts={request.get_host()}, require_https=request.is_secure(),
+    ):
+        return url
+    return None
+
+# Mark all (or the posted ``ids``) of the user's notifications as read in one UPDATE
+@login_required(login_url='pallate:login')
+def mark_notifications_read(request):
+    if request.method != 'POST':
+        return redirect('pallate:notifications_list')
+
+    ids = request.POST.getlist('ids')
+    try:
+        ids = [int(i) for i in ids] if ids else None
+    except ValueError:
+        return HttpResponseBadRequest('Invalid notification id')
+
+    marked = mark_read(request.user, ids)
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        unread_count = Profile.objects.filter(user=request.user).values_list(
+            'unread_notifications', flat=True
+        ).first() or 0
+        return JsonResponse({'marked': marked, 'unread_count': unread_count})
+    return redirect(_safe_next(request, request.POST.get('next')) or 'pallate:notifications_list')
+
 @login_required(login_url='pallate:login')
 def notifications_list(request):
     notifications = (
@@ -205,26 +266,16 @@ def notifications_list(request):
 
 # Artist Profile (view another user's public profile)
 @login_required(login_url='pallate:login')
+@conditional('artworks', 'profiles', 'collaborations')
 def artist_profile(request, user_id=None):
     """Discover Artists page - shows all artists with their recent work"""
-    from django.contrib.auth.models import User
-    from django.db.models import Count, Prefetch
-    
-    # Get all users with their profiles and recent artworks
-    artists = User.objects.select_related('profile').prefetch_related(
-        Prefetch('artworks', queryset=Artwork.objects.order_by('-created_at')[:3], to_attr='recent_artworks')
-    ).annotate(
-        artwork_count=Count('artworks'),
-        collab_count=Count('owned_collaborations')
-    ).filter(is_active=True).order_by('-date_joined')
-    
     # If user_id is provided, show that specific artist
     if user_id:
         target_user = get_object_or_404(User, pk=user_id)
         artist_profile = getattr(target_user, 'profile', None)
         artworks = Artwork.objects.filter(user=target_user).order_by('-created_at')
         user_collaborations = Collaboration.objects.filter(owner=target_user).order_by('-created_at')
-        user_favorites = Favorite.objects.filter(user=request.user).values_list('artwork_id', flat=True)
+        user_favorites = favorite_artwork_ids(request.user)
         
         context = {
             'artist_user': target_user,
@@ -236,15 +287,26 @@ def artist_profile(request, user_id=None):
         }
         return render(request, 'pallate/artist_profile.html', context)
     
-    # Show all artists (discover mode)
+    # Show all artists (discover mode), one keyset page at a time. The grid
+    # is a cached fragment (caching.py), so the page is only read on a miss.
+    cursor = request.GET.get('cursor') or None
+    try:
+        if cursor:
+            decode_cursor(cursor)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    page = deferred(lambda: discover_page(cursor=cursor))
     context = {
-        'artists': artists,
+        'artists': deferred(lambda: page[0]),
+        'next_cursor': deferred(lambda: page[1]),
         'show_single': False,
     }
     return render(request, 'pallate/artist_profile.html', context)
 
 # API endpoint to fetch artworks by category
 @login_required(login_url='pallate:login')
+@conditional('artworks', 'profiles', per_user=False)
+@cache_view('artworks_by_category', 'artworks', 'profiles')
 def fetch_artworks_by_category(request):
     from django.http import JsonResponse
     
@@ -252,41 +314,12 @@ def fetch_artworks_by_category(request):
         # Handle multiple categories
         categories = request.GET.get('categories', '')
         
-        if categories:
-            # Split categories by comma
-            category_list = [cat.strip() for cat in categories.split(',') if cat.strip()]
-            
-            # Create a Q object for OR filtering across categories
-            from django.db.models import Q
-            category_filter = Q()
-            for category in category_list:
-                # Match exact categories in the comma-separated list
-                category_filter |= Q(categories__iregex=r'(?:^|,)' + category + r'(?:,|$)')
-            
-            artworks = Artwork.objects.filter(category_filter).select_related('user').annotate(
-                comment_count=Count('comments')
-            ).order_by('-created_at')[:20]  # Limit to 20 artworks
-        else:
-            artworks = Artwork.objects.select_related('user').annotate(
-                comment_count=Count('comments')
-            ).order_by('-created_at')[:20]
+        # Split categories by comma; matched exactly through the category index
+        category_list = [cat.strip() for cat in categories.split(',') if cat.strip()]
+        artworks = artwork_feed_queryset(category_list).order_by('-created_at')[:20]  # Limit to 20 artworks
         
         # Serialize artworks data
-        artworks_data = []
-        for artwork in artworks:
-            artworks_data.append({
-                'id': artwork.id,
-                'title': artwork.title,
-                'description': artwork.description,
-                'image_url': artwork.image.url if artwork.image else '',
-                'user_username': artwork.user.username,
-                'user_first_name': artwork.user.first_name,
-                'user_id': artwork.user.id,
-                'created_at': artwork.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'comment_count': artwork.comment_count,
-                'favorite_count': artwork.favorited_by.count(),
-                'categories': artwork.get_categories_list(),
-            })
+        artworks_data = [serialize_artwork(artwork) for artwork in artworks]
         
         return JsonResponse({'artworks': artworks_data})
     
@@ -373,7 +406,7 @@ def edit_profile(request):
     profile = request.user.profile
 
     if request.method == 'POST':
-        form = ProfileForm(request.POST, request.FILES, instance=profile)
+        form = ProfileForm(request.POST, request.FILES, instance=profile, uploader=request.user)
         if form.is_valid():
             # Save Profile + User (username, email, names, password)
             profile_instance = form.save(commit=True)
@@ -396,11 +429,33 @@ def edit_profile(request):
     return render(request, 'pallate/edit_profile.html', {'form': form})
 
 
+# Direct uploads: signed URL for sending a file straight to the bucket (direct_upload.js)
+@login_required
+@require_POST
+def presign_upload(request):
+    if not direct_uploads_enabled():
+        raise Http404
+    try:
+        size = int(request.POST.get('size', 0))
+        upload = presign_direct_upload(
+            request.POST.get('kind', ''),
+            request.POST.get('filename', ''),
+            request.POST.get('content_type', ''),
+            size,
+            request.user.pk,
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid parameters'}, status=400)
+    except ValidationError as error:
+        return JsonResponse({'error': error.messages[0]}, status=400)
+    return JsonResponse(upload)
+
+
 # Upload Artwork
 @login_required
 def upload_artwork(request):
     if request.method == 'POST':
-        form = ArtworkForm(request.POST, request.FILES)
+        form = ArtworkForm(request.POST, request.FILES, uploader=request.user)
         if form.is_valid():
             artwork = form.save(commit=False)
             artwork.user = request.user
@@ -441,106 +496,157 @@ def toggle_favorite(request, artwork_id):
     from django.http import JsonResponse
     
     artwork = get_object_or_404(Artwork, id=artwork_id)
-    favorite, created = Favorite.objects.get_or_create(user=request.user, artwork=artwork)
-    
-    if not created:
-        favorite.delete()
-        favorited = False
+    artworks = Artwork.objects.filter(pk=artwork.pk)
+
+    # Keep Artwork.favorite_count in step with the Favorite rows.
+    # F() makes the increment happen in the database, so concurrent clicks can't lose updates.
+    with transaction.atomic():
+        favorite, created = Favorite.objects.get_or_create(user=request.user, artwork=artwork)
+        if created:
+            artworks.update(favorite_count=F('favorite_count') + 1)
+            favorited = True
+        else:
+            deleted, _ = Favorite.objects.filter(pk=favorite.pk).delete()
+            if deleted:
+                artworks.filter(favorite_count__gt=0).update(favorite_count=F('favorite_count') - 1)
+            favorited = False
+
+    if not favorited:
         messages.info(request, "Removed from favorites.")
-    else:
-        favorited = True
     
     # Return JSON for AJAX requests
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return JsonResponse({'favorited': favorited})
+        favorite_count = artworks.values_list('favorite_count', flat=True).get()
+        return JsonResponse({'favorited': favorited, 'favorite_count': favorite_count})
     
     return redirect('pallate:dashboard')
 
 
 # Search View
+def _ranked(hits, objects):
+    """``objects`` ({pk: obj}) in the order of the search hits, with their snippets"""
+    results = []
+    for hit in hits:
+        obj = objects.get(hit.object_id)
+        # A document can briefly outlive its row
+        if obj is not None:
+            obj.search_snippet = hit.snippet
+            results.append(obj)
+    return results
+
+
+def search_artworks(query, page=1):
+    """One page of artworks matching ``query``, best match first. Returns (artworks, has_next)."""
+    hits, has_next = search_documents('artwork', query, page)
+    artworks = (
+        Artwork.objects
+        .select_related('user')
+        .annotate(comment_count=Count('comments'))
+        .in_bulk([hit.object_id for hit in hits])
+    )
+    return _ranked(hits, artworks), has_next
+
+
+def search_artists(query, page=1):
+    """One page of artists matching ``query`` by username or profile details. Returns (users, has_next)."""
+    hits, has_next = search_documents('artist', query, page)
+    users = User.objects.select_related('profile').in_bulk([hit.object_id for hit in hits])
+    return _ranked(hits, users), has_next
+
+
+def favorite_artwork_ids(user):
+    return Favorite.objects.filter(user=user).values_list('artwork_id', flat=True)
+
+
 @login_required
 def search(request):
     query = request.GET.get('q', '').strip()
+    page = parse_page_number(request.GET.get('page'))
     
-    artworks = []
-    artists = []
+    artworks, more_artworks = [], False
+    artists, more_artists = [], False
     
     if query:
-        # Search artworks by title or description
-        artworks = (
-            Artwork.objects
-            .filter(
-                Q(title__icontains=query) | 
-                Q(description__icontains=query)
-            )
-            .select_related('user')
-            .annotate(comment_count=Count('comments'))
-            .order_by('-created_at')
-        )
+        # Ranked full-text search over titles, descriptions and categories
+        artworks, more_artworks = search_artworks(query, page)
         
-        # Search users by username or profile details
-        artists = (
-            User.objects
-            .filter(
-                Q(username__icontains=query) |
-                Q(profile__bio__icontains=query) |
-                Q(profile__art_type__icontains=query)
-            )
-            .select_related('profile')
-            .distinct()
-        )
+        # ...and over usernames and profile details
+        artists, more_artists = search_artists(query, page)
     
     # Get user's favorites for the heart icon display
-    user_favorites = Favorite.objects.filter(
-        user=request.user
-    ).values_list('artwork_id', flat=True)
+    user_favorites = favorite_artwork_ids(request.user)
     
     return render(request, 'pallate/search_results.html', {
         'query': query,
         'artworks': artworks,
         'artists': artists,
         'user_favorites': user_favorites,
+        'page': page,
+        'has_next': more_artworks or more_artists,
+    })
+
+
+@login_required(login_url='pallate:login')
+def autocomplete(request):
+    """Typeahead suggestions for the search box, served from the in-memory prefix index"""
+    query = request.GET.get('q', '').strip()
+    suggestions = suggest(query)
+    search_url = reverse('pallate:search')
+    dashboard_url = reverse('pallate:dashboard')
+
+    return JsonResponse({
+        'query': query,
+        'artists': [
+            {'id': pk, 'label': label, 'url': reverse('pallate:artist_profile_by_id', args=[pk])}
+            for pk, label in suggestions['artist']
+        ],
+        'artworks': [
+            {'id': pk, 'label': label, 'url': f"{search_url}?{urlencode({'q': label})}"}
+            for pk, label in suggestions['artwork']
+        ],
+        'categories': [
+            {'label': label, 'url': f"{dashboard_url}?{urlencode({'categories': label})}"}
+            for _, label in suggestions['category']
+        ],
     })
 
 
 @login_required
 def collab_messages(request, pk):
     collaboration = get_object_or_404(Collaboration, pk=pk)
-
-    messages_qs = (
-        Message.objects
-        .filter(collaboration=collaboration)
-        .select_related("sender")
-        .order_by("timestamp")
-    )
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
     if request.method == 'POST':
-        form = MessageForm(request.POST, request.FILES)
+        form = MessageForm(request.POST, request.FILES, uploader=request.user)
         if form.is_valid():
             message = form.save(commit=False)
             message.collaboration = collaboration
             message.sender = request.user
             message.save()
 
-            if hasattr(models, "Notification") and request.user != collaboration.user:
-                try:
-                    Notification.objects.create(
-                        user=collaboration.user,
-                        actor=request.user,
-                        notification_type="message",
-                        message=f"New message from {request.user.username} in '{collaboration.title}'",
-                        target_url=reverse("pallate:collab_messages", args=[pk]),
-                    )
-                except TypeError:
-                    Notification.objects.create(
-                        user=collaboration.user,
-                        text=f"New message from {request.user.username} in '{collaboration.title}'"
-                    )
+            # Every other member is notified; unread ones coalesce per collaboration
+            notify_collaboration(
+                collaboration,
+                f"New message from {request.user.username} in '{collaboration.title}'",
+                actor=request.user,
+                notification_type='message',
+                target_url=reverse('pallate:collab_messages', args=[pk]),
+                group_key=f'messages:{pk}',
+                group_text=f"{{count}} new messages in '{group_text_escape(collaboration.title)}'",
+            )
 
+            # chat.js sends without reloading and picks the message up by polling
+            if is_ajax:
+                return JsonResponse({'id': message.id}, status=201)
             return redirect('pallate:collab_messages', pk=pk)
+        if is_ajax:
+            return JsonResponse({'errors': form.errors}, status=400)
     else:
         form = MessageForm()
 
+    # Latest page only; older pages and new messages are fetched by chat.js
+    chat_messages, older_cursor = message_page(collaboration)
+
     participants = (
         User.objects
         .filter(message__collaboration=collaboration)
@@ -549,12 +655,79 @@ def collab_messages(request, pk):
 
     return render(request, 'pallate/collab_messages.html', {
         'collaboration': collaboration,
-        'messages': messages_qs,
+        'messages': chat_messages,
+        'older_cursor': older_cursor,
+        'last_message_id': chat_messages[-1].id if chat_messages else 0,
         'participants': participants,
         'form': form,
     })
 
 
+# Chat: a page of messages older than ?cursor=, as rendered bubbles
+@login_required
+def collab_messages_older(request, pk):
+    collaboration = get_object_or_404(Collaboration, pk=pk)
+    try:
+        chat_messages, older_cursor = message_page(
+            collaboration,
+            cursor=request.GET.get('cursor') or None,
+            page_size=request.GET.get('limit'),
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    return JsonResponse({
+        'html': render_to_string(
+            'pallate/_chat_messages.html', {'messages': chat_messages}, request=request
+        ),
+        'next_cursor': older_cursor,
+    })
+
+
+# Chat: messages newer than ?after=<id> (pushed live by the SSE stream, see realtime.py)
+@login_required
+def collab_messages_poll(request, pk):
+    collaboration = get_object_or_404(Collaboration, pk=pk)
+    try:
+        after_id = int(request.GET.get('after', 0))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid parameters'}, status=400)
+
+    chat_messages = messages_after(collaboration, after_id)
+    return JsonResponse({
+        'messages': [serialize_message(message) for message in chat_messages],
+        'html': render_to_string(
+            'pallate/_chat_messages.html', {'messages': chat_messages}, request=request
+        ) if chat_messages else '',
+        'last_id': chat_messages[-1].id if chat_messages else after_id,
+    })
+
+
+# Server-Sent Events: the user's notifications, plus a chat room's messages
+# with ?collaboration=<id>. Needs the ASGI app (see realtime.py).
+@login_required
+async def realtime_events(request):
+    if not isinstance(request, ASGIRequest):
+        # 204 tells EventSource to stop retrying; clients keep polling instead
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    channels = [user_channel(user.pk)]
+    collaboration_id = request.GET.get('collaboration')
+    if collaboration_id:
+        if not collaboration_id.isdigit():
+            return HttpResponseBadRequest('Invalid collaboration')
+        if not await Collaboration.objects.filter(pk=collaboration_id).aexists():
+            raise Http404("Unknown collaboration")
+        channels.append(collaboration_channel(collaboration_id))
+
+    response = StreamingHttpResponse(event_stream(channels), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # ============================================
 # NEW FEATURES: Matching, Feedback, Featured
 # ============================================
@@ -564,44 +737,8 @@ def find_collaborators(request):
     """Find and suggest potential collaborators based on art_type and interests"""
     current_profile = request.user.profile
     
-    # Get all users except current user
-    potential_matches = []
-    all_users = User.objects.exclude(id=request.user.id).select_related('profile')
-    
-    for user in all_users:
-        if hasattr(user, 'profile'):
-            profile = user.profile
-            match_score = 0
-            match_reasons = []
-            
-            # Check art_type match
-            if current_profile.art_type and profile.art_type:
-                if current_profile.art_type.lower() in profile.art_type.lower() or \
-                   profile.art_type.lower() in current_profile.art_type.lower():
-                    match_score += 50
-                    match_reasons.append(f"Matching art type: {profile.art_type}")
-            
-            # Check interests overlap
-            current_interests = set(i.lower() for i in current_profile.get_interests_list())
-            user_interests = set(i.lower() for i in profile.get_interests_list())
-            common_interests = current_interests & user_interests
-            
-            if common_interests:
-                match_score += len(common_interests) * 20
-                match_reasons.append(f"Common interests: {', '.join(common_interests)}")
-            
-            # Only include users with some match
-            if match_score > 0:
-                potential_matches.append({
-                    'user': user,
-                    'profile': profile,
-                    'match_score': match_score,
-                    'match_reasons': match_reasons,
-                    'artworks_count': Artwork.objects.filter(user=user).count(),
-                })
-    
-    # Sort by match score
-    potential_matches.sort(key=lambda x: x['match_score'], reverse=True)
+    # Only profiles sharing an art-type word or interest are scored (see matching.py)
+    potential_matches = find_matches(current_profile)
     
     return render(request, 'pallate/find_collaborators.html', {
         'matches': potential_matches,
@@ -612,7 +749,7 @@ def find_collaborators(request):
 @login_required
 def collaboration_feedback(request, collaboration_id):
     """Submit feedback/rating for a collaboration"""
-    collaboration = get_object_or_404(Collaboration, id=collaboration_id)
+    collaboration = get_object_or_404(Collaboration.objects.select_related('owner__stats'), id=collaboration_id)
     
     # Check if user already submitted feedback
     existing_feedback = CollaborationFeedback.objects.filter(
@@ -634,9 +771,12 @@ def collaboration_feedback(request, collaboration_id):
             
             # Notify collaboration owner
             if request.user != collaboration.user:
-                Notification.objects.create(
-                    user=collaboration.user,
-                    text=f"{request.user.username} rated your collaboration '{collaboration.title}' - {feedback.rating}/5"
+                notify(
+                    [collaboration.user],
+                    f"{request.user.username} rated your collaboration '{collaboration.title}' - {feedback.rating}/5",
+                    actor=request.user,
+                    notification_type='feedback',
+                    target_url=reverse('pallate:collaboration_feedback', args=[collaboration_id]),
                 )
             
             messages.success(request, 'Thank you for your feedback!')
@@ -647,47 +787,51 @@ def collaboration_feedback(request, collaboration_id):
         else:
             form = CollaborationFeedbackForm()
     
-    # Get all feedbacks for this collaboration
-    all_feedbacks = CollaborationFeedback.objects.filter(
-        collaboration=collaboration
-    ).select_related('reviewer').order_by('-created_at')
-    
-    # Calculate average rating
-    if all_feedbacks.exists():
-        avg_rating = sum(f.rating for f in all_feedbacks) / len(all_feedbacks)
-    else:
-        avg_rating = 0
+    # One page of reviews; the average and histogram are aggregated (and cached) in ratings.py
+    try:
+        feedbacks, next_cursor = feedback_page(collaboration.pk, cursor=request.GET.get('cursor') or None)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    summary = rating_summary(collaboration.pk)
     
     return render(request, 'pallate/collaboration_feedback.html', {
         'collaboration': collaboration,
         'form': form,
         'existing_feedback': existing_feedback,
-        'all_feedbacks': all_feedbacks,
-        'avg_rating': round(avg_rating, 1),
+        'feedbacks': feedbacks,
+        'next_cursor': next_cursor,
+        'rating_summary': summary,
+        'avg_rating': summary['average'],
+        'owner_stats': stats_for(collaboration.owner),
     })
 
 
 @login_required
+@conditional('artworks', 'profiles')
 def featured_artists(request):
     """Display featured artists"""
-    featured_profiles = Profile.objects.filter(
+    # The grid is a cached fragment (caching.py), only read on a miss
+    return render(request, 'pallate/featured_artists.html', {
+        'featured_data': deferred(featured_artist_cards),
+    })
+
+
+def featured_artist_cards():
+    featured_profiles = list(Profile.objects.filter(
         is_featured=True
-    ).select_related('user').order_by('-user__date_joined')
+    ).select_related('user__stats').order_by('-user__date_joined'))
     
-    # Get their artworks
+    # Their 3 latest artworks in one query, counts from UserStats (stats.py)
+    recent = recent_artworks([profile.user_id for profile in featured_profiles])
     featured_data = []
     for profile in featured_profiles:
-        artworks = Artwork.objects.filter(user=profile.user).order_by('-created_at')[:3]
         featured_data.append({
             'profile': profile,
             'user': profile.user,
-            'artworks': artworks,
-            'total_artworks': Artwork.objects.filter(user=profile.user).count(),
+            'artworks': recent.get(profile.user_id, []),
+            'total_artworks': stats_for(profile.user).artwork_count,
         })
-    
-    return render(request, 'pallate/featured_artists.html', {
-        'featured_data': featured_data,
-    })
+    return featured_data
 
 
 @login_required
@@ -700,40 +844,12 @@ def collaboration_matches(request, collaboration_id):
         messages.error(request, "You don't have permission to view these matches.")
         return redirect('pallate:collaboration_detail', pk=collaboration_id)
     
-    # Generate matches if not exists
-    existing_matches = CollaborationMatch.objects.filter(collaboration=collaboration)
-    
-    if not existing_matches.exists():
-        # Generate matches based on collaboration owner's profile
-        owner_profile = collaboration.owner.profile
-        potential_users = User.objects.exclude(id=request.user.id).select_related('profile')
-        
-        for user in potential_users:
-            if hasattr(user, 'profile'):
-                profile = user.profile
-                match_score = 0
-                
-                # Art type match
-                if owner_profile.art_type and profile.art_type:
-                    if owner_profile.art_type.lower() in profile.art_type.lower() or \
-                       profile.art_type.lower() in owner_profile.art_type.lower():
-                        match_score += 50
-                
-                # Interests overlap
-                owner_interests = set(i.lower() for i in owner_profile.get_interests_list())
-                user_interests = set(i.lower() for i in profile.get_interests_list())
-                common_interests = owner_interests & user_interests
-                
-                if common_interests:
-                    match_score += len(common_interests) * 20
-                
-                # Create match if score > 0
-                if match_score > 0:
-                    CollaborationMatch.objects.create(
-                        collaboration=collaboration,
-                        suggested_user=user,
-                        match_score=match_score
-                    )
+    # First visit: generate in bulk right away. Afterwards, rescoring profiles
+    # changed since the last run happens in a background job.
+    if collaboration.matches_refreshed_at is None:
+        generate_matches(collaboration)
+    elif needs_refresh(collaboration):
+        schedule_refresh([collaboration.pk])
     
     # Get all matches
     matches = CollaborationMatch.objects.filter(
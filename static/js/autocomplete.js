@@ -0,0 +1,117 @@
+// Search box typeahead (views.autocomplete / autocomplete.py).
+// Keystrokes are debounced with utils.js, answers are remembered per query
+// for the page's lifetime and a request still in flight is aborted when the
+// user keeps typing.
+const AUTOCOMPLETE_DELAY_MS = 150;
+const AUTOCOMPLETE_MIN_LENGTH = 2;
+
+const AUTOCOMPLETE_SECTIONS = [
+    ['artists', 'Artists'],
+    ['artworks', 'Artworks'],
+    ['categories', 'Categories'],
+];
+
+function initializeAutocomplete(input) {
+    if (input.dataset.autocompleteReady) return;
+    input.dataset.autocompleteReady = '1';
+
+    const form = input.form;
+    const answers = new Map();
+    let controller = null;
+    let active = -1;
+
+    const menu = document.createElement('div');
+    menu.className = 'hidden absolute left-0 right-0 top-full mt-1 bg-card-dark border border-border-dark rounded-md shadow-lg z-30 py-1 text-sm';
+    menu.setAttribute('role', 'listbox');
+    form.classList.add('relative');
+    form.appendChild(menu);
+
+    const items = () => Array.from(menu.querySelectorAll('a'));
+
+    function hide() {
+        menu.classList.add('hidden');
+        active = -1;
+    }
+
+    function highlight(index) {
+        const links = items();
+        links.forEach((link, i) => link.classList.toggle('bg-[#1F2937]', i === index));
+        active = index;
+    }
+
+    function render(data) {
+        menu.replaceChildren();
+        for (const [key, title] of AUTOCOMPLETE_SECTIONS) {
+            if (!data[key] || !data[key].length) continue;
+            const heading = document.createElement('p');
+            heading.className = 'px-4 pt-2 pb-1 text-xs uppercase tracking-wide text-muted';
+            heading.textContent = title;
+            menu.appendChild(heading);
+            for (const suggestion of data[key]) {
+                const link = document.createElement('a');
+                link.href = suggestion.url;
+                link.className = 'block px-4 py-1.5 text-text-light hover:bg-[#1F2937] truncate';
+                link.setAttribute('role', 'option');
+                link.textContent = suggestion.label;
+                menu.appendChild(link);
+            }
+        }
+        active = -1;
+        menu.classList.toggle('hidden', !menu.childElementCount);
+    }
+
+    async function lookup() {
+        const query = input.value.trim().toLowerCase();
+        if (query.length < AUTOCOMPLETE_MIN_LENGTH) {
+            hide();
+            return;
+        }
+        if (answers.has(query)) {
+            render(answers.get(query));
+            return;
+        }
+        if (controller) controller.abort();
+        controller = new AbortController();
+        try {
+            const url = `${input.dataset.autocompleteUrl}?q=${encodeURIComponent(query)}`;
+            const response = await fetch(url, {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' },
+                signal: controller.signal,
+            });
+            if (!response.ok) throw new Error(`Autocomplete failed: ${response.status}`);
+            const data = await response.json();
+            answers.set(query, data);
+            // Skip answers to a query the user has already typed past
+            if (input.value.trim().toLowerCase() === query) render(data);
+        } catch (error) {
+            if (error.name !== 'AbortError') console.error(error);
+        }
+    }
+
+    input.addEventListener('input', debounce(lookup, AUTOCOMPLETE_DELAY_MS));
+
+    input.addEventListener('keydown', (event) => {
+        const links = items();
+        if (menu.classList.contains('hidden') || !links.length) return;
+        if (event.key === 'ArrowDown') {
+            event.preventDefault();
+            highlight((active + 1) % links.length);
+        } else if (event.key === 'ArrowUp') {
+            event.preventDefault();
+            highlight((active - 1 + links.length) % links.length);
+        } else if (event.key === 'Enter' && active >= 0) {
+            event.preventDefault();
+            window.location.href = links[active].href;
+        } else if (event.key === 'Escape') {
+            hide();
+        }
+    });
+
+    document.addEventListener('click', (event) => {
+        if (!form.contains(event.target)) hide();
+    });
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('input[data-autocomplete-url]').forEach(initializeAutocomplete);
+});
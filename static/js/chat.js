@@ -1,42 +1,147 @@
-// Chat functionality
+// Collaboration room chat (collab_messages.html).
+// Only the latest messages are rendered by the server: older pages are
+// fetched with a keyset cursor and new messages are polled by id
+// (see chat.py / views.collab_messages_poll). When the server-sent event
+// stream is up (realtime.py), a "chat" event triggers the poll right away
+// and the timer only runs as a slow safety net.
+const CHAT_POLL_MIN_MS = 3000;
+const CHAT_POLL_MAX_MS = 15000;
+
 function initializeChat() {
-    const messageInput = document.querySelector('.message-field');
-    const sendButton = document.querySelector('.message-input .btn-primary');
-    const chatMessages = document.querySelector('.chat-messages');
-
-    if (messageInput && sendButton) {
-        function sendMessage() {
-            const message = messageInput.value.trim();
-            if (message) {
-                addMessageToChat('Alex Chen', message, 'just now');
-                messageInput.value = '';
-                chatMessages.scrollTop = chatMessages.scrollHeight;
+    const container = document.getElementById('chatMessages');
+    if (!container || container.dataset.chatReady) return;
+    container.dataset.chatReady = '1';
+
+    const list = document.getElementById('chatMessageList');
+    const olderButton = document.getElementById('chatLoadOlder');
+    const form = document.getElementById('chatForm');
+    const headers = { 'X-Requested-With': 'XMLHttpRequest' };
+
+    let lastId = parseInt(container.dataset.lastId || '0', 10);
+    let cursor = container.dataset.cursor;
+    let delay = CHAT_POLL_MIN_MS;
+    let timer = null;
+    let polling = false;
+    let streaming = false;
+
+    const nearBottom = () =>
+        container.scrollHeight - container.scrollTop - container.clientHeight < 80;
+    const scrollToBottom = () => { container.scrollTop = container.scrollHeight; };
+
+    async function poll() {
+        if (polling) return;
+        polling = true;
+        try {
+            const response = await fetch(`${container.dataset.pollUrl}?after=${lastId}`, { headers });
+            if (!response.ok) throw new Error(`Poll failed: ${response.status}`);
+            const data = await response.json();
+
+            if (data.messages.length) {
+                const stick = nearBottom();
+                const empty = document.getElementById('chatEmpty');
+                if (empty) empty.remove();
+                list.insertAdjacentHTML('beforeend', data.html);
+                lastId = data.last_id;
+                delay = CHAT_POLL_MIN_MS;
+                if (stick) scrollToBottom();
+            } else {
+                // Back off while the room is quiet
+                delay = Math.min(delay * 1.5, CHAT_POLL_MAX_MS);
             }
+            if (streaming) delay = CHAT_POLL_MAX_MS;
+        } catch (error) {
+            console.error(error);
+            delay = CHAT_POLL_MAX_MS;
+        } finally {
+            polling = false;
         }
+    }
+
+    function schedule() {
+        clearTimeout(timer);
+        if (document.hidden) return;
+        timer = setTimeout(async () => {
+            await poll();
+            schedule();
+        }, delay);
+    }
+
+    // No polling from background tabs
+    document.addEventListener('visibilitychange', () => {
+        if (document.hidden) {
+            clearTimeout(timer);
+            return;
+        }
+        delay = CHAT_POLL_MIN_MS;
+        poll().then(schedule);
+    });
+
+    if (olderButton) {
+        olderButton.addEventListener('click', async () => {
+            if (!cursor) return;
+            olderButton.disabled = true;
+            try {
+                const url = `${container.dataset.olderUrl}?cursor=${encodeURIComponent(cursor)}`;
+                const response = await fetch(url, { headers });
+                if (!response.ok) throw new Error(`Loading older messages failed: ${response.status}`);
+                const data = await response.json();
 
-        sendButton.addEventListener('click', sendMessage);
+                // Keep the messages the user was reading in place
+                const previousHeight = container.scrollHeight;
+                list.insertAdjacentHTML('afterbegin', data.html);
+                container.scrollTop += container.scrollHeight - previousHeight;
 
-        messageInput.addEventListener('keypress', function (e) {
-            if (e.key === 'Enter') sendMessage();
+                cursor = data.next_cursor;
+                if (!cursor) olderButton.classList.add('hidden');
+            } catch (error) {
+                console.error(error);
+            } finally {
+                olderButton.disabled = false;
+            }
+        });
+    }
+
+    // Send without a full page reload, then pick the message up with a poll
+    if (form) {
+        form.addEventListener('submit', async (event) => {
+            event.preventDefault();
+            if (typeof prepareDirectUploads === 'function') await prepareDirectUploads(form);
+            const response = await fetch(form.action || window.location.href, {
+                method: 'POST',
+                body: new FormData(form),
+                headers,
+            });
+            if (!response.ok) {
+                form.submit();
+                return;
+            }
+            form.reset();
+            form.querySelectorAll('input[name$="_upload"]').forEach((token) => token.remove());
+            await poll();
+            scrollToBottom();
+            delay = CHAT_POLL_MIN_MS;
+            schedule();
         });
     }
-}
 
-function addMessageToChat(sender, message, timestamp) {
-    const chatMessages = document.querySelector('.chat-messages');
-    if (!chatMessages) return;
-
-    const messageElement = document.createElement('div');
-    messageElement.className = 'message';
-    messageElement.innerHTML = `
-        <img src="https://via.placeholder.com/32x32/4A90E2/FFFFFF?text=${sender.charAt(0)}" alt="${sender}">
-        <div class="message-content">
-            <div class="message-header">
-                <span class="sender">${sender}</span>
-                <span class="timestamp">${timestamp}</span>
-            </div>
-            <p>${message}</p>
-        </div>
-    `;
-    chatMessages.appendChild(messageElement);
-}
\ No newline at end of file
+    if (window.EventSource && container.dataset.streamUrl) {
+        const stream = new EventSource(container.dataset.streamUrl);
+        stream.addEventListener('open', () => {
+            streaming = true;
+            delay = CHAT_POLL_MAX_MS;
+        });
+        stream.addEventListener('chat', (event) => {
+            const data = JSON.parse(event.data);
+            if (data.id > lastId) poll();
+        });
+        stream.addEventListener('error', () => {
+            // The browser reconnects by itself unless the server said no (CLOSED)
+            streaming = false;
+            delay = CHAT_POLL_MIN_MS;
+            if (stream.readyState === EventSource.CLOSED) schedule();
+        });
+    }
+
+    scrollToBottom();
+    schedule();
+}
@@ -54,4 +54,79 @@ document.addEventListener('DOMContentLoaded', () => {
   document.addEventListener('keydown', (e) => {
     if (e.key === 'Escape') closeModal();
   });
+
+  // Infinite scroll for the dashboard feeds.
+  // The server renders the first page only; the rest is fetched as HTML
+  // fragments keyed by an opaque cursor (see feeds.py / views.feed_fragment).
+  // Resolves to 'more', 'end' (no next cursor), 'busy' (a load is already
+  // in flight) or 'error'.
+  const loadFeedPage = async (trigger, insertBefore) => {
+    const cursor = trigger.dataset.cursor;
+    if (!cursor) return 'end';
+    if (trigger.dataset.loading === 'true') return 'busy';
+    trigger.dataset.loading = 'true';
+
+    const params = new URLSearchParams({ cursor });
+    if (trigger.dataset.categories) params.append('categories', trigger.dataset.categories);
+
+    try {
+      const response = await fetch(`${trigger.dataset.fragmentUrl}?${params.toString()}`, {
+        headers: { 'X-Requested-With': 'XMLHttpRequest' },
+      });
+      if (!response.ok) throw new Error('Network response was not ok');
+
+      const fragment = document.createElement('template');
+      fragment.innerHTML = await response.text();
+      // Newly added cards need the same comment handler as the server-rendered ones
+      if (typeof handleCommentsClick === 'function') {
+        fragment.content.querySelectorAll('.open-comments').forEach((button) => {
+          button.addEventListener('click', handleCommentsClick);
+        });
+      }
+      insertBefore.parentNode.insertBefore(fragment.content, insertBefore);
+      const nextCursor = response.headers.get('X-Next-Cursor');
+      if (nextCursor) {
+        trigger.dataset.cursor = nextCursor;
+        return 'more';
+      }
+      delete trigger.dataset.cursor;
+      trigger.remove();
+      return 'end';
+    } catch (error) {
+      console.error('Error loading feed:', error);
+      return 'error';
+    } finally {
+      trigger.dataset.loading = 'false';
+    }
+  };
+
+  const artworkSentinel = document.getElementById('artworkFeedSentinel');
+  if (artworkSentinel && 'IntersectionObserver' in window) {
+    const observer = new IntersectionObserver((entries) => {
+      entries.forEach(async (entry) => {
+        if (!entry.isIntersecting) return;
+        const status = await loadFeedPage(artworkSentinel, artworkSentinel);
+        if (status === 'end') {
+          observer.disconnect();
+        } else if (status === 'more') {
+          // Observing again reports the current intersection, so a sentinel
+          // that is still in view after the new cards loads the next page
+          observer.unobserve(artworkSentinel);
+          observer.observe(artworkSentinel);
+        }
+      });
+    }, { root: document.getElementById('recentUploadsScroller'), rootMargin: '200px' });
+    observer.observe(artworkSentinel);
+  }
+
+  const postFeedMore = document.getElementById('postFeedMore');
+  const postFeedList = document.getElementById('postFeedList');
+  if (postFeedMore && postFeedList) {
+    postFeedMore.addEventListener('click', () => {
+      // Append inside the list, after the last post
+      const anchor = document.createElement('div');
+      postFeedList.appendChild(anchor);
+      loadFeedPage(postFeedMore, anchor).finally(() => anchor.remove());
+    });
+  }
 });
\ No newline at end of file
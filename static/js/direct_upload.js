@@ -0,0 +1,71 @@
+// Direct-to-storage uploads (direct_uploads.py).
+// File inputs rendered with data-direct-upload send their file straight to
+// the bucket through a signed URL from data-presign-url; the form is then
+// submitted with a <name>_upload token instead of the file. If anything goes
+// wrong the file stays in the input and goes through the server as before.
+
+async function directUpload(input) {
+    const file = input.files && input.files[0];
+    if (!file) return;
+
+    const csrf = input.form.querySelector('input[name="csrfmiddlewaretoken"]');
+    const body = new FormData();
+    body.append('kind', input.dataset.directUpload);
+    body.append('filename', file.name);
+    body.append('content_type', file.type || 'application/octet-stream');
+    body.append('size', file.size);
+
+    const presign = await fetch(input.dataset.presignUrl, {
+        method: 'POST',
+        body,
+        headers: {
+            'X-Requested-With': 'XMLHttpRequest',
+            'X-CSRFToken': csrf ? csrf.value : '',
+        },
+    });
+    if (!presign.ok) throw new Error(`Presign failed: ${presign.status}`);
+    const upload = await presign.json();
+
+    const response = await fetch(upload.url, {
+        method: upload.method,
+        headers: upload.headers,
+        body: file,
+    });
+    if (!response.ok) throw new Error(`Upload failed: ${response.status}`);
+
+    let token = input.form.querySelector(`input[name="${input.name}_upload"]`);
+    if (!token) {
+        token = document.createElement('input');
+        token.type = 'hidden';
+        token.name = `${input.name}_upload`;
+        input.form.appendChild(token);
+    }
+    token.value = upload.token;
+    // Keep the file out of the form body
+    input.value = '';
+}
+
+// Uploads every pending file of ``form``; chat.js awaits this before sending
+async function prepareDirectUploads(form) {
+    const inputs = form.querySelectorAll('input[type="file"][data-direct-upload]');
+    for (const input of inputs) {
+        try {
+            await directUpload(input);
+        } catch (error) {
+            console.error(error);
+        }
+    }
+}
+
+document.addEventListener('submit', async (event) => {
+    const form = event.target;
+    // Forms sent by script (chat.js) call prepareDirectUploads themselves
+    if (event.defaultPrevented) return;
+    const pending = Array.from(form.querySelectorAll('input[type="file"][data-direct-upload]'))
+        .some((input) => input.files && input.files.length);
+    if (!pending) return;
+
+    event.preventDefault();
+    await prepareDirectUploads(form);
+    form.submit();
+});
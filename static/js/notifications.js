@@ -49,4 +49,14 @@ document.addEventListener("DOMContentLoaded", () => {
       e.stopPropagation();
     });
   }
-});
\ No newline at end of file
+
+  // Live unread dot from the server-sent event stream (realtime.py).
+  // Without an ASGI server the stream answers 204 and EventSource gives up.
+  const dot = document.getElementById("notifDot");
+  if (window.EventSource && bell.dataset.streamUrl && dot) {
+    const stream = new EventSource(bell.dataset.streamUrl);
+    stream.addEventListener("notification", () => {
+      dot.classList.remove("hidden");
+    });
+  }
+});